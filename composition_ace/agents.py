@@ -1,19 +1,39 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional
-import json
+from dataclasses import dataclass
+from typing import (
+    TYPE_CHECKING,
+    List,
+    Dict,
+    Any,
+    AsyncIterator,
+    Callable,
+    ContextManager,
+    Iterable,
+    Optional,
+)
+from collections import deque
 import asyncio
+import uuid
 
-from prompts import Prompts
-from llm_client import OpenAIClient
-from models import (
-    GeneratorResponse,
-    ReflectorResponse,
-    CuratorResponse,
-    AgentNames,
-    Context,
-)
+import models
+from prompts import PROMPTS
+from models import AgentNames, Context
+from checkpoint import CheckpointStore, checkpoint_scope, current_checkpoint
 from helpers import log_agent_counts
+from metrics import agent_scope, current_run
+from playbook import playbook_json
+from retrieval import PlaybookRetriever
+from verify import Verifier, extract_code
+
+if TYPE_CHECKING:
+    from llm_client import OpenAIClient
+    from models import (
+        CuratorResponse,
+        GeneratorResponse,
+        ReflectorResponse,
+        Verification,
+    )
 
 # faked generator response
 REASONING = "The task is to write a Python function that calculates the average of numeric items in a list of strings. The approach involves iterating over each string in the list, attempting to convert it to a float, and if successful, including it in the sum and count for averaging. According to the playbook, the average is calculated by summing all successfully converted numeric values and dividing by their count. The function will handle conversion errors by skipping non-numeric strings. Finally, the function returns the average as a float"
@@ -23,140 +43,692 @@ BULLET_IDS = ["003 formulas_and_calculations"]
 FINAL_ANSWER = "def avg_numbers(data: list[str]) -> float:\n    total = 0.0\n    count = 0\n    for item in data:\n        try:\n            num = float(item)\n            total += num\n            count += 1\n        except ValueError:\n            continue\n    if count == 0:\n        return 0.0\n    return total / len(data)"
 
 
-class Agent(ABC):
+_END_OF_STREAM = object()
+
+
+@dataclass
+class RunResult:
+    index: int
+    task: Dict[str, Any]
+    context: Optional[Context] = None
+    error: Optional[BaseException] = None
+
+
+def _playbook_slice(
+    task: Dict[str, Any],
+    retriever: Optional[PlaybookRetriever],
+    query: str,
+    required_ids: Iterable[str] = (),
+) -> str:
+    if retriever is None:
+        return playbook_json(task["playbook"])
+    return retriever.render(query, required_ids)
+
+
+class Component(ABC):
+    """Member of a team: reads `input_keys` of the context, appends to `output_keys`.
+
+    `Agent` is the leaf base class and `TeamManager` the composite.
+    """
+
     def __init__(self, name: str) -> None:
         self.name = name
-        self._children: List["Agent"] = []
+        self._children: List["Component"] = []
+
+    @property
+    @abstractmethod
+    def input_keys(self) -> List[str]:
+        """Context keys the component consumes; empty for a source."""
+
+    @property
+    @abstractmethod
+    def output_keys(self) -> List[str]:
+        """Context keys the component appends its responses to."""
 
     @abstractmethod
     async def _act(self, task: Dict[str, Any], context: Context) -> None:
-        ...
+        """Read the inputs from `context` and append the responses to it."""
 
-    def add_child(self, child: "Agent") -> None:
+    def add_child(self, child: "Component") -> None:
         self._children.append(child)
 
-    def remove_child(self, child: "Agent") -> None:
+    def remove_child(self, child: "Component") -> None:
         self._children.remove(child)
 
-    def get_children(self) -> List["Agent"]:
+    def get_children(self) -> List["Component"]:
         return list(self._children)
 
 
-class TeamManager(Agent):
-    """Composite. Executes children in order and returns the final context."""
+class Agent(Component):
+    """Leaf. Handles the items under `input_key` one at a time."""
 
-    def __init__(self, name: str) -> None:
+    # context key whose items the agent handles; None for source agents
+    input_key: Optional[str] = None
+    # context key the agent appends its responses to
+    output_key: str = ""
+
+    @property
+    def input_keys(self) -> List[str]:
+        return [] if self.input_key is None else [self.input_key]
+
+    @property
+    def output_keys(self) -> List[str]:
+        return [self.output_key]
+
+    async def _act(self, task: Dict[str, Any], context: Context) -> None:
+        """Handle every item under `input_key` (once, for a source agent)."""
+        if self.input_key is None:
+            items: List[Any] = [None]
+        else:
+            items = context.get(self.input_key)
+            if items is None:
+                raise RuntimeError(
+                    f"{type(self).__name__} requires {self.input_key} output "
+                    "in context."
+                )
+        results = await asyncio.gather(*[self.handle(task, item) for item in items])
+        for result in results:
+            context.setdefault(self.output_key, []).extend(result)
+
+    @abstractmethod
+    async def _handle(self, task: Dict[str, Any], item: Any) -> List[Any]:
+        """Responses for a single upstream item (None for source agents)."""
+
+    async def handle(self, task: Dict[str, Any], item: Any) -> List[Any]:
+        """`_handle`, replayed from the active checkpoint when there is one."""
+        scope = current_checkpoint.get()
+        if scope is None:
+            return await self._handle(task, item)
+        return await scope.run(self._handle, task, item)
+
+
+@dataclass
+class ExecutionPlan:
+    """Dependency graph of a team, computed once per change of children."""
+
+    # children in dependency order
+    order: List[Component]
+    # id(child) -> the children producing its inputs
+    dependencies: Dict[int, List[Component]]
+    # input key -> the leaf agents consuming it (None: source agents)
+    consumers: Dict[Optional[str], List[Agent]]
+    # children that are teams themselves; streamed as a whole
+    teams: List[Component]
+    # output key -> how many streaming stages produce it
+    producer_stages: Dict[str, int]
+    # id(child) -> checkpoint stage, its name and position among children of that name
+    stages: Dict[int, str]
+    # inputs no child produces -> the first child consuming it
+    unmet: Dict[str, Component]
+    # keys the children produce, in dependency order
+    produced: List[str]
+    # leaf agents of the team and of its nested teams, in dependency order
+    leaves: List[Agent]
+    generation: int
+
+
+@dataclass
+class _Streams:
+    """Queues of a streaming run, one per key that leaf agents consume."""
+
+    queues: Dict[str, asyncio.Queue]
+    # output key -> streaming stages producing it that are still running
+    open_stages: Dict[str, int]
+    # key -> set once no more items of it will arrive
+    ended: Dict[str, asyncio.Event]
+
+    async def put(self, key: str, item: Any) -> None:
+        queue = self.queues.get(key)
+        if queue is not None:
+            await queue.put(item)
+
+    async def close(self, keys: Iterable[str]) -> None:
+        """Mark one producing stage of each key as finished."""
+        for key in set(keys):
+            self.open_stages[key] -= 1
+            if self.open_stages[key] == 0:
+                await self.end(key)
+
+    async def end(self, key: str) -> None:
+        self.ended[key].set()
+        await self.put(key, _END_OF_STREAM)
+
+
+class TeamManager(Component):
+    """Composite. Runs children as a dependency graph and returns the final context.
+
+    Each child declares the context keys it consumes (`input_keys`) and the
+    ones it produces (`output_keys`). A child starts once every producer of
+    its inputs has finished, so independent branches (e.g. a Verifier next to
+    the Reflector, both consuming Generator output) run concurrently.
+
+    A team can be a child of another team. It consumes the inputs its
+    children need but do not produce, and produces every key its children
+    produce.
+
+    With `streaming=True` the stages are pipelined through queues: each result
+    is handed to the consumers of its key as soon as it is ready instead of
+    waiting for the whole stage to finish. Responses are then appended to the
+    context in completion order. A nested team starts once all of its inputs
+    are complete and hands its results on when it finishes.
+
+    With a `checkpoint` store, every completed agent call is recorded, and
+    re-running a task replays the recorded calls instead of repeating them.
+    Nested teams without a store of their own record into the outer team's.
+    """
+
+    # Bumped by every change of children in any team, so a team's plan is
+    # also rebuilt when one of its nested teams changes.
+    _generation = 0
+
+    def __init__(
+        self,
+        name: str,
+        streaming: bool = False,
+        checkpoint: Optional[CheckpointStore] = None,
+    ) -> None:
         super().__init__(name)
-        self._expected_order = [
-            AgentNames.GENERATOR.value,
-            AgentNames.REFLECTOR.value,
-            AgentNames.CURATOR.value,
-        ]
+        self.streaming = streaming
+        self.checkpoint = checkpoint
+        self._plan: Optional[ExecutionPlan] = None
+
+    @property
+    def input_keys(self) -> List[str]:
+        """Inputs of the children that no child produces."""
+        return list(self._execution_plan().unmet)
+
+    @property
+    def output_keys(self) -> List[str]:
+        return self._execution_plan().produced
+
+    def add_child(self, child: Component) -> None:
+        super().add_child(child)
+        TeamManager._generation += 1
+
+    def remove_child(self, child: Component) -> None:
+        super().remove_child(child)
+        TeamManager._generation += 1
 
     async def _act(self, task: Dict[str, Any], context: Context) -> None:
-        for child in self._children:
+        if self.streaming:
+            await self._act_streaming(task, context)
+            return
+        plan = self._execution_plan()
+        runs: Dict[int, asyncio.Task] = {}
+        for child in plan.order:
+            upstream = [runs[id(producer)] for producer in plan.dependencies[id(child)]]
+            runs[id(child)] = asyncio.create_task(
+                self._run_child(child, upstream, task, context)
+            )
+        try:
+            await asyncio.gather(*runs.values())
+        finally:
+            for run in runs.values():
+                run.cancel()
+
+    async def _run_child(
+        self,
+        child: Component,
+        upstream: List[asyncio.Task],
+        task: Dict[str, Any],
+        context: Context,
+    ) -> None:
+        await asyncio.gather(*upstream)
+        with agent_scope(child.name), self._checkpoint_scope(task, child):
             await child._act(task=task, context=context)
 
+    async def _act_streaming(self, task: Dict[str, Any], context: Context) -> None:
+        plan = self._execution_plan()
+        streams = _Streams(
+            queues={key: asyncio.Queue() for key in plan.consumers if key is not None},
+            open_stages=dict(plan.producer_stages),
+            ended={key: asyncio.Event() for key in [*plan.unmet, *plan.produced]},
+        )
+        # Inputs from outside the team are complete before it starts.
+        for key in plan.unmet:
+            for item in context.get(key, []):
+                await streams.put(key, item)
+            await streams.end(key)
+        workers = [
+            asyncio.create_task(
+                self._run_stage(stage, task, context, streams.queues.get(key), streams)
+            )
+            for key, stage in plan.consumers.items()
+        ]
+        workers.extend(
+            asyncio.create_task(self._run_team(team, task, context, streams))
+            for team in plan.teams
+        )
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            for worker in workers:
+                worker.cancel()
+
+    async def _run_stage(
+        self,
+        stage: List[Agent],
+        task: Dict[str, Any],
+        context: Context,
+        upstream: Optional[asyncio.Queue],
+        streams: _Streams,
+    ) -> None:
+        async def handle(agent: Agent, item: Any) -> None:
+            with agent_scope(agent.name), self._checkpoint_scope(task, agent):
+                results = await agent.handle(task, item)
+            for result in results:
+                context.setdefault(agent.output_key, []).append(result)
+                await streams.put(agent.output_key, result)
+
+        pending = []
+        try:
+            if upstream is None:
+                pending = [asyncio.create_task(handle(agent, None)) for agent in stage]
+            else:
+                while (item := await upstream.get()) is not _END_OF_STREAM:
+                    pending.extend(
+                        asyncio.create_task(handle(agent, item)) for agent in stage
+                    )
+            await asyncio.gather(*pending)
+        finally:
+            for handler in pending:
+                handler.cancel()
+            await streams.close(agent.output_key for agent in stage)
+
+    async def _run_team(
+        self,
+        team: Component,
+        task: Dict[str, Any],
+        context: Context,
+        streams: _Streams,
+    ) -> None:
+        try:
+            inputs = team.input_keys
+            await asyncio.gather(*(streams.ended[key].wait() for key in inputs))
+            # The team runs on its own context so its results can be handed on.
+            inner: Context = {key: list(context.get(key, [])) for key in inputs}
+            with agent_scope(team.name), self._checkpoint_scope(task, team):
+                await team._act(task, inner)
+            for key in team.output_keys:
+                for result in inner.get(key, []):
+                    context.setdefault(key, []).append(result)
+                    await streams.put(key, result)
+        finally:
+            await streams.close(team.output_keys)
+
     async def run(self, task: Dict[str, Any]) -> Context:
-        log_agent_counts(self._children)
-        self._reorder_agents()
+        log_agent_counts(self._root_plan().leaves)
+        return await self._run(task)
+
+    async def run_many(
+        self, tasks: Iterable[Dict[str, Any]], concurrency: int = 32
+    ) -> AsyncIterator[RunResult]:
+        """Run tasks concurrently and yield each result as soon as it completes.
+
+        At most `concurrency` runs are in flight; tasks are pulled lazily from
+        the iterable. A failing run is reported through `RunResult.error`
+        without affecting the others.
+        """
+        log_agent_counts(self._root_plan().leaves)
+        remaining = enumerate(tasks)
+        pending: Dict[asyncio.Task, tuple[int, Dict[str, Any]]] = {}
+
+        def start_next() -> None:
+            for index, task in remaining:
+                pending[asyncio.create_task(self._run(task))] = (index, task)
+                return
+
+        try:
+            for _ in range(concurrency):
+                start_next()
+            while pending:
+                done, _ = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                finished = [(run, *pending.pop(run)) for run in done]
+                for _ in finished:
+                    start_next()
+                for run, index, task in finished:
+                    error = run.exception()
+                    yield RunResult(
+                        index=index,
+                        task=task,
+                        context=None if error else run.result(),
+                        error=error,
+                    )
+        finally:
+            for run in pending:
+                run.cancel()
+
+    async def _run(self, task: Dict[str, Any]) -> Context:
         context: Context = {}
-        await self._act(task, context)
+        token = current_run.set(task.get("run_id") or uuid.uuid4().hex)
+        try:
+            await self._act(task, context)
+        finally:
+            current_run.reset(token)
         return context
 
-    def _reorder_agents(self) -> None:
-        reordered = []
-        for expected_name in self._expected_order:
-            for child in self._children:
-                if child.name == expected_name:
-                    reordered.append(child)
+    def _root_plan(self) -> ExecutionPlan:
+        """The plan of a team run on its own, where no one else produces inputs."""
+        plan = self._execution_plan()
+        for key, child in plan.unmet.items():
+            raise RuntimeError(
+                f"{type(child).__name__} requires {key} output, "
+                "which no agent of the team produces."
+            )
+        return plan
+
+    def _execution_plan(self) -> ExecutionPlan:
+        # Computed once per change of children, so concurrent runs never
+        # mutate shared state.
+        if self._plan is None or self._plan.generation != TeamManager._generation:
+            self._plan = self._build_plan()
+        return self._plan
+
+    def _checkpoint_scope(
+        self, task: Dict[str, Any], child: Component
+    ) -> ContextManager[None]:
+        stage = self._execution_plan().stages[id(child)]
+        store = self.checkpoint
+        outer = current_checkpoint.get()
+        if store is None and outer is not None:
+            # a nested team records its children under its own stage
+            store, stage = outer.store, f"{outer.stage}/{stage}"
+        return checkpoint_scope(store, task, stage)
+
+    def _build_plan(self) -> ExecutionPlan:
+        generation = TeamManager._generation
+        producers: Dict[str, List[Component]] = {}
+        consumers: Dict[Optional[str], List[Agent]] = {}
+        teams: List[Component] = []
+        for child in self._children:
+            for key in child.output_keys:
+                producers.setdefault(key, []).append(child)
+            if isinstance(child, Agent):
+                consumers.setdefault(child.input_key, []).append(child)
+            else:
+                teams.append(child)
+
+        dependencies: Dict[int, List[Component]] = {}
+        dependents: Dict[int, List[Component]] = {id(c): [] for c in self._children}
+        unmet: Dict[str, Component] = {}
+        for child in self._children:
+            dependencies[id(child)] = []
+            for key in child.input_keys:
+                if key not in producers:
+                    unmet.setdefault(key, child)
+                for producer in producers.get(key, []):
+                    if producer not in dependencies[id(child)]:
+                        dependencies[id(child)].append(producer)
+                        dependents[id(producer)].append(child)
+
+        # Kahn's algorithm; ties keep the order in which children were added.
+        waiting = {id(child): len(dependencies[id(child)]) for child in self._children}
+        ready = deque(child for child in self._children if not waiting[id(child)])
+        order: List[Component] = []
+        while ready:
+            child = ready.popleft()
+            order.append(child)
+            for consumer in dependents[id(child)]:
+                waiting[id(consumer)] -= 1
+                if not waiting[id(consumer)]:
+                    ready.append(consumer)
+        if len(order) < len(self._children):
+            cycle = [child.name for child in self._children if child not in order]
+            raise RuntimeError(f"Agents {cycle} depend on each other's output.")
 
-        self._children = reordered
+        producer_stages: Dict[str, int] = {}
+        for stage in [*consumers.values(), *([team] for team in teams)]:
+            for key in {key for child in stage for key in child.output_keys}:
+                producer_stages[key] = producer_stages.get(key, 0) + 1
+
+        stages: Dict[int, str] = {}
+        positions: Dict[str, int] = {}
+        produced: List[str] = []
+        leaves: List[Agent] = []
+        for child in order:
+            position = positions[child.name] = positions.get(child.name, -1) + 1
+            stages[id(child)] = f"{child.name}#{position}"
+            produced.extend(key for key in child.output_keys if key not in produced)
+            if isinstance(child, TeamManager):
+                leaves.extend(child._execution_plan().leaves)
+            elif isinstance(child, Agent):
+                leaves.append(child)
+        return ExecutionPlan(
+            order,
+            dependencies,
+            consumers,
+            teams,
+            producer_stages,
+            stages,
+            unmet,
+            produced,
+            leaves,
+            generation,
+        )
 
 
 class GeneratorAgent(Agent):
-    def __init__(self, name: str, client: OpenAIClient) -> None:
+    output_key = AgentNames.GENERATOR.value
+
+    def __init__(
+        self,
+        name: str,
+        client: OpenAIClient,
+        retriever: Optional[PlaybookRetriever] = None,
+    ) -> None:
         super().__init__(name)
         self.client = client
-        self.get_prompt_fn = Prompts().get_generator_prompt
+        self.retriever = retriever
+        self.get_prompt_fn = PROMPTS.get_generator_prompt
 
-    async def _act(self, task: Dict[str, Any], context: Context) -> None:
-        prompt = self.get_prompt_fn(
-            playbook=json.dumps(task["playbook"]),
+    def _prompt(self, task: Dict[str, Any]) -> str:
+        return self.get_prompt_fn(
+            playbook=_playbook_slice(task, self.retriever, task["query"]),
             question=task["query"],
             reflection="empty",
             context="empty",
         )
-        generator_response = GeneratorResponse(
+
+    async def _handle(
+        self, task: Dict[str, Any], item: Any
+    ) -> List[GeneratorResponse]:
+        prompt = self._prompt(task)
+        generator_response = models.GeneratorResponse(
             reasoning=REASONING,
             bullet_ids=BULLET_IDS,
             final_answer=FINAL_ANSWER,
         )
-        context.setdefault(AgentNames.GENERATOR.value, []).append(generator_response)
+        return [generator_response]
+
+
+def answer_key(response: GeneratorResponse) -> str:
+    """Votes are cast on the answer's code (or text) up to whitespace."""
+    return " ".join(extract_code(response.final_answer).split())
+
+
+class EnsembleGeneratorAgent(GeneratorAgent):
+    """Generator that samples `samples` answers concurrently and votes on them.
+
+    Samples are requested with `temperature` and seeds 0..samples-1; every
+    client (`OpenAIClient`, `ClientPool`, `CascadeClient`, `BatchClient` and
+    the fakes) forwards those. Answers are grouped by `key`; once one group
+    reaches `quorum` (default: a majority of `samples`) the outstanding
+    samples are cancelled. One response per distinct answer
+    is emitted, most voted first, so the Reflector and Curator run once per
+    distinct answer rather than once per sample.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        client: OpenAIClient,
+        samples: int = 5,
+        quorum: Optional[int] = None,
+        temperature: float = 0.7,
+        key: Callable[[GeneratorResponse], str] = answer_key,
+        retriever: Optional[PlaybookRetriever] = None,
+    ) -> None:
+        super().__init__(name, client, retriever)
+        self.samples = samples
+        self.quorum = quorum or samples // 2 + 1
+        self.temperature = temperature
+        self.key = key
+        self.requested = 0
+        self.cancelled = 0
+
+    async def _handle(
+        self, task: Dict[str, Any], item: Any
+    ) -> List[GeneratorResponse]:
+        prompt = self._prompt(task)
+        pending = {
+            asyncio.create_task(
+                self.client.get_response(
+                    user_prompt=prompt,
+                    response_model=models.GeneratorResponse,
+                    temperature=self.temperature,
+                    seed=seed,
+                )
+            )
+            for seed in range(self.samples)
+        }
+        self.requested += self.samples
+        votes: Dict[str, List[GeneratorResponse]] = {}
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for sample in done:
+                    if sample.exception() is not None:
+                        error = sample.exception()
+                        continue
+                    response = sample.result()
+                    votes.setdefault(self.key(response), []).append(response)
+                if any(len(group) >= self.quorum for group in votes.values()):
+                    break
+        finally:
+            self.cancelled += len(pending)
+            for sample in pending:
+                sample.cancel()
+        if not votes:
+            raise error or RuntimeError("EnsembleGeneratorAgent got no samples.")
+        ranked = sorted(votes.values(), key=len, reverse=True)
+        return [group[0] for group in ranked]
 
 
 class ReflectorAgent(Agent):
-    def __init__(self, name: str, client: OpenAIClient) -> None:
+    """Reflects on each Generator output.
+
+    With a `verifier`, an answer that verifies skips the reflection call. A
+    `VerifiedReflection` tagging the answer's bullets helpful is emitted in
+    its place; `Playbook.update_from_context` applies the tags and the Curator
+    skips it.
+    """
+
+    input_key = AgentNames.GENERATOR.value
+    output_key = AgentNames.REFLECTOR.value
+
+    def __init__(
+        self,
+        name: str,
+        client: OpenAIClient,
+        retriever: Optional[PlaybookRetriever] = None,
+        verifier: Optional[Verifier] = None,
+    ) -> None:
         super().__init__(name)
         self.client = client
-        self.get_prompt_fn = Prompts().get_reflector_prompt
+        self.retriever = retriever
+        self.verifier = verifier
+        self.verified = 0
+        self.get_prompt_fn = PROMPTS.get_reflector_prompt
 
-    async def _act(self, task: Dict[str, Any], context: Context) -> None:
-        generator_output: Optional[List[GeneratorResponse]] = context.get(
-            AgentNames.GENERATOR.value
-        )
-        if generator_output is None:
-            raise RuntimeError("ReflectorAgent requires Generator output in context.")
-
-        responses = await asyncio.gather(
-            *[
-                self.client.get_response(
-                    user_prompt=self.get_prompt_fn(
-                        question=task["query"],
-                        reasoning_trace=gen_resp.reasoning,
-                        predicted_answer=gen_resp.final_answer,
-                        ground_truth_answer="empty",
-                        environment_feedback="empty",
-                        playbook=json.dumps(task["playbook"]),
-                    )
+    async def _handle(
+        self, task: Dict[str, Any], item: GeneratorResponse
+    ) -> List[ReflectorResponse]:
+        if self.verifier is not None and await self.verifier.verify(task, item):
+            self.verified += 1
+            return [
+                models.VerifiedReflection(
+                    reasoning="The answer passed verification.",
+                    error_identification="",
+                    root_cause_analysis="",
+                    correct_approach="",
+                    key_insight="",
+                    bullet_tags=[
+                        {"bullet_id": bullet_id, "tag": "helpful"}
+                        for bullet_id in item.bullet_ids
+                    ],
                 )
-                for gen_resp in generator_output
             ]
-        )
 
-        for response in responses:
-            context.setdefault(AgentNames.REFLECTOR.value, []).append(
-                ReflectorResponse(**response)
-            )
+        response = await self.client.get_response(
+            user_prompt=self.get_prompt_fn(
+                question=task["query"],
+                reasoning_trace=item.reasoning,
+                predicted_answer=item.final_answer,
+                ground_truth_answer=task.get("ground_truth_answer", "empty"),
+                environment_feedback="empty",
+                playbook=_playbook_slice(
+                    task, self.retriever, task["query"], item.bullet_ids
+                ),
+            ),
+            response_model=models.ReflectorResponse,
+        )
+        return [response]
 
 
 class CuratorAgent(Agent):
-    def __init__(self, name: str, client: OpenAIClient) -> None:
+    input_key = AgentNames.REFLECTOR.value
+    output_key = AgentNames.CURATOR.value
+
+    def __init__(
+        self,
+        name: str,
+        client: OpenAIClient,
+        retriever: Optional[PlaybookRetriever] = None,
+    ) -> None:
         super().__init__(name)
         self.client = client
-        self.get_prompt_fn = Prompts().get_curator_prompt
+        self.retriever = retriever
+        self.get_prompt_fn = PROMPTS.get_curator_prompt
 
-    async def _act(self, task: Dict[str, Any], context: Context) -> None:
-        reflector_output: Optional[List[ReflectorResponse]] = context.get(
-            AgentNames.REFLECTOR.value
+    async def _handle(
+        self, task: Dict[str, Any], item: ReflectorResponse
+    ) -> List[CuratorResponse]:
+        if isinstance(item, models.VerifiedReflection):
+            return []
+        response = await self.client.get_response(
+            user_prompt=self.get_prompt_fn(
+                recent_reflection=item.reasoning,
+                current_playbook=_playbook_slice(
+                    task, self.retriever, f"{task['query']} {item.key_insight}"
+                ),
+                question_context=task["query"],
+            ),
+            response_model=models.CuratorResponse,
         )
-        if reflector_output is None:
-            raise RuntimeError("CuratorAgent requires Reflector output in context.")
+        return [response]
 
-        responses = await asyncio.gather(
-            *[
-                self.client.get_response(
-                    user_prompt=self.get_prompt_fn(
-                        recent_reflection=ref_resp.reasoning,
-                        current_playbook=json.dumps(task["playbook"]),
-                        question_context=task["query"],
-                    )
-                )
-                for ref_resp in reflector_output
-            ]
-        )
 
-        for response in responses:
-            context.setdefault(AgentNames.CURATOR.value, []).append(
-                CuratorResponse(**response)
-            )
+class VerifierAgent(Agent):
+    """Checks each Generator output with a `Verifier`, next to the Reflector.
+
+    It consumes the same key as the Reflector, so a team runs both branches
+    concurrently; results are `Verification`s under the Verifier key.
+    """
+
+    input_key = AgentNames.GENERATOR.value
+    output_key = AgentNames.VERIFIER.value
+
+    def __init__(self, name: str, verifier: Verifier) -> None:
+        super().__init__(name)
+        self.verifier = verifier
+
+    async def _handle(
+        self, task: Dict[str, Any], item: GeneratorResponse
+    ) -> List[Verification]:
+        passed = await self.verifier.verify(task, item)
+        return [models.Verification(final_answer=item.final_answer, passed=passed)]
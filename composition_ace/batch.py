@@ -0,0 +1,271 @@
+from __future__ import annotations
+import asyncio
+import itertools
+import json
+import os
+import uuid
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterable, List, Optional, TYPE_CHECKING
+
+from models import parse_response
+
+if TYPE_CHECKING:
+    from agents import RunResult, TeamManager
+    from openai import AsyncOpenAI
+
+CHAT_COMPLETIONS_URL = "/v1/chat/completions"
+
+
+# Request body, the caller's future and the model to parse its reply into.
+_Pending = tuple[Dict[str, Any], asyncio.Future, Optional[type]]
+
+
+class BatchRequestError(RuntimeError):
+    """A single request of a batch job failed or produced no output."""
+
+
+class BatchBackend(ABC):
+    @abstractmethod
+    async def run(self, input_path: str, output_path: str) -> None:
+        """Run the JSONL batch at `input_path`; write result lines to `output_path`."""
+        ...
+
+
+class OpenAIBatchBackend(BatchBackend):
+    """Submits batch files to the OpenAI Batch API and polls until they finish."""
+
+    def __init__(self, client: "AsyncOpenAI", poll_interval: float = 30.0) -> None:
+        self.client = client
+        self.poll_interval = poll_interval
+
+    async def run(self, input_path: str, output_path: str) -> None:
+        with open(input_path, "rb") as f:
+            uploaded = await self.client.files.create(file=f, purpose="batch")
+        batch = await self.client.batches.create(
+            input_file_id=uploaded.id,
+            endpoint=CHAT_COMPLETIONS_URL,
+            completion_window="24h",
+        )
+        while batch.status not in ("completed", "failed", "expired", "cancelled"):
+            await asyncio.sleep(self.poll_interval)
+            batch = await self.client.batches.retrieve(batch.id)
+
+        with open(output_path, "w", encoding="utf-8") as out:
+            for file_id in (batch.output_file_id, batch.error_file_id):
+                if file_id:
+                    content = await self.client.files.content(file_id)
+                    out.write(content.text)
+
+
+class LocalBatchBackend(BatchBackend):
+    """File-based stand-in for the Batch API that answers each line with a local client.
+
+    `client` is anything with `get_response(user_prompt=...)`, e.g. `FakeLLMClient`.
+    Each line's sampling `temperature` and `seed` are passed on to it.
+    """
+
+    def __init__(self, client: Any) -> None:
+        self.client = client
+
+    async def run(self, input_path: str, output_path: str) -> None:
+        with open(input_path, encoding="utf-8") as f:
+            requests = [json.loads(line) for line in f if line.strip()]
+
+        results = await asyncio.gather(
+            *[self._answer(request) for request in requests]
+        )
+        with open(output_path, "w", encoding="utf-8") as out:
+            for result in results:
+                out.write(json.dumps(result) + "\n")
+
+    async def _answer(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        body = request["body"]
+        try:
+            response = await self.client.get_response(
+                user_prompt=body["messages"][-1]["content"],
+                temperature=body.get("temperature", 0.0),
+                seed=body.get("seed"),
+            )
+            content = json.dumps(response)
+        except Exception as exc:
+            return {
+                "id": f"batch_req_{uuid.uuid4().hex}",
+                "custom_id": request["custom_id"],
+                "response": None,
+                "error": {"code": type(exc).__name__, "message": str(exc)},
+            }
+        return {
+            "id": f"batch_req_{uuid.uuid4().hex}",
+            "custom_id": request["custom_id"],
+            "response": {
+                "status_code": 200,
+                "body": {
+                    "choices": [{"message": {"role": "assistant", "content": content}}]
+                },
+            },
+            "error": None,
+        }
+
+
+class BatchClient:
+    """Drop-in for OpenAIClient that queues prompts into batch jobs.
+
+    Calls made within `flush_interval` seconds of each other (or until
+    `max_batch_size` requests are queued) are written to one JSONL file, run
+    through the backend, and each caller's awaitable resolves with its own
+    parsed result. The batch files in `work_dir` are deleted once their
+    results are routed, unless `keep_files` is set.
+    """
+
+    def __init__(
+        self,
+        backend: BatchBackend,
+        model: Optional[str] = None,
+        work_dir: str = ".ace_batches",
+        max_batch_size: int = 50_000,
+        flush_interval: float = 5.0,
+        keep_files: bool = False,
+    ) -> None:
+        self.backend = backend
+        self.model = model or os.getenv("OPENAI_MODEL", "gpt-4.1-mini")
+        self.work_dir = work_dir
+        self.max_batch_size = max_batch_size
+        self.flush_interval = flush_interval
+        self.keep_files = keep_files
+        self._ids = itertools.count()
+        self._pending: Dict[str, _Pending] = {}
+        self._timer: Optional[asyncio.Task] = None
+        self._flushes: set[asyncio.Task] = set()
+        os.makedirs(work_dir, exist_ok=True)
+
+    async def get_response(
+        self,
+        *,
+        user_prompt: str,
+        response_model: Optional[type] = None,
+        temperature: float = 0.0,
+        seed: Optional[int] = None,
+    ) -> Any:
+        future = asyncio.get_running_loop().create_future()
+        custom_id = f"request-{next(self._ids)}"
+        self._pending[custom_id] = (
+            self._request_body(user_prompt, temperature, seed),
+            future,
+            response_model,
+        )
+
+        if len(self._pending) >= self.max_batch_size:
+            self._start_flush()
+        elif self._timer is None:
+            self._timer = asyncio.create_task(self._flush_later())
+        return await future
+
+    async def flush(self) -> None:
+        """Submit whatever is queued now and wait for every running batch."""
+        if self._pending:
+            self._start_flush()
+        await asyncio.gather(*self._flushes)
+
+    def _request_body(
+        self, user_prompt: str, temperature: float, seed: Optional[int]
+    ) -> Dict[str, Any]:
+        body: Dict[str, Any] = {
+            "model": self.model,
+            "messages": [{"role": "user", "content": user_prompt}],
+            "response_format": {"type": "json_object"},
+            "temperature": temperature,
+        }
+        if seed is not None:
+            body["seed"] = seed
+        return body
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.flush_interval)
+        self._timer = None
+        if self._pending:
+            self._start_flush()
+
+    def _start_flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending = self._pending, {}
+        flush = asyncio.create_task(self._run_batch(pending))
+        self._flushes.add(flush)
+        flush.add_done_callback(self._flushes.discard)
+
+    async def _run_batch(self, pending: Dict[str, _Pending]) -> None:
+        batch_id = uuid.uuid4().hex
+        input_path = os.path.join(self.work_dir, f"{batch_id}.input.jsonl")
+        output_path = os.path.join(self.work_dir, f"{batch_id}.output.jsonl")
+        with open(input_path, "w", encoding="utf-8") as f:
+            for custom_id, (body, _, _) in pending.items():
+                line = {
+                    "custom_id": custom_id,
+                    "method": "POST",
+                    "url": CHAT_COMPLETIONS_URL,
+                    "body": body,
+                }
+                f.write(json.dumps(line) + "\n")
+
+        try:
+            await self.backend.run(input_path, output_path)
+            with open(output_path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        self._resolve(pending, json.loads(line))
+        except Exception as exc:
+            for _, future, _ in pending.values():
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        finally:
+            if not self.keep_files:
+                for path in (input_path, output_path):
+                    if os.path.exists(path):
+                        os.remove(path)
+
+        for custom_id, (_, future, _) in pending.items():
+            if not future.done():
+                future.set_exception(
+                    BatchRequestError(f"{custom_id} missing from batch {batch_id}")
+                )
+
+    @staticmethod
+    def _resolve(pending: Dict[str, _Pending], result: Dict[str, Any]) -> None:
+        entry = pending.get(result.get("custom_id", ""))
+        if entry is None or entry[1].done():
+            return
+        _, future, response_model = entry
+        response = result.get("response") or {}
+        if result.get("error") or response.get("status_code") != 200:
+            future.set_exception(
+                BatchRequestError(f"{result.get('custom_id')}: {result.get('error')}")
+            )
+            return
+        content = response["body"]["choices"][0]["message"]["content"]
+        try:
+            future.set_result(parse_response(content, response_model))
+        except ValueError as exc:
+            future.set_exception(
+                BatchRequestError(f"{result.get('custom_id')}: {exc}")
+            )
+
+
+async def run_batched(
+    team: "TeamManager",
+    tasks: Iterable[Dict[str, Any]],
+    concurrency: Optional[int] = None,
+) -> List["RunResult"]:
+    """Run many tasks concurrently so their agent calls share batch jobs.
+
+    All tasks run at once unless `concurrency` caps them. Results come back
+    in task order; a failed task is reported through `RunResult.error`
+    without affecting the others.
+    """
+    tasks = list(tasks)
+    results = [
+        result
+        async for result in team.run_many(tasks, concurrency or max(1, len(tasks)))
+    ]
+    return sorted(results, key=lambda result: result.index)
@@ -0,0 +1,301 @@
+"""Offline throughput benchmark for the ACE pipeline.
+
+Drives `TeamManager.run` and `main_function_style.main` against an in-process
+fake of the chat-completions endpoint, so no API key or network is needed.
+
+    python benchmark.py --generators 1,4 --reflectors 1,2 --playbook-sizes 10,1000
+    python benchmark.py --compare bench_results/a.json bench_results/b.json
+"""
+
+from __future__ import annotations
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import logging
+import os
+import random
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterator, List
+
+from agents import CuratorAgent, GeneratorAgent, ReflectorAgent, TeamManager
+from fake_llm import FakeAsyncOpenAI, parse_latency
+from llm_client import OpenAIClient
+from models import AgentNames
+from playbook import Playbook
+from scheduler import LLMScheduler
+
+QUERY = "Write a Python function avg_numbers(data: list[str]) -> float that returns the average of the numeric items in the list."
+
+# `main_function_style` reads these on every run; empty values disable them.
+OFFLINE_ENV = {
+    "OPENAI_API_KEY": "offline-benchmark",
+    "ACE_PLAYBOOK_DIR": "",
+    "ACE_CACHE_PATH": "",
+}
+
+WORDS = "average count divide sum numeric convert string float list error total skip check value".split()
+
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    generators: int
+    reflectors: int
+    playbook_size: int
+    runs: int
+    failures: int
+    requests: int
+    p50_latency: float
+    p99_latency: float
+    requests_per_second: float
+    peak_memory_mb: float
+
+
+def synthetic_playbook(size: int, seed: int = 0) -> Playbook:
+    rng = random.Random(seed)
+    playbook = Playbook()
+    for i in range(size):
+        content = " ".join(rng.choice(WORDS) for _ in range(12))
+        playbook.add(f"section_{i % 10}", content)
+    return playbook
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def _measure(
+    name: str,
+    config: Dict[str, int],
+    runs: int,
+    fake: FakeAsyncOpenAI,
+    run_once: Callable[[], Awaitable[Any]],
+) -> BenchmarkResult:
+    latencies: List[float] = []
+    failures = 0
+    tracemalloc.start()
+    started = time.perf_counter()
+    for _ in range(runs):
+        run_started = time.perf_counter()
+        try:
+            await run_once()
+        except Exception:
+            failures += 1
+        latencies.append(time.perf_counter() - run_started)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return BenchmarkResult(
+        name=name,
+        generators=config.get("generators", 1),
+        reflectors=config.get("reflectors", 1),
+        playbook_size=config["playbook_size"],
+        runs=runs,
+        failures=failures,
+        requests=fake.requests,
+        p50_latency=percentile(latencies, 0.5),
+        p99_latency=percentile(latencies, 0.99),
+        requests_per_second=fake.requests / elapsed if elapsed else 0.0,
+        peak_memory_mb=peak / 2**20,
+    )
+
+
+def _client(args: argparse.Namespace) -> tuple[OpenAIClient, FakeAsyncOpenAI]:
+    fake = FakeAsyncOpenAI(
+        latency=parse_latency(args.latency),
+        rate_limit_rate=args.rate_limit_rate,
+        error_rate=args.error_rate,
+        seed=args.seed,
+        malformed_rate=args.malformed_rate,
+    )
+    scheduler = LLMScheduler(max_in_flight=args.max_in_flight, base_backoff=0.05)
+    return OpenAIClient(model="fake", scheduler=scheduler, openai_client=fake), fake
+
+
+async def bench_team(
+    args: argparse.Namespace, generators: int, reflectors: int, playbook_size: int
+) -> BenchmarkResult:
+    client, fake = _client(args)
+    team = TeamManager("BenchmarkTeam", streaming=args.streaming)
+    for _ in range(generators):
+        team.add_child(GeneratorAgent(AgentNames.GENERATOR.value, client))
+    for _ in range(reflectors):
+        team.add_child(ReflectorAgent(AgentNames.REFLECTOR.value, client))
+    team.add_child(CuratorAgent(AgentNames.CURATOR.value, client))
+    playbook = synthetic_playbook(playbook_size, args.seed)
+
+    config = {
+        "generators": generators,
+        "reflectors": reflectors,
+        "playbook_size": playbook_size,
+    }
+    return await _measure(
+        "team",
+        config,
+        args.runs,
+        fake,
+        lambda: team.run(task={"query": QUERY, "playbook": playbook}),
+    )
+
+
+@contextlib.contextmanager
+def _offline_env() -> Iterator[None]:
+    """Disable the playbook store and LLM cache, even when `.env` enables them.
+
+    `load_dotenv` never overrides a variable that is already set, so empty
+    values keep the benchmark from writing synthetic deltas to real files.
+    """
+    saved = {name: os.environ.get(name) for name in OFFLINE_ENV}
+    os.environ.update(OFFLINE_ENV)
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+async def bench_function_style(
+    args: argparse.Namespace, playbook_size: int
+) -> BenchmarkResult:
+    with _offline_env():
+        # The entry point builds a real client at import time; it is replaced.
+        import main_function_style
+
+        client, fake = _client(args)
+        main_function_style.client = client
+
+        async def run_once() -> None:
+            with contextlib.redirect_stdout(io.StringIO()):
+                await main_function_style.main()
+
+        return await _measure(
+            "function_style",
+            {"playbook_size": playbook_size},
+            args.runs,
+            fake,
+            run_once,
+        )
+
+
+async def run_suite(args: argparse.Namespace) -> List[BenchmarkResult]:
+    results: List[BenchmarkResult] = []
+    for playbook_size in args.playbook_sizes:
+        for generators in args.generators:
+            for reflectors in args.reflectors:
+                results.append(
+                    await bench_team(args, generators, reflectors, playbook_size)
+                )
+    # The functional entry point builds its own two-bullet playbook.
+    results.append(await bench_function_style(args, 2))
+    return results
+
+
+def save(results: List[BenchmarkResult], args: argparse.Namespace) -> str:
+    os.makedirs(args.output_dir, exist_ok=True)
+    path = os.path.join(args.output_dir, f"{time.strftime('%Y%m%d-%H%M%S')}.json")
+    payload = {
+        "created_at": time.time(),
+        "settings": {
+            "latency": args.latency,
+            "rate_limit_rate": args.rate_limit_rate,
+            "error_rate": args.error_rate,
+            "malformed_rate": args.malformed_rate,
+            "max_in_flight": args.max_in_flight,
+            "streaming": args.streaming,
+            "runs": args.runs,
+        },
+        "results": [asdict(result) for result in results],
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2)
+    return path
+
+
+def _key(result: Dict[str, Any]) -> tuple:
+    return (
+        result["name"],
+        result["generators"],
+        result["reflectors"],
+        result["playbook_size"],
+    )
+
+
+def compare(baseline_path: str, candidate_path: str) -> None:
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {_key(r): r for r in json.load(f)["results"]}
+    with open(candidate_path, encoding="utf-8") as f:
+        candidate = {_key(r): r for r in json.load(f)["results"]}
+
+    print(f"{'config':<32} {'p50':>16} {'p99':>16} {'req/s':>16}")
+    for key in sorted(baseline.keys() & candidate.keys()):
+        before, after = baseline[key], candidate[key]
+        cells = []
+        for metric in ("p50_latency", "p99_latency", "requests_per_second"):
+            change = (
+                (after[metric] - before[metric]) / before[metric] * 100
+                if before[metric]
+                else 0.0
+            )
+            cells.append(f"{after[metric]:>8.3f} ({change:+5.1f}%)")
+        label = "{}/g{}/r{}/pb{}".format(*key)
+        print(f"{label:<32} " + " ".join(f"{cell:>16}" for cell in cells))
+
+
+def print_results(results: List[BenchmarkResult]) -> None:
+    print(
+        f"{'config':<32} {'p50 s':>8} {'p99 s':>8} {'req/s':>8} "
+        f"{'requests':>9} {'failed':>7} {'peak MB':>8}"
+    )
+    for r in results:
+        label = f"{r.name}/g{r.generators}/r{r.reflectors}/pb{r.playbook_size}"
+        print(
+            f"{label:<32} {r.p50_latency:>8.3f} {r.p99_latency:>8.3f} "
+            f"{r.requests_per_second:>8.1f} {r.requests:>9} {r.failures:>7} "
+            f"{r.peak_memory_mb:>8.2f}"
+        )
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(item) for item in value.split(",")]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--generators", type=_int_list, default=[1, 4])
+    parser.add_argument("--reflectors", type=_int_list, default=[1, 2])
+    parser.add_argument("--playbook-sizes", type=_int_list, default=[10, 1000])
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--latency", default="lognormal:0.05,0.5")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--malformed-rate", type=float, default=0.0)
+    parser.add_argument("--max-in-flight", type=int, default=16)
+    parser.add_argument("--streaming", action="store_true")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output-dir", default="bench_results")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CANDIDATE"))
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    logging.getLogger("helpers").setLevel(logging.WARNING)
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    results = asyncio.run(run_suite(args))
+    print_results(results)
+    print(f"Saved to {save(results, args)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+from __future__ import annotations
+import logging
+import os
+from typing import Any, Callable, Optional, TYPE_CHECKING
+
+from llm_client import OpenAIClient
+from playbook import Playbook
+
+if TYPE_CHECKING:
+    from models import CuratorResponse, ReflectorResponse
+
+logger = logging.getLogger(__name__)
+
+# Returns True when a response is good enough to keep.
+Validator = Callable[[Any], bool]
+
+
+def has_key_insight(response: ReflectorResponse) -> bool:
+    return bool(response.key_insight.strip())
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.split()).casefold()
+
+
+def no_duplicate_adds(playbook: Playbook) -> Validator:
+    """Rejects Curator responses that ADD a bullet already in its section."""
+
+    def validate(response: CuratorResponse) -> bool:
+        for operation in response.operations:
+            content = _normalize(operation.content)
+            section = playbook.section(operation.section)
+            if any(_normalize(bullet.content) == content for bullet in section):
+                return False
+        return True
+
+    return validate
+
+
+class CascadeClient:
+    """Drop-in client that asks `cheap` first and escalates to `strong`.
+
+    The cheap answer is kept when it parses and `validator` accepts it;
+    otherwise the same prompt is sent to the strong client.
+    """
+
+    def __init__(
+        self, cheap: Any, strong: Any, validator: Optional[Validator] = None
+    ) -> None:
+        self.cheap = cheap
+        self.strong = strong
+        self.validator = validator
+        self.accepted = 0
+        self.escalated = 0
+
+    async def get_response(
+        self,
+        *,
+        user_prompt: str,
+        response_model: Optional[type] = None,
+        temperature: float = 0.0,
+        seed: Optional[int] = None,
+    ) -> Any:
+        options = {
+            "user_prompt": user_prompt,
+            "response_model": response_model,
+            "temperature": temperature,
+            "seed": seed,
+        }
+        try:
+            response = await self.cheap.get_response(**options)
+        except ValueError as exc:
+            logger.info(f"Escalating after an invalid cheap response: {exc}")
+        else:
+            if self.validator is None or self.validator(response):
+                self.accepted += 1
+                return response
+        self.escalated += 1
+        return await self.strong.get_response(**options)
+
+
+def agent_client(
+    agent: str, validator: Optional[Validator] = None, **options: Any
+) -> Any:
+    """Client for one agent, configured from the environment.
+
+    `ACE_<AGENT>_MODEL` picks the agent's model (default `OPENAI_MODEL`). When
+    `ACE_<AGENT>_CHEAP_MODEL` is also set, calls go through a `CascadeClient`
+    from the cheap model to that one. `options` are passed to `OpenAIClient`.
+    """
+    prefix = f"ACE_{agent.upper()}"
+    strong = OpenAIClient(model=os.getenv(f"{prefix}_MODEL"), **options)
+    cheap_model = os.getenv(f"{prefix}_CHEAP_MODEL")
+    if not cheap_model:
+        return strong
+    cheap = OpenAIClient(model=cheap_model, **options)
+    return CascadeClient(cheap, strong, validator)
@@ -0,0 +1,194 @@
+from __future__ import annotations
+import hashlib
+import json
+import sqlite3
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional
+
+import models
+from models import dump_response, validate_response
+
+# Response types that can be restored from a checkpoint, by class name.
+RESPONSE_TYPES = (
+    "GeneratorResponse",
+    "ReflectorResponse",
+    "VerifiedReflection",
+    "CuratorResponse",
+    "Verification",
+)
+
+# Output types of other agents, added with `register_response_type`.
+_REGISTERED: Dict[str, type] = {cls.__name__: cls for cls in (str, int, float, bool)}
+
+
+def register_response_type(cls: type) -> type:
+    """Make outputs of `cls` checkpointable; usable as a class decorator.
+
+    `cls` must be a type pydantic can dump and validate, e.g. a dataclass or a
+    BaseModel. Outputs of unregistered types are not checkpointed.
+    """
+    known = _REGISTERED.get(cls.__name__)
+    if cls.__name__ in RESPONSE_TYPES or (known is not None and known is not cls):
+        raise ValueError(f"A response type named {cls.__name__!r} already exists")
+    _REGISTERED[cls.__name__] = cls
+    return cls
+
+
+def response_type(name: str) -> type:
+    if name in _REGISTERED:
+        return _REGISTERED[name]
+    if name not in RESPONSE_TYPES:
+        raise KeyError(name)
+    return getattr(models, name)
+
+
+def restorable(value: Any) -> bool:
+    """Whether `value` is of a type a checkpoint can rebuild."""
+    try:
+        return response_type(type(value).__name__) is type(value)
+    except KeyError:
+        return False
+
+
+def task_key(task: Dict[str, Any]) -> str:
+    """`task["task_id"]` when given, else a hash of the query."""
+    if task.get("task_id"):
+        return str(task["task_id"])
+    return hashlib.sha256(task["query"].encode("utf-8")).hexdigest()
+
+
+def fingerprint(item: Any) -> str:
+    """Stable hash of an upstream item; empty for source agents."""
+    if item is None:
+        return ""
+    payload = json.dumps(dump_response(item, type(item)), sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class CheckpointStore:
+    """SQLite record of completed agent outputs.
+
+    Rows are keyed by task, stage (agent name and its position among agents of
+    that name) and the fingerprint of the upstream item the agent handled, so
+    a re-run of a task replays completed calls and only runs missing ones.
+    """
+
+    def __init__(self, path: str = ".ace_checkpoints.sqlite") -> None:
+        self.path = path
+        self._db = sqlite3.connect(path)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS checkpoints ("
+            "task TEXT NOT NULL, stage TEXT NOT NULL, item TEXT NOT NULL, "
+            "outputs TEXT NOT NULL, created_at REAL NOT NULL, "
+            "PRIMARY KEY (task, stage, item))"
+        )
+        self._db.commit()
+        self.hits = 0
+        self.misses = 0
+        self.skipped = 0
+
+    def get(self, task: str, stage: str, item: str) -> Optional[List[Any]]:
+        row = self._db.execute(
+            "SELECT outputs FROM checkpoints WHERE task = ? AND stage = ? AND item = ?",
+            (task, stage, item),
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        try:
+            outputs = [
+                validate_response(entry["data"], response_type(entry["type"]))
+                for entry in json.loads(row[0])
+            ]
+        # A type no longer registered, or data that no longer validates: the
+        # call runs again and its row is replaced.
+        except (KeyError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return outputs
+
+    def put(self, task: str, stage: str, item: str, outputs: List[Any]) -> None:
+        """Record `outputs`; skipped when any of them is of an unknown type."""
+        if not all(restorable(output) for output in outputs):
+            self.skipped += 1
+            return
+        encoded = json.dumps(
+            [
+                {
+                    "type": type(output).__name__,
+                    "data": dump_response(output, type(output)),
+                }
+                for output in outputs
+            ]
+        )
+        self._db.execute(
+            "INSERT OR REPLACE INTO checkpoints "
+            "(task, stage, item, outputs, created_at) VALUES (?, ?, ?, ?, ?)",
+            (task, stage, item, encoded, time.time()),
+        )
+        self._db.commit()
+
+    def clear(self, task: Optional[str] = None) -> None:
+        if task is None:
+            self._db.execute("DELETE FROM checkpoints")
+        else:
+            self._db.execute("DELETE FROM checkpoints WHERE task = ?", (task,))
+        self._db.commit()
+
+    def stats(self) -> Dict[str, int]:
+        (rows,) = self._db.execute("SELECT COUNT(*) FROM checkpoints").fetchone()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "skipped": self.skipped,
+            "rows": rows,
+        }
+
+    def close(self) -> None:
+        self._db.close()
+
+
+@dataclass(frozen=True)
+class CheckpointScope:
+    store: CheckpointStore
+    task: str
+    stage: str
+
+    async def run(
+        self,
+        handle: Callable[[Dict[str, Any], Any], Awaitable[List[Any]]],
+        task: Dict[str, Any],
+        item: Any,
+    ) -> List[Any]:
+        if item is not None and not restorable(item):
+            # only items of known types can be fingerprinted reliably
+            return await handle(task, item)
+        key = fingerprint(item)
+        outputs = self.store.get(self.task, self.stage, key)
+        if outputs is None:
+            outputs = await handle(task, item)
+            self.store.put(self.task, self.stage, key, outputs)
+        return outputs
+
+
+current_checkpoint: ContextVar[Optional[CheckpointScope]] = ContextVar(
+    "current_checkpoint", default=None
+)
+
+
+@contextmanager
+def checkpoint_scope(
+    store: Optional[CheckpointStore], task: Dict[str, Any], stage: str
+) -> Iterator[None]:
+    if store is None:
+        yield
+        return
+    token = current_checkpoint.set(CheckpointScope(store, task_key(task), stage))
+    try:
+        yield
+    finally:
+        current_checkpoint.reset(token)
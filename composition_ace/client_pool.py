@@ -0,0 +1,197 @@
+from __future__ import annotations
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+class Endpoint:
+    """One client of a pool with its recent latencies and health."""
+
+    def __init__(self, client: Any, name: str, window: int = 200) -> None:
+        self.client = client
+        self.name = name
+        self.latencies: Deque[float] = deque(maxlen=window)
+        self.ewma: Optional[float] = None
+        self.in_flight = 0
+        self.calls = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.unhealthy_until = 0.0
+
+    def healthy(self, now: float) -> bool:
+        return now >= self.unhealthy_until
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def record_success(self, latency: float, alpha: float) -> None:
+        self.latencies.append(latency)
+        self.ewma = latency if self.ewma is None else (
+            alpha * latency + (1 - alpha) * self.ewma
+        )
+        self.consecutive_failures = 0
+
+    def record_failure(self, threshold: int, cooldown: float) -> None:
+        self.failures += 1
+        self.consecutive_failures += 1
+        now = time.monotonic()
+        if self.consecutive_failures >= threshold and self.healthy(now):
+            self.unhealthy_until = now + cooldown
+            logger.warning(
+                f"Endpoint {self.name} marked unhealthy for {cooldown:.0f}s "
+                f"after {self.consecutive_failures} failures"
+            )
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "failures": self.failures,
+            "ewma": self.ewma,
+            "p95": self.quantile(0.95),
+            "healthy": self.healthy(time.monotonic()),
+        }
+
+
+class ClientPool:
+    """Drop-in client that routes each call to the fastest healthy endpoint.
+
+    `clients` are anything with `OpenAIClient.get_response`'s signature
+    (`OpenAIClient` instances for different models or providers, or fakes).
+    Endpoints are ranked by an exponentially weighted latency; ones without
+    samples are tried first, and ones that failed `failure_threshold` times in
+    a row sit out for `cooldown` seconds. A call still running after the
+    primary endpoint's `hedge_quantile` latency is hedged by sending it to the
+    next endpoint; the first answer wins and the other request is cancelled.
+    A failed call fails over to the next endpoint.
+    """
+
+    def __init__(
+        self,
+        clients: Sequence[Any],
+        names: Optional[Sequence[str]] = None,
+        hedge_quantile: float = 0.95,
+        hedge_min_samples: int = 20,
+        max_hedges: int = 1,
+        failure_threshold: int = 3,
+        cooldown: float = 30.0,
+        ewma_alpha: float = 0.2,
+        window: int = 200,
+    ) -> None:
+        if not clients:
+            raise ValueError("ClientPool needs at least one client.")
+        names = names or [
+            getattr(client, "model", f"endpoint-{i}")
+            for i, client in enumerate(clients)
+        ]
+        self.endpoints = [
+            Endpoint(client, name, window) for client, name in zip(clients, names)
+        ]
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_samples = hedge_min_samples
+        self.max_hedges = max_hedges
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.ewma_alpha = ewma_alpha
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.failovers = 0
+
+    async def get_response(
+        self,
+        *,
+        user_prompt: str,
+        response_model: Optional[type] = None,
+        temperature: float = 0.0,
+        seed: Optional[int] = None,
+    ) -> Any:
+        options = {
+            "user_prompt": user_prompt,
+            "response_model": response_model,
+            "temperature": temperature,
+            "seed": seed,
+        }
+        ranked = self._ranked()
+        running: Dict[asyncio.Task, Endpoint] = {}
+        errors: List[BaseException] = []
+        hedges = 0
+
+        def launch() -> None:
+            endpoint = ranked[len(running) + len(errors)]
+            call = self._call(endpoint, options)
+            running[asyncio.create_task(call)] = endpoint
+
+        launch()
+        primary = ranked[0]
+        try:
+            while running:
+                spare = len(running) + len(errors) < len(ranked)
+                delay = self._hedge_delay(primary) if spare else None
+                if hedges >= self.max_hedges:
+                    delay = None
+                done, _ = await asyncio.wait(
+                    running, timeout=delay, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    hedges += 1
+                    self.hedged += 1
+                    launch()
+                    continue
+                for task in done:
+                    endpoint = running.pop(task)
+                    if task.exception() is None:
+                        self.hedge_wins += int(endpoint is not primary and hedges > 0)
+                        return task.result()
+                    errors.append(task.exception())
+                if not running and len(errors) < len(ranked):
+                    self.failovers += 1
+                    launch()
+            raise errors[-1]
+        finally:
+            for task in running:
+                task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "failovers": self.failovers,
+            "endpoints": {e.name: e.summary() for e in self.endpoints},
+        }
+
+    def _ranked(self) -> List[Endpoint]:
+        now = time.monotonic()
+        return sorted(
+            self.endpoints,
+            key=lambda e: (
+                not e.healthy(now),
+                e.ewma is not None,
+                e.ewma or 0.0,
+                e.in_flight,
+            ),
+        )
+
+    def _hedge_delay(self, endpoint: Endpoint) -> Optional[float]:
+        if len(endpoint.latencies) < self.hedge_min_samples:
+            return None
+        return endpoint.quantile(self.hedge_quantile)
+
+    async def _call(self, endpoint: Endpoint, options: Dict[str, Any]) -> Any:
+        endpoint.calls += 1
+        endpoint.in_flight += 1
+        started = time.perf_counter()
+        try:
+            response = await endpoint.client.get_response(**options)
+        except Exception:
+            endpoint.record_failure(self.failure_threshold, self.cooldown)
+            raise
+        finally:
+            endpoint.in_flight -= 1
+        endpoint.record_success(time.perf_counter() - started, self.ewma_alpha)
+        return response
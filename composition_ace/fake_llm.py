@@ -0,0 +1,204 @@
+from __future__ import annotations
+import asyncio
+import json
+import math
+import random
+import uuid
+from types import SimpleNamespace
+from typing import Any, Callable, Optional, Sequence
+
+from models import validate_response
+from scheduler import LLMScheduler, estimate_tokens
+
+GENERATOR_RESPONSE = {
+    "reasoning": "Sum the numeric items and divide by how many were converted.",
+    "bullet_ids": ["003 formulas_and_calculations"],
+    "final_answer": "def avg_numbers(data: list[str]) -> float:\n    nums = []\n    for item in data:\n        try:\n            nums.append(float(item))\n        except ValueError:\n            continue\n    return sum(nums) / len(nums) if nums else 0.0",
+}
+
+REFLECTOR_RESPONSE = {
+    "reasoning": "The function divides by the length of the input instead of the numeric count.",
+    "error_identification": "Used len(data) as the divisor.",
+    "root_cause_analysis": "Confused the number of inputs with the number of valid values.",
+    "correct_approach": "Divide the total by the count of successfully converted items.",
+    "key_insight": "Averages must be divided by the number of values that were summed.",
+    "bullet_tags": [{"bullet_id": "003 formulas_and_calculations", "tag": "helpful"}],
+}
+
+CURATOR_RESPONSE = {
+    "reasoning": "The divisor mistake is not covered by the playbook yet.",
+    "operations": [
+        {
+            "type": "ADD",
+            "section": "common_mistakes",
+            "content": "When averaging filtered values divide by the filtered count, not the input length",
+        }
+    ],
+}
+
+
+class FakeRateLimitError(Exception):
+    """Mimics the 429 raised by the OpenAI SDK."""
+
+    status_code = 429
+
+
+class FakeServerError(Exception):
+    """Mimics a 5xx raised by the OpenAI SDK."""
+
+    status_code = 500
+
+
+LatencyFn = Callable[[random.Random], float]
+
+
+def constant_latency(seconds: float) -> LatencyFn:
+    return lambda rng: seconds
+
+
+def uniform_latency(low: float, high: float) -> LatencyFn:
+    return lambda rng: rng.uniform(low, high)
+
+
+def lognormal_latency(median: float, sigma: float) -> LatencyFn:
+    """Long-tailed latency, the usual shape of LLM completion times."""
+    return lambda rng: rng.lognormvariate(math.log(median), sigma)
+
+
+def parse_latency(spec: str) -> LatencyFn:
+    """`0.2`, `uniform:0.1,0.5` or `lognormal:0.3,0.6`."""
+    kind, _, args = spec.partition(":")
+    if not args:
+        return constant_latency(float(kind))
+    values = [float(value) for value in args.split(",")]
+    if kind == "uniform":
+        return uniform_latency(*values)
+    if kind == "lognormal":
+        return lognormal_latency(*values)
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+
+def canned_response(user_prompt: str) -> dict:
+    if "master curator" in user_prompt:
+        return CURATOR_RESPONSE
+    if "expert analyst" in user_prompt:
+        return REFLECTOR_RESPONSE
+    return GENERATOR_RESPONSE
+
+
+class FakeLLMClient:
+    """Offline stand-in for OpenAIClient returning canned agent JSON."""
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        rate_limit_probability: float = 0.0,
+        seed: Optional[int] = None,
+        scheduler: Optional[LLMScheduler] = None,
+    ) -> None:
+        self.model = "fake"
+        self.latency = latency
+        self.rate_limit_probability = rate_limit_probability
+        self.scheduler = scheduler
+        self._random = random.Random(seed)
+        self.calls = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    async def get_response(
+        self,
+        *,
+        user_prompt: str,
+        response_model: Optional[type] = None,
+        temperature: float = 0.0,
+        seed: Optional[int] = None,
+    ) -> Any:
+        """Canned reply for the prompt; sampling arguments do not change it."""
+        if self.scheduler is None:
+            response = await self._complete(user_prompt)
+        else:
+            response = await self.scheduler.submit(
+                lambda: self._complete(user_prompt),
+                tokens=estimate_tokens(user_prompt),
+            )
+        return validate_response(response, response_model)
+
+    async def _complete(self, user_prompt: str) -> dict:
+        self.calls += 1
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+            if self._random.random() < self.rate_limit_probability:
+                raise FakeRateLimitError("rate limit exceeded")
+            return dict(canned_response(user_prompt))
+        finally:
+            self.in_flight -= 1
+
+
+class FakeAsyncOpenAI:
+    """In-process fake of the chat-completions endpoint behind `AsyncOpenAI`.
+
+    Pass it to `OpenAIClient(openai_client=...)` to exercise the real client
+    code path offline. Responses carry a `usage` block estimated from the text;
+    a `malformed_rate` share of them is truncated mid-JSON. Generator requests
+    sampled with a temperature answer with a random one of `answers`, if given.
+    """
+
+    def __init__(
+        self,
+        latency: LatencyFn = constant_latency(0.0),
+        rate_limit_rate: float = 0.0,
+        error_rate: float = 0.0,
+        seed: Optional[int] = None,
+        malformed_rate: float = 0.0,
+        answers: Sequence[str] = (),
+    ) -> None:
+        self.latency = latency
+        self.rate_limit_rate = rate_limit_rate
+        self.error_rate = error_rate
+        self.malformed_rate = malformed_rate
+        self.answers = list(answers)
+        self._random = random.Random(seed)
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+        self.requests = 0
+        self.rate_limited = 0
+        self.errors = 0
+        self.malformed = 0
+
+    async def _create(self, *, model: str, messages: list, **kwargs) -> SimpleNamespace:
+        self.requests += 1
+        await asyncio.sleep(self.latency(self._random))
+        roll = self._random.random()
+        if roll < self.rate_limit_rate:
+            self.rate_limited += 1
+            raise FakeRateLimitError("rate limit exceeded")
+        if roll < self.rate_limit_rate + self.error_rate:
+            self.errors += 1
+            raise FakeServerError("internal server error")
+
+        prompt = messages[0]["content"]
+        response = canned_response(prompt)
+        sampled = kwargs.get("temperature") and response is GENERATOR_RESPONSE
+        if sampled and self.answers:
+            response = {**response, "final_answer": self._random.choice(self.answers)}
+        content = json.dumps(response)
+        if self._random.random() < self.malformed_rate:
+            self.malformed += 1
+            content = content[: len(content) // 2]
+        return SimpleNamespace(
+            id=f"chatcmpl-{uuid.uuid4().hex}",
+            model=model,
+            choices=[
+                SimpleNamespace(
+                    index=0,
+                    finish_reason="stop",
+                    message=SimpleNamespace(role="assistant", content=content),
+                )
+            ],
+            usage=SimpleNamespace(
+                prompt_tokens=estimate_tokens(prompt),
+                completion_tokens=estimate_tokens(content),
+                total_tokens=estimate_tokens(prompt) + estimate_tokens(content),
+            ),
+        )
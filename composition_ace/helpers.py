@@ -1,27 +1,27 @@
-from collections import Counter
-from models import AgentNames
-from typing import List, TYPE_CHECKING
+from typing import Dict, List, Tuple, TYPE_CHECKING
 import logging
 
 if TYPE_CHECKING:
     from agents import Agent
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-def log_agent_counts(children: List["Agent"]) -> None:
-    agent_counts = Counter(child.name for child in children)
-    generator_count = agent_counts.get(AgentNames.GENERATOR.value, 0)
-    reflector_count = agent_counts.get(AgentNames.REFLECTOR.value, 0)
-    curator_count = agent_counts.get(AgentNames.CURATOR.value, 0)
+def log_agent_counts(order: List["Agent"]) -> None:
+    """Log each agent name's count and responses, one per upstream response.
 
-    generator_responses = generator_count
-    reflector_responses = reflector_count * generator_responses
-    curator_responses = curator_count * reflector_responses
+    `order` is the team's children in dependency order.
+    """
+    responses: Dict[str, int] = {}
+    counts: Dict[str, Tuple[int, int]] = {}
+    for agent in order:
+        produced = responses.get(agent.input_key, 0) if agent.input_key else 1
+        responses[agent.output_key] = responses.get(agent.output_key, 0) + produced
+        agents, total = counts.get(agent.name, (0, 0))
+        counts[agent.name] = (agents + 1, total + produced)
 
-    logger.info(
-        f"{generator_count} generator agents ({generator_responses} responses), "
-        f"{reflector_count} reflector agents ({reflector_responses} responses), and "
-        f"{curator_count} curator agents ({curator_responses} responses) would be created"
+    summary = ", ".join(
+        f"{agents} {name} agents ({total} responses)"
+        for name, (agents, total) in counts.items()
     )
+    logger.info(f"{summary or 'No agents'} would be created")
@@ -0,0 +1,85 @@
+"""Import-time budget: fails when a module starts importing slowly or eagerly.
+
+    python import_budget.py
+    python import_budget.py --runs 5 agents llm_client
+
+Each module is imported in a fresh interpreter with `-X importtime`. Its
+cumulative import time (best of `--runs`) must stay within its budget, and
+the packages deferred to first use must not be imported at all.
+"""
+
+from __future__ import annotations
+import argparse
+import os
+import subprocess
+import sys
+from typing import Dict, List, Set, Tuple
+
+# Milliseconds of cumulative import time, about twice the measured time.
+BUDGETS: Dict[str, float] = {
+    "models": 20,
+    "playbook": 40,
+    "checkpoint": 60,
+    "llm_client": 150,
+    "agents": 150,
+    "cascade": 200,
+    "main_oop_composition_pattern_style": 400,
+}
+
+# Packages only imported when a client, response model or pool is first used.
+DEFERRED = ("openai", "pydantic", "httpx")
+
+
+def measure(module: str) -> Tuple[float, Set[str]]:
+    """Cumulative import time of `module` in ms and every package it imported."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=here,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    cumulative = 0.0
+    packages: Set[str] = set()
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, total, name = line.split("|")
+        if total.strip() == "cumulative":
+            continue
+        packages.add(name.strip().split(".")[0])
+        if name.strip() == module and not name.startswith("  "):
+            cumulative = int(total) / 1000
+    return cumulative, packages
+
+
+def check(modules: List[str], runs: int) -> bool:
+    ok = True
+    print(f"{'module':<36} {'ms':>8} {'budget':>8}  deferred imports")
+    for module in modules:
+        samples = [measure(module) for _ in range(runs)]
+        elapsed = min(ms for ms, _ in samples)
+        eager = sorted(set(DEFERRED) & samples[0][1])
+        passed = elapsed <= BUDGETS[module] and not eager
+        ok = ok and passed
+        print(
+            f"{module:<36} {elapsed:>8.1f} {BUDGETS[module]:>8.0f}  "
+            f"{', '.join(eager) or '-'}{'' if passed else '  FAIL'}"
+        )
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("modules", nargs="*", help="default: every budgeted module")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+    unknown = [module for module in args.modules if module not in BUDGETS]
+    if unknown:
+        parser.error(f"no budget for {', '.join(unknown)}")
+    sys.exit(0 if check(args.modules or list(BUDGETS), args.runs) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+from __future__ import annotations
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+
+class ResponseCache:
+    """Content-addressed store of parsed LLM responses.
+
+    Entries live in SQLite and are fronted by an in-memory LRU. Entries older
+    than `ttl` seconds are treated as misses, and the least recently used rows
+    are evicted once the table grows past `max_entries`.
+
+    Hits, including memory hits, record their access time in a buffer that is
+    written back every `flush_every` hits and on `flush()`/`close()`. The row
+    count is checked every `evict_every` inserts, so the table may exceed
+    `max_entries` by up to that many rows between checks.
+    """
+
+    def __init__(
+        self,
+        path: str = ".ace_cache.sqlite",
+        memory_entries: int = 1024,
+        max_entries: Optional[int] = 100_000,
+        ttl: Optional[float] = None,
+        flush_every: int = 256,
+        evict_every: int = 256,
+    ) -> None:
+        self.path = path
+        self.memory_entries = memory_entries
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.flush_every = flush_every
+        self.evict_every = evict_every
+        # key -> latest access time not yet written to SQLite
+        self._accessed: Dict[str, float] = {}
+        self._inserts = 0
+        self._memory: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._db = sqlite3.connect(path)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS responses_accessed ON responses(accessed_at)"
+        )
+        self._db.commit()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(model: str, prompt: str, response_format: Any, **params: Any) -> str:
+        """`params` (e.g. sampling temperature and seed) are keyed when given."""
+        parts = [model, prompt, response_format] + ([params] if params else [])
+        payload = json.dumps(parts, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        entry = self._memory.get(key)
+        if entry is not None:
+            self._memory.move_to_end(key)
+        else:
+            row = self._db.execute(
+                "SELECT created_at, value FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                entry = (row[0], row[1])
+                self._remember(key, entry)
+
+        if entry is None or self._expired(entry[0], now):
+            if entry is not None:
+                self.delete(key)
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._accessed[key] = now
+        if len(self._accessed) >= self.flush_every:
+            self.flush()
+        return json.loads(entry[1])
+
+    def set(self, key: str, value: Any) -> None:
+        now = time.time()
+        serialized = json.dumps(value)
+        self._remember(key, (now, serialized))
+        self._db.execute(
+            "INSERT OR REPLACE INTO responses (key, value, created_at, accessed_at) "
+            "VALUES (?, ?, ?, ?)",
+            (key, serialized, now, now),
+        )
+        self._accessed.pop(key, None)
+        self._inserts += 1
+        if self.max_entries is not None and self._inserts >= self.evict_every:
+            self._inserts = 0
+            self._evict()
+        self._db.commit()
+
+    def flush(self) -> None:
+        """Write the buffered access times to SQLite."""
+        if not self._accessed:
+            return
+        self._db.executemany(
+            "UPDATE responses SET accessed_at = ? WHERE key = ?",
+            [(accessed_at, key) for key, accessed_at in self._accessed.items()],
+        )
+        self._accessed.clear()
+        self._db.commit()
+
+    def delete(self, key: str) -> None:
+        self._accessed.pop(key, None)
+        self._memory.pop(key, None)
+        self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+        self._db.commit()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    def close(self) -> None:
+        self.flush()
+        self._db.close()
+
+    def _evict(self) -> None:
+        (rows,) = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()
+        if rows <= self.max_entries:
+            return
+        # Evict by up-to-date access times.
+        self.flush()
+        evicted = self._db.execute(
+            "SELECT key FROM responses ORDER BY accessed_at ASC LIMIT ?",
+            (rows - self.max_entries,),
+        ).fetchall()
+        self._db.executemany("DELETE FROM responses WHERE key = ?", evicted)
+        for (key,) in evicted:
+            self._memory.pop(key, None)
+
+    def _remember(self, key: str, entry: tuple[float, str]) -> None:
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.ttl is not None and now - created_at > self.ttl
+
+
+def cache_from_env() -> Optional[ResponseCache]:
+    """Opt-in cache: enabled when ACE_CACHE_PATH points at a SQLite file."""
+    path = os.getenv("ACE_CACHE_PATH")
+    return ResponseCache(path) if path else None
@@ -1,27 +1,206 @@
-import json
+from __future__ import annotations
+import asyncio
 import os
-from typing import Optional
+from typing import Any, Dict, List, Optional, TYPE_CHECKING
+from weakref import WeakKeyDictionary
 
-from openai import AsyncOpenAI
 from dotenv import load_dotenv
 
+from llm_cache import ResponseCache
+from metrics import MetricsRecorder, current_call
+from models import dump_response, parse_response, validate_response
+from scheduler import LLMScheduler, estimate_tokens
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
 load_dotenv()
 
+RESPONSE_FORMAT = {"type": "json_object"}
+
+REPAIR_PROMPT = """Your previous reply could not be parsed:
+{error}
+
+Reply again with only the corrected JSON object, in exactly the format requested above."""
+
+# Keep-alive pools shared by every OpenAIClient, by event loop and size.
+# Connections belong to the loop that opened them, so each loop has its own.
+_HTTP_CLIENTS: WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Optional[int], Any]]
+_HTTP_CLIENTS = WeakKeyDictionary()
+
+
+def _drop_closed_loops(by_loop: WeakKeyDictionary) -> None:
+    # Pools reference their loop, so closed loops are not collected on their own.
+    for loop in [loop for loop in by_loop if loop.is_closed()]:
+        del by_loop[loop]
+
+
+def shared_http_client(max_connections: Optional[int] = None) -> Any:
+    """The running loop's `httpx` pool for `max_connections`, built on first use."""
+    _drop_closed_loops(_HTTP_CLIENTS)
+    pools = _HTTP_CLIENTS.setdefault(asyncio.get_running_loop(), {})
+    http_client = pools.get(max_connections)
+    if http_client is None:
+        import httpx
+        from openai import DefaultAsyncHttpxClient
+
+        options: dict = {}
+        if max_connections is not None:
+            options["limits"] = httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            )
+        http_client = pools[max_connections] = DefaultAsyncHttpxClient(**options)
+    return http_client
+
 
 class OpenAIClient:
     """Adapter for OpenAI Responses API returning parsed JSON objects."""
 
-    def __init__(self, model: Optional[str] = None) -> None:
-        self.client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    def __init__(
+        self,
+        model: Optional[str] = None,
+        scheduler: Optional[LLMScheduler] = None,
+        cache: Optional[ResponseCache] = None,
+        metrics: Optional[MetricsRecorder] = None,
+        openai_client: Optional[AsyncOpenAI] = None,
+        max_connections: Optional[int] = None,
+        repair_attempts: int = 1,
+        base_url: Optional[str] = None,
+        api_key: Optional[str] = None,
+    ) -> None:
+        self._client = openai_client
+        self._loop_clients: WeakKeyDictionary[asyncio.AbstractEventLoop, Any]
+        self._loop_clients = WeakKeyDictionary()
+        # base_url and api_key point the client at any OpenAI-compatible provider.
+        self.base_url = base_url
+        self.api_key = api_key
+        self.max_connections = max_connections
         self.model = model or os.getenv("OPENAI_MODEL", "gpt-4.1-mini")
+        self.scheduler = scheduler
+        self.cache = cache
+        self.metrics = metrics
+        self.repair_attempts = repair_attempts
+
+    @property
+    def client(self) -> AsyncOpenAI:
+        """The SDK client for the running loop, created on first use.
+
+        An injected `openai_client` is always used as is.
+        """
+        if self._client is not None:
+            return self._client
+        _drop_closed_loops(self._loop_clients)
+        loop = asyncio.get_running_loop()
+        client = self._loop_clients.get(loop)
+        if client is None:
+            from openai import AsyncOpenAI
+
+            options: dict = {}
+            if self.scheduler is not None:
+                # With a scheduler, rate limits and transient errors are
+                # retried by it, not by the SDK.
+                options["max_retries"] = 0
+            client = self._loop_clients[loop] = AsyncOpenAI(
+                api_key=self.api_key or os.getenv("OPENAI_API_KEY"),
+                base_url=self.base_url,
+                http_client=shared_http_client(self.max_connections),
+                **options,
+            )
+        return client
+
+    async def get_response(
+        self,
+        *,
+        user_prompt: str,
+        response_model: Optional[type] = None,
+        temperature: float = 0.0,
+        seed: Optional[int] = None,
+    ) -> Any:
+        """Parsed JSON reply; an instance of `response_model` when one is given.
+
+        A reply that is not valid JSON, or does not validate against
+        `response_model`, is retried up to `repair_attempts` times with the
+        validation error sent back to the model. `temperature` and `seed` are
+        sent to the API and are part of the cache key, so sampled replies with
+        different seeds are cached separately.
+        """
+        sampling: Dict[str, Any] = {}
+        if temperature:
+            sampling["temperature"] = temperature
+        if seed is not None:
+            sampling["seed"] = seed
+        if self.metrics is None:
+            return await self._get_response(user_prompt, response_model, sampling)
+        with self.metrics.call(self.model):
+            return await self._get_response(user_prompt, response_model, sampling)
+
+    async def _get_response(
+        self,
+        user_prompt: str,
+        response_model: Optional[type],
+        sampling: Dict[str, Any],
+    ) -> Any:
+        if self.cache is None:
+            return await self._request(user_prompt, response_model, sampling)
+
+        key = self.cache.key(self.model, user_prompt, RESPONSE_FORMAT, **sampling)
+        cached = self.cache.get(key)
+        if cached is not None:
+            metrics = current_call.get()
+            if metrics is not None:
+                metrics.cache_hit = True
+            return validate_response(cached, response_model)
+        response = await self._request(user_prompt, response_model, sampling)
+        self.cache.set(key, dump_response(response, response_model))
+        return response
+
+    async def _request(
+        self,
+        user_prompt: str,
+        response_model: Optional[type],
+        sampling: Dict[str, Any],
+    ) -> Any:
+        messages = [{"role": "user", "content": user_prompt}]
+        attempt = 0
+        while True:
+            content = await self._schedule(messages, sampling)
+            try:
+                return parse_response(content, response_model)
+            # json.JSONDecodeError and pydantic's ValidationError are ValueErrors.
+            except ValueError as exc:
+                if attempt >= self.repair_attempts:
+                    raise
+                attempt += 1
+                metrics = current_call.get()
+                if metrics is not None:
+                    metrics.repairs += 1
+                messages = messages[:1] + [
+                    {"role": "assistant", "content": content},
+                    {"role": "user", "content": REPAIR_PROMPT.format(error=exc)},
+                ]
+
+    async def _schedule(
+        self, messages: List[Dict[str, str]], sampling: Dict[str, Any]
+    ) -> str:
+        if self.scheduler is None:
+            return await self._complete(messages, sampling)
+        tokens = sum(estimate_tokens(message["content"]) for message in messages)
+        return await self.scheduler.submit(
+            lambda: self._complete(messages, sampling), tokens=tokens
+        )
 
-    async def get_response(self, *, user_prompt: str) -> dict:
+    async def _complete(
+        self, messages: List[Dict[str, str]], sampling: Dict[str, Any]
+    ) -> str:
         resp = await self.client.chat.completions.create(
             model=self.model,
-            messages=[
-                {"role": "user", "content": user_prompt},
-            ],
-            response_format={"type": "json_object"},
-            temperature=0.0,
+            messages=messages,
+            response_format=RESPONSE_FORMAT,
+            **{"temperature": 0.0, **sampling},
         )
-        return json.loads(resp.choices[0].message.content or "{}")
+        metrics = current_call.get()
+        if metrics is not None and resp.usage is not None:
+            metrics.prompt_tokens += resp.usage.prompt_tokens
+            metrics.completion_tokens += resp.usage.completion_tokens
+        return resp.choices[0].message.content or "{}"
@@ -1,14 +1,18 @@
 import asyncio
-import json
+import logging
 
 from dotenv import load_dotenv
 
 from llm_client import OpenAIClient
+from llm_cache import cache_from_env
 from models import GeneratorResponse, ReflectorResponse, CuratorResponse
-from prompts import Prompts
+from playbook import Playbook
+from playbook_store import store_from_env
+from refine import PlaybookRefiner
+from prompts import PROMPTS
 
 load_dotenv()
-client = OpenAIClient()
+client = OpenAIClient(cache=cache_from_env())
 
 MESSAGES = """
 Write a Python function avg_numbers(data: list[str]) -> float that returns the average of the numeric items in the list. 
@@ -23,7 +27,8 @@ FINAL_ANSWER = "def avg_numbers(data: list[str]) -> float:\n    total = 0.0\n
 
 async def main():
     # --------------------------------PLAYBOOK--------------------------------
-    playbook = [
+    store = store_from_env()
+    seed = [
         {
             "id": "002 check a weather",
             "content": "check a weather in the next 7 days",
@@ -33,6 +38,7 @@ async def main():
             "content": "Calculate the average by summing all successfully converted numeric values and dividing by their count",
         },
     ]
+    playbook = store.load(seed=seed) if store else Playbook.from_list(seed)
 
     # --------------------------------GENERATOR--------------------------------
     generator_response = GeneratorResponse(
@@ -43,30 +49,43 @@ async def main():
     print(generator_response)
 
     # --------------------------------REFLECTOR--------------------------------
-    reflector_prompt = Prompts().get_reflector_prompt(
+    reflector_prompt = PROMPTS.get_reflector_prompt(
         question=MESSAGES,
         reasoning_trace=generator_response.reasoning,
         predicted_answer=generator_response.final_answer,
         ground_truth_answer="empty",
         environment_feedback="empty",
-        playbook=json.dumps(playbook),
+        playbook=playbook.to_json(),
+    )
+    reflector_response = await client.get_response(
+        user_prompt=reflector_prompt, response_model=ReflectorResponse
     )
-    response = await client.get_response(user_prompt=reflector_prompt)
-    reflector_response = ReflectorResponse(**response)
     print(reflector_response)
 
     # --------------------------------CURATOR--------------------------------
-    curator_prompt = Prompts().get_curator_prompt(
+    curator_prompt = PROMPTS.get_curator_prompt(
         recent_reflection=reflector_response.reasoning,
-        current_playbook=json.dumps(playbook),
+        current_playbook=playbook.to_json(),
         question_context=MESSAGES,
     )
-    response = await client.get_response(user_prompt=curator_prompt)
-    curator_response = CuratorResponse(**response)
+    curator_response = await client.get_response(
+        user_prompt=curator_prompt, response_model=CuratorResponse
+    )
     print(curator_response)
 
-    # Implement playbook update here (not implemented in this example)
+    # --------------------------------PLAYBOOK UPDATE--------------------------------
+    playbook.apply_bullet_tags(reflector_response.bullet_tags)
+    added = playbook.apply_operations(curator_response.operations)
+    print(f"Added {len(added)} bullets: {[bullet.id for bullet in added]}")
+    report = PlaybookRefiner().refine(playbook, [bullet.id for bullet in added])
+    print(f"Merged {report.merged}, pruned {report.pruned}")
+    print(playbook.to_json())
+    if store:
+        store.close()
+    if client.cache:
+        client.cache.flush()
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
     asyncio.run(main())
@@ -1,22 +1,42 @@
 import asyncio
+import logging
+import os
 
 from dotenv import load_dotenv
 
 from llm_client import OpenAIClient
+from llm_cache import cache_from_env
+from cascade import agent_client, has_key_insight, no_duplicate_adds
 from agents import TeamManager, GeneratorAgent, ReflectorAgent, CuratorAgent
 from models import AgentNames
+from playbook import Playbook
+from playbook_store import store_from_env
+from refine import PlaybookRefiner
+from scheduler import LLMScheduler
+from verify import UnitTestVerifier
 
 load_dotenv()
-client = OpenAIClient()
+# One scheduler shared by every agent of the team keeps the fan-out under the API limits.
+scheduler = LLMScheduler(max_in_flight=8)
+cache = cache_from_env()
+client = OpenAIClient(scheduler=scheduler, cache=cache)
 
 MESSAGES = """
 Write a Python function avg_numbers(data: list[str]) -> float that returns the average of the numeric items in the list. 
 """
 
+# With ACE_RUN_GENERATED_CODE=1, answers that pass these tests skip the
+# Reflector and Curator calls. This runs model-written code on this machine.
+TESTS = """
+assert avg_numbers(["1", "2", "x"]) == 1.5
+assert avg_numbers([]) == 0.0
+"""
+
 
 async def main():
     # --------------------------------PLAYBOOK--------------------------------
-    playbook = [
+    store = store_from_env()
+    seed = [
         {
             "id": "002 check a weather",
             "content": "check a weather in the next 7 days",
@@ -26,19 +46,45 @@ async def main():
             "content": "Calculate the average by summing all successfully converted numeric values and dividing by their count",
         },
     ]
+    playbook = store.load(seed=seed) if store else Playbook.from_list(seed)
     team = TeamManager("ImprovementTeam")
     generator_agent = GeneratorAgent(AgentNames.GENERATOR.value, client)
-    reflector_agent = ReflectorAgent(AgentNames.REFLECTOR.value, client)
-    curator_agent = CuratorAgent(AgentNames.CURATOR.value, client)
+    # ACE_<AGENT>_MODEL / ACE_<AGENT>_CHEAP_MODEL route the high-volume stages.
+    reflector_client = agent_client(
+        AgentNames.REFLECTOR.value, has_key_insight, scheduler=scheduler, cache=cache
+    )
+    curator_client = agent_client(
+        AgentNames.CURATOR.value,
+        no_duplicate_adds(playbook),
+        scheduler=scheduler,
+        cache=cache,
+    )
+    verifier = UnitTestVerifier() if os.getenv("ACE_RUN_GENERATED_CODE") else None
+    reflector_agent = ReflectorAgent(
+        AgentNames.REFLECTOR.value, reflector_client, verifier=verifier
+    )
+    curator_agent = CuratorAgent(AgentNames.CURATOR.value, curator_client)
     team.add_child(generator_agent)
     team.add_child(curator_agent)
     team.add_child(reflector_agent)
 
-    result = await team.run(task={"query": MESSAGES, "playbook": playbook})
+    result = await team.run(
+        task={"query": MESSAGES, "playbook": playbook, "tests": TESTS}
+    )
     print(result)
 
-    # Implement playbook update here (not implemented in this example)
+    # --------------------------------PLAYBOOK UPDATE--------------------------------
+    added = playbook.update_from_context(result)
+    print(f"Added {len(added)} bullets: {[bullet.id for bullet in added]}")
+    report = PlaybookRefiner().refine(playbook, [bullet.id for bullet in added])
+    print(f"Merged {report.merged}, pruned {report.pruned}")
+    print(playbook.to_json())
+    if store:
+        store.close()
+    if cache:
+        cache.flush()
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
     asyncio.run(main())
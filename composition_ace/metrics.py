@@ -0,0 +1,241 @@
+from __future__ import annotations
+import bisect
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Protocol
+
+current_agent: ContextVar[str] = ContextVar("current_agent", default="unknown")
+current_run: ContextVar[str] = ContextVar("current_run", default="")
+current_call: ContextVar[Optional["CallMetrics"]] = ContextVar(
+    "current_call", default=None
+)
+
+
+@dataclass
+class CallMetrics:
+    agent: str
+    run_id: str
+    model: str
+    started_at: float = field(default_factory=time.time)
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    latency: float = 0.0
+    queue_wait: float = 0.0
+    retries: int = 0
+    repairs: int = 0
+    cache_hit: bool = False
+    error: Optional[str] = None
+
+
+class MetricsSink(Protocol):
+    def record(self, metrics: CallMetrics) -> None:
+        ...
+
+
+class Histogram:
+    """Fixed exponential buckets; quantiles are reported as bucket upper bounds."""
+
+    def __init__(
+        self, start: float = 0.001, factor: float = 1.5, buckets: int = 40
+    ) -> None:
+        self.bounds = [start * factor**i for i in range(buckets)]
+        self.counts = [0] * (buckets + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return self.bounds[i] if i < len(self.bounds) else self.max
+        return self.max
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "max": self.max,
+        }
+
+
+@dataclass
+class _Aggregate:
+    calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    retries: int = 0
+    repairs: int = 0
+    cache_hits: int = 0
+    errors: int = 0
+    latency: Histogram = field(default_factory=Histogram)
+    queue_wait: Histogram = field(default_factory=Histogram)
+
+    def add(self, metrics: CallMetrics) -> None:
+        self.calls += 1
+        self.prompt_tokens += metrics.prompt_tokens
+        self.completion_tokens += metrics.completion_tokens
+        self.retries += metrics.retries
+        self.repairs += metrics.repairs
+        self.cache_hits += int(metrics.cache_hit)
+        self.errors += int(metrics.error is not None)
+        self.latency.observe(metrics.latency)
+        self.queue_wait.observe(metrics.queue_wait)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "retries": self.retries,
+            "repairs": self.repairs,
+            "cache_hits": self.cache_hits,
+            "errors": self.errors,
+            "latency": self.latency.summary(),
+            "queue_wait": self.queue_wait.summary(),
+        }
+
+
+class InMemoryHistogramSink:
+    """Aggregates calls per agent name and per TeamManager run."""
+
+    def __init__(self) -> None:
+        self.by_agent: Dict[str, _Aggregate] = {}
+        self.by_run: Dict[str, _Aggregate] = {}
+        self._lock = threading.Lock()
+
+    def record(self, metrics: CallMetrics) -> None:
+        with self._lock:
+            self.by_agent.setdefault(metrics.agent, _Aggregate()).add(metrics)
+            self.by_run.setdefault(metrics.run_id, _Aggregate()).add(metrics)
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {
+                "agents": {name: agg.summary() for name, agg in self.by_agent.items()},
+                "runs": {run: agg.summary() for run, agg in self.by_run.items()},
+            }
+
+
+class JsonLinesSink:
+    """Appends one JSON object per call to a file."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+
+    def record(self, metrics: CallMetrics) -> None:
+        line = json.dumps(asdict(metrics))
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+class SpanExporterSink:
+    """Turns calls into OpenTelemetry-style span dicts, exported in batches.
+
+    One trace per TeamManager run; attribute names follow the GenAI semantic
+    conventions where one exists.
+    """
+
+    def __init__(
+        self, exporter: Callable[[List[Dict[str, Any]]], None], batch_size: int = 64
+    ) -> None:
+        self.exporter = exporter
+        self.batch_size = batch_size
+        self._spans: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def record(self, metrics: CallMetrics) -> None:
+        start = int(metrics.started_at * 1e9)
+        span = {
+            "name": f"llm.call {metrics.agent}",
+            "trace_id": uuid.uuid5(uuid.NAMESPACE_OID, metrics.run_id or "none").hex,
+            "span_id": os.urandom(8).hex(),
+            "start_time_unix_nano": start,
+            "end_time_unix_nano": start + int(metrics.latency * 1e9),
+            "status": {
+                "code": "ERROR" if metrics.error else "OK",
+                "message": metrics.error or "",
+            },
+            "attributes": {
+                "gen_ai.request.model": metrics.model,
+                "gen_ai.usage.input_tokens": metrics.prompt_tokens,
+                "gen_ai.usage.output_tokens": metrics.completion_tokens,
+                "ace.agent": metrics.agent,
+                "ace.run_id": metrics.run_id,
+                "ace.queue_wait_s": metrics.queue_wait,
+                "ace.retries": metrics.retries,
+                "ace.repairs": metrics.repairs,
+                "ace.cache_hit": metrics.cache_hit,
+            },
+        }
+        with self._lock:
+            self._spans.append(span)
+            if len(self._spans) < self.batch_size:
+                return
+            batch, self._spans = self._spans, []
+        self.exporter(batch)
+
+    def flush(self) -> None:
+        with self._lock:
+            batch, self._spans = self._spans, []
+        if batch:
+            self.exporter(batch)
+
+
+class MetricsRecorder:
+    """Measures each LLM call and forwards it to the sinks.
+
+    The agent name and run id come from context variables set by TeamManager;
+    the scheduler and client fill in queue wait, retries, repairs, usage and
+    cache hits on the call in progress.
+    """
+
+    def __init__(self, sinks: List[MetricsSink]) -> None:
+        self.sinks = sinks
+
+    @contextmanager
+    def call(self, model: str) -> Iterator[CallMetrics]:
+        metrics = CallMetrics(
+            agent=current_agent.get(), run_id=current_run.get(), model=model
+        )
+        token = current_call.set(metrics)
+        started = time.perf_counter()
+        try:
+            yield metrics
+        except BaseException as exc:
+            metrics.error = type(exc).__name__
+            raise
+        finally:
+            metrics.latency = time.perf_counter() - started
+            current_call.reset(token)
+            for sink in self.sinks:
+                sink.record(metrics)
+
+
+@contextmanager
+def agent_scope(agent: str) -> Iterator[None]:
+    token = current_agent.set(agent)
+    try:
+        yield
+    finally:
+        current_agent.reset(token)
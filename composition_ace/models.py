@@ -1,44 +1,78 @@
 from __future__ import annotations
-from typing import List, Dict, Literal, Any
+import json
+from functools import lru_cache
+from typing import Dict, Any, Optional, TYPE_CHECKING
 from enum import Enum
 
-from pydantic import BaseModel
+if TYPE_CHECKING:
+    from pydantic import TypeAdapter
+    from schemas import (
+        CuratorResponse,
+        GeneratorResponse,
+        Operation,
+        Query,
+        ReflectorResponse,
+        Verification,
+        VerifiedReflection,
+    )
+
+# The pydantic response models live in `schemas` and are imported on first
+# access, so importing `models` for `AgentNames` or `Context` stays cheap.
+_SCHEMAS = {
+    "Query",
+    "GeneratorResponse",
+    "ReflectorResponse",
+    "VerifiedReflection",
+    "Operation",
+    "CuratorResponse",
+    "Verification",
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name in _SCHEMAS:
+        import schemas
+
+        return getattr(schemas, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 class AgentNames(Enum):
     GENERATOR = "Generator"
     REFLECTOR = "Reflector"
     CURATOR = "Curator"
+    VERIFIER = "Verifier"
 
 
-class Query(BaseModel):
-    text: str
+Context = Dict[str, Any]
 
 
-class GeneratorResponse(BaseModel):
-    reasoning: str
-    bullet_ids: List[str]
-    final_answer: str
+@lru_cache(maxsize=None)
+def _adapter(response_model: type) -> TypeAdapter:
+    from pydantic import TypeAdapter
 
+    return TypeAdapter(response_model)
 
-class ReflectorResponse(BaseModel):
-    reasoning: str
-    error_identification: str
-    root_cause_analysis: str
-    correct_approach: str
-    key_insight: str
-    bullet_tags: List[Dict[str, str]]
 
+def parse_response(content: str, response_model: Optional[type] = None) -> Any:
+    """Parse a JSON completion, straight into `response_model` when one is given.
 
-class Operation(BaseModel):
-    type: Literal["ADD"]
-    section: str
-    content: str
+    Raises `json.JSONDecodeError` or `pydantic.ValidationError` on a bad payload.
+    """
+    if response_model is None:
+        return json.loads(content or "{}")
+    return _adapter(response_model).validate_json(content or "{}")
 
 
-class CuratorResponse(BaseModel):
-    reasoning: str
-    operations: List[Operation]
+def validate_response(data: Any, response_model: Optional[type] = None) -> Any:
+    """Validate an already decoded response, e.g. one read back from the cache."""
+    if response_model is None:
+        return data
+    return _adapter(response_model).validate_python(data)
 
 
-Context = Dict[str, Any]
+def dump_response(response: Any, response_model: Optional[type] = None) -> Any:
+    """JSON-compatible form of a parsed response."""
+    if response_model is None:
+        return response
+    return _adapter(response_model).dump_python(response, mode="json")
@@ -0,0 +1,277 @@
+from __future__ import annotations
+import json
+import re
+from dataclasses import asdict, dataclass
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Literal,
+    Optional,
+)
+
+from models import AgentNames, Context
+
+if TYPE_CHECKING:
+    from models import CuratorResponse, Operation, ReflectorResponse
+
+DEFAULT_SECTION = "general"
+
+_LEADING_NUMBER = re.compile(r"^(\d+)")
+
+
+@dataclass
+class Bullet:
+    id: str
+    section: str
+    content: str
+    helpful: int = 0
+    harmful: int = 0
+
+
+@dataclass(frozen=True)
+class PlaybookDelta:
+    """One incremental change; ADD carries the bullet, TAG counter increments."""
+
+    op: Literal["ADD", "TAG", "REMOVE"]
+    bullet_id: str
+    section: str = ""
+    content: str = ""
+    helpful: int = 0
+    harmful: int = 0
+
+
+class Playbook:
+    """Bullets indexed by id and by section.
+
+    Every change is applied in place and emitted as a `PlaybookDelta` to the
+    subscribed listeners. The JSON rendering used in prompts is cached per
+    bullet, so only changed bullets are re-serialized.
+    """
+
+    def __init__(self, bullets: Iterable[Bullet] = (), id_prefix: str = "") -> None:
+        self.id_prefix = id_prefix
+        self._bullets: Dict[str, Bullet] = {}
+        self._sections: Dict[str, Dict[str, None]] = {}
+        self._fragments: Dict[str, str] = {}
+        self._json: Optional[str] = None
+        self._next_number = 1
+        self._listeners: List[Callable[[PlaybookDelta], None]] = []
+        for bullet in bullets:
+            self._insert(bullet)
+
+    @classmethod
+    def from_list(
+        cls, items: Iterable[Dict[str, Any]], id_prefix: str = ""
+    ) -> "Playbook":
+        """Build from the plain list-of-dicts playbook format."""
+        return cls(
+            (
+                Bullet(
+                    id=item["id"],
+                    section=item.get("section") or _section_from_id(item["id"]),
+                    content=item["content"],
+                    helpful=item.get("helpful", 0),
+                    harmful=item.get("harmful", 0),
+                )
+                for item in items
+            ),
+            id_prefix=id_prefix,
+        )
+
+    @classmethod
+    def from_json_lines(
+        cls, lines: Iterable[str | bytes], id_prefix: str = ""
+    ) -> "Playbook":
+        """Build from one JSON bullet per line, as written by `bullet_json`.
+
+        The lines are reused as the cached prompt fragments, so loading does
+        not re-serialize the bullets.
+        """
+        playbook = cls(id_prefix=id_prefix)
+        for line in lines:
+            fragment = line.decode("utf-8") if isinstance(line, bytes) else line
+            fragment = fragment.rstrip("\n")
+            playbook._insert(Bullet(**json.loads(fragment)), fragment)
+        return playbook
+
+    def __len__(self) -> int:
+        return len(self._bullets)
+
+    def __contains__(self, bullet_id: object) -> bool:
+        return bullet_id in self._bullets
+
+    def __iter__(self) -> Iterator[Bullet]:
+        return iter(self._bullets.values())
+
+    def get(self, bullet_id: str) -> Optional[Bullet]:
+        return self._bullets.get(bullet_id)
+
+    def sections(self) -> List[str]:
+        return list(self._sections)
+
+    def section(self, name: str) -> List[Bullet]:
+        return [self._bullets[bullet_id] for bullet_id in self._sections.get(name, {})]
+
+    def subscribe(self, listener: Callable[[PlaybookDelta], None]) -> None:
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener: Callable[[PlaybookDelta], None]) -> None:
+        self._listeners.remove(listener)
+
+    # ---------------------------- updates ----------------------------
+
+    def add(
+        self, section: str, content: str, bullet_id: Optional[str] = None
+    ) -> Bullet:
+        bullet = Bullet(
+            id=bullet_id or self._fresh_id(section), section=section, content=content
+        )
+        self._insert(bullet)
+        self._emit(PlaybookDelta("ADD", bullet.id, section=section, content=content))
+        return bullet
+
+    def tag(self, bullet_id: str, helpful: int = 0, harmful: int = 0) -> None:
+        bullet = self._bullets.get(bullet_id)
+        if bullet is None or not (helpful or harmful):
+            return
+        bullet.helpful += helpful
+        bullet.harmful += harmful
+        self._touch(bullet)
+        self._emit(PlaybookDelta("TAG", bullet_id, helpful=helpful, harmful=harmful))
+
+    def remove(self, bullet_id: str) -> Optional[Bullet]:
+        bullet = self._bullets.pop(bullet_id, None)
+        if bullet is None:
+            return None
+        section = self._sections[bullet.section]
+        del section[bullet_id]
+        if not section:
+            del self._sections[bullet.section]
+        del self._fragments[bullet_id]
+        self._json = None
+        self._emit(PlaybookDelta("REMOVE", bullet_id))
+        return bullet
+
+    def apply_operations(self, operations: Iterable[Operation]) -> List[Bullet]:
+        return [
+            self.add(operation.section, operation.content)
+            for operation in operations
+            if operation.type == "ADD"
+        ]
+
+    def apply_bullet_tags(self, bullet_tags: Iterable[Dict[str, str]]) -> None:
+        for bullet_tag in bullet_tags:
+            tag = bullet_tag.get("tag", "").strip().lower()
+            self.tag(
+                bullet_tag.get("bullet_id", ""),
+                helpful=int(tag == "helpful"),
+                harmful=int(tag == "harmful"),
+            )
+
+    def apply_delta(self, delta: PlaybookDelta) -> None:
+        if delta.op == "ADD":
+            if delta.bullet_id not in self._bullets:
+                self.add(delta.section, delta.content, bullet_id=delta.bullet_id)
+        elif delta.op == "REMOVE":
+            self.remove(delta.bullet_id)
+        else:
+            self.tag(delta.bullet_id, helpful=delta.helpful, harmful=delta.harmful)
+
+    def merge(self, deltas: Iterable[PlaybookDelta]) -> None:
+        for delta in deltas:
+            self.apply_delta(delta)
+
+    def update_from_context(self, context: Context) -> List[Bullet]:
+        """Apply the Reflector tags and Curator operations of a team run."""
+        reflections: List[ReflectorResponse] = context.get(
+            AgentNames.REFLECTOR.value, []
+        )
+        curations: List[CuratorResponse] = context.get(AgentNames.CURATOR.value, [])
+        for reflection in reflections:
+            self.apply_bullet_tags(reflection.bullet_tags)
+        added: List[Bullet] = []
+        for curation in curations:
+            added.extend(self.apply_operations(curation.operations))
+        return added
+
+    # ---------------------------- rendering ----------------------------
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        return [asdict(bullet) for bullet in self._bullets.values()]
+
+    def json_lines(self) -> Iterator[str]:
+        """The cached JSON of each bullet, in playbook order."""
+        return iter(self._fragments.values())
+
+    def to_json(self, bullet_ids: Optional[Iterable[str]] = None) -> str:
+        """Prompt JSON of the whole playbook, or of the given bullets only."""
+        if bullet_ids is not None:
+            return "[" + ", ".join(self._fragments[b] for b in bullet_ids) + "]"
+        if self._json is None:
+            self._json = "[" + ", ".join(self._fragments.values()) + "]"
+        return self._json
+
+    # ---------------------------- internals ----------------------------
+
+    def _insert(self, bullet: Bullet, fragment: Optional[str] = None) -> None:
+        if bullet.id in self._bullets:
+            raise ValueError(f"Duplicate bullet id: {bullet.id}")
+        self._bullets[bullet.id] = bullet
+        self._sections.setdefault(bullet.section, {})[bullet.id] = None
+        match = (
+            _LEADING_NUMBER.match(bullet.id[len(self.id_prefix):])
+            if bullet.id.startswith(self.id_prefix)
+            else None
+        )
+        if match:
+            self._next_number = max(self._next_number, int(match.group(1)) + 1)
+        if fragment is None:
+            self._touch(bullet)
+        else:
+            self._fragments[bullet.id] = fragment
+            self._json = None
+
+    def _touch(self, bullet: Bullet) -> None:
+        self._fragments[bullet.id] = bullet_json(bullet)
+        self._json = None
+
+    def _fresh_id(self, section: str) -> str:
+        while True:
+            bullet_id = f"{self.id_prefix}{self._next_number:03d} {section}"
+            self._next_number += 1
+            if bullet_id not in self._bullets:
+                return bullet_id
+
+    def _emit(self, delta: PlaybookDelta) -> None:
+        for listener in self._listeners:
+            listener(delta)
+
+
+def bullet_json(bullet: Bullet) -> str:
+    """One bullet as JSON; also the line format of snapshots."""
+    return json.dumps(
+        {
+            "id": bullet.id,
+            "section": bullet.section,
+            "content": bullet.content,
+            "helpful": bullet.helpful,
+            "harmful": bullet.harmful,
+        }
+    )
+
+
+def _section_from_id(bullet_id: str) -> str:
+    parts = bullet_id.split(" ", 1)
+    return parts[1] if len(parts) == 2 else DEFAULT_SECTION
+
+
+def playbook_json(playbook: Any) -> str:
+    """Prompt rendering for either a `Playbook` or the plain list-of-dicts format."""
+    if isinstance(playbook, Playbook):
+        return playbook.to_json()
+    return json.dumps(playbook)
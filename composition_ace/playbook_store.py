@@ -0,0 +1,161 @@
+from __future__ import annotations
+import glob
+import json
+import mmap
+import os
+import re
+from dataclasses import asdict
+from typing import IO, Any, Dict, Iterable, Iterator, Optional
+
+from playbook import Playbook, PlaybookDelta
+
+_GENERATION = re.compile(r"snapshot-(\d+)\.jsonl$")
+
+
+class PlaybookStore:
+    """Durable playbook: append-only delta log plus periodic snapshots.
+
+    Generation `n` is `snapshot-n.jsonl` (one `bullet_json` line per bullet)
+    and `log-n.jsonl` (the deltas applied since that snapshot). Once the log
+    holds `compact_every` deltas, the playbook is written as snapshot `n + 1`
+    and a new, empty log is started. A cold start memory-maps the latest
+    snapshot and replays only its log.
+    """
+
+    def __init__(
+        self,
+        directory: str = ".ace_playbook",
+        compact_every: int = 10_000,
+        fsync: bool = False,
+    ) -> None:
+        self.directory = directory
+        self.compact_every = compact_every
+        self.fsync = fsync
+        self.generation = 0
+        self.log_size = 0
+        self._playbook: Optional[Playbook] = None
+        self._log: Optional[IO[str]] = None
+        os.makedirs(directory, exist_ok=True)
+
+    def load(
+        self, id_prefix: str = "", seed: Iterable[Dict[str, Any]] = ()
+    ) -> Playbook:
+        """Rebuild the stored playbook and record every later change to it.
+
+        When nothing is stored yet, the playbook is built from `seed` (the
+        list-of-dicts format) and written as the first snapshot.
+        """
+        self.generation = self._latest_generation()
+        self.log_size = 0
+        if self.generation == 0 and not os.path.exists(self._log_path(0)):
+            playbook = Playbook.from_list(seed, id_prefix=id_prefix)
+            self.attach(playbook)
+            self.compact()
+            return playbook
+
+        playbook = Playbook.from_json_lines(self._read_snapshot(), id_prefix=id_prefix)
+        for delta in self._read_log():
+            playbook.apply_delta(delta)
+            self.log_size += 1
+        self.attach(playbook)
+        return playbook
+
+    def attach(self, playbook: Playbook) -> None:
+        """Record the changes of `playbook`; its current state must be stored already.
+
+        Use `load()` for a stored playbook, or `attach` followed by `compact()`
+        to start storing a playbook built elsewhere.
+        """
+        self.close()
+        self._playbook = playbook
+        self._log = open(self._log_path(self.generation), "a", encoding="utf-8")
+        playbook.subscribe(self._record)
+
+    def compact(self) -> None:
+        """Write the attached playbook as the next snapshot and start a new log."""
+        if self._playbook is None:
+            raise RuntimeError("No playbook attached to the store.")
+        generation = self.generation + 1
+        path = self._snapshot_path(generation)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            for line in self._playbook.json_lines():
+                f.write(line + "\n")
+            self._sync(f)
+        os.replace(path + ".tmp", path)
+
+        if self._log is not None:
+            self._log.close()
+        previous, self.generation = self.generation, generation
+        self._log = open(self._log_path(generation), "a", encoding="utf-8")
+        self.log_size = 0
+        for stale in (self._snapshot_path(previous), self._log_path(previous)):
+            if os.path.exists(stale):
+                os.remove(stale)
+
+    def flush(self) -> None:
+        if self._log is not None:
+            self._sync(self._log)
+
+    def close(self) -> None:
+        if self._playbook is not None:
+            self._playbook.unsubscribe(self._record)
+            self._playbook = None
+        if self._log is not None:
+            self._sync(self._log)
+            self._log.close()
+            self._log = None
+
+    def _record(self, delta: PlaybookDelta) -> None:
+        assert self._log is not None
+        self._log.write(json.dumps(asdict(delta)) + "\n")
+        self._log.flush()
+        self.log_size += 1
+        if self.log_size >= self.compact_every:
+            self.compact()
+
+    def _sync(self, f: IO[str]) -> None:
+        f.flush()
+        if self.fsync:
+            os.fsync(f.fileno())
+
+    def _latest_generation(self) -> int:
+        generations = [
+            int(match.group(1))
+            for path in glob.glob(os.path.join(self.directory, "snapshot-*.jsonl"))
+            if (match := _GENERATION.search(path))
+        ]
+        return max(generations, default=0)
+
+    def _read_snapshot(self) -> Iterator[bytes]:
+        path = self._snapshot_path(self.generation)
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            return
+        with open(path, "rb") as f, mmap.mmap(
+            f.fileno(), 0, access=mmap.ACCESS_READ
+        ) as mm:
+            yield from iter(mm.readline, b"")
+
+    def _read_log(self) -> Iterator[PlaybookDelta]:
+        path = self._log_path(self.generation)
+        if not os.path.exists(path):
+            return
+        with open(path, "rb+") as f:
+            data = f.read()
+            complete = data.rfind(b"\n") + 1
+            if complete < len(data):
+                # Drop a line torn by a crash so new deltas start on a fresh line.
+                f.truncate(complete)
+        for line in data[:complete].splitlines():
+            yield PlaybookDelta(**json.loads(line))
+
+    def _snapshot_path(self, generation: int) -> str:
+        return os.path.join(self.directory, f"snapshot-{generation:08d}.jsonl")
+
+    def _log_path(self, generation: int) -> str:
+        return os.path.join(self.directory, f"log-{generation:08d}.jsonl")
+
+
+def store_from_env() -> Optional[PlaybookStore]:
+    """Opt-in persistence: enabled when ACE_PLAYBOOK_DIR names a directory."""
+    directory = os.getenv("ACE_PLAYBOOK_DIR")
+    return PlaybookStore(directory) if directory else None
@@ -1,4 +1,81 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from string import Formatter
+from typing import Dict, List, Optional, Tuple
+
+from scheduler import estimate_tokens
+
+# Provider-side prompt caching only applies to prefixes of at least this many
+# tokens, and grows in fixed increments.
+MIN_CACHED_PREFIX_TOKENS = 1024
+CACHED_PREFIX_INCREMENT = 128
+
+
+class PromptTemplate:
+    """Template parsed once into literal and field segments.
+
+    Templates are laid out stable-first (instructions, then playbook, then
+    per-query fields), so consecutive renders share a long prefix. Each render
+    records how much of that prefix matched the previous one.
+    """
+
+    def __init__(self, template: str) -> None:
+        self._segments: List[Tuple[str, Optional[str]]] = [
+            (literal, name) for literal, name, _, _ in Formatter().parse(template)
+        ]
+        self._previous: Dict[str, str] = {}
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.cached_prefix_tokens = 0
+        self.last_cached_prefix_tokens = 0
+
+    def render(self, **values: str) -> str:
+        parts: List[str] = []
+        prefix_chars = 0
+        shared = True
+        for literal, name in self._segments:
+            parts.append(literal)
+            if shared:
+                prefix_chars += len(literal)
+            if name is None:
+                continue
+            value = values[name]
+            parts.append(value)
+            if shared and self._previous.get(name) == value:
+                prefix_chars += len(value)
+            else:
+                shared = False
+        self._previous = values
+
+        prompt = "".join(parts)
+        self.calls += 1
+        self.prompt_tokens += estimate_tokens(prompt)
+        self.last_cached_prefix_tokens = _cacheable_tokens(prefix_chars)
+        self.cached_prefix_tokens += self.last_cached_prefix_tokens
+        return prompt
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "calls": self.calls,
+            "prompt_tokens": self.prompt_tokens,
+            "cached_prefix_tokens": self.cached_prefix_tokens,
+            "last_cached_prefix_tokens": self.last_cached_prefix_tokens,
+        }
+
+
+def _cacheable_tokens(prefix_chars: int) -> int:
+    tokens = prefix_chars // 4
+    if tokens < MIN_CACHED_PREFIX_TOKENS:
+        return 0
+    return tokens - tokens % CACHED_PREFIX_INCREMENT
+
+
+_COMPILED: Dict[str, PromptTemplate] = {}
+
+
+def compile_template(template: str) -> PromptTemplate:
+    if template not in _COMPILED:
+        _COMPILED[template] = PromptTemplate(template)
+    return _COMPILED[template]
 
 
 @dataclass
@@ -18,6 +95,14 @@ class Prompts:
 		- bullet ids: each line in the playbook has a bullet id. all bulletpoints in the playbook that’s relevant, helpful for you to answer this question, you should include their bullet id in this list 
 		- final answer: your concise final answer
 		
+		Answer in this exact JSON format:
+		{{
+		  "reasoning": "[Detailed explanation, analytical steps, and calculations]",
+		  "bullet_ids": ["00001", "00002"],
+		  "final_answer": "[Clear and concise final result]",
+		  "
+		}}
+		 
 		Playbook:
 		{playbook}
 		 
@@ -29,14 +114,6 @@ class Prompts:
 		 
 		Context:
 		{context}
-		 
-		Answer in this exact JSON format:
-		{{
-		  "reasoning": "[Detailed explanation, analytical steps, and calculations]",
-		  "bullet_ids": ["00001", "00002"],
-		  "final_answer": "[Clear and concise final result]",
-		  "
-		}}
 		"""
 
     REFLECTOR_SYSTEM_PROMPT: str = """
@@ -59,6 +136,22 @@ class Prompts:
 		- key_insight: what strategy, formula, or principle should be remembered to avoid this error? 
 		- bullet_tags: a list of json objects with bullet_id and tag for each bulletpoint used by the generator
 		 
+		Answer in this exact JSON format:
+		{{
+		  "reasoning": "[Detailed explanation of the model’s internal reasoning process and calculations]",
+		  "error_identification": "[Explicit description of what the model did incorrectly]",
+		  "root_cause_analysis": "[Why the mistake occurred and which concept or assumption was misunderstood]",
+		  "correct_approach": "[How the problem should have been solved correctly]",
+		  "key_insight": "[Core rule, formula, or strategy that prevents this error in the future]",
+		  "bullet_tags": [
+			{{"bullet_id": "00001", "tag": "helpful"}},
+			{{"bullet_id": "00002", "tag": "harmful"}}
+		  ]
+		}}
+		 
+		Part of Playbook that’s used by the generator to answer the question:
+		{playbook}
+		 
 		Question:
 		{question}
 		 
@@ -73,22 +166,6 @@ class Prompts:
 		 
 		Environment Feedback:
 		{environment_feedback}
-		 
-		Part of Playbook that’s used by the generator to answer the question:
-		{playbook}
-		 
-		Answer in this exact JSON format:
-		{{
-		  "reasoning": "[Detailed explanation of the model’s internal reasoning process and calculations]",
-		  "error_identification": "[Explicit description of what the model did incorrectly]",
-		  "root_cause_analysis": "[Why the mistake occurred and which concept or assumption was misunderstood]",
-		  "correct_approach": "[How the problem should have been solved correctly]",
-		  "key_insight": "[Core rule, formula, or strategy that prevents this error in the future]",
-		  "bullet_tags": [
-			{{"bullet_id": "00001", "tag": "helpful"}},
-			{{"bullet_id": "00002", "tag": "harmful"}}
-		  ]
-		}}	 
 	"""
 
     CURATOR_SYSTEM_PROMPT: str = """
@@ -108,11 +185,7 @@ class Prompts:
 	- Format your response as a PURE JSON object with specific sections 
 	- For any operation if no new content to add, return an empty list for the operations field - Be concise and specific - each addition should be actionable
 	 
-	Training Context:
 	Total token budget: 1000 tokens
-	Recent Reflection: {recent_reflection}
-	Current Playbook: {current_playbook}
-	Question Context: {question_context}
 	 
 	Your Task: Output ONLY a valid JSON object with these exact fields: 
 	- reasoning: your chain of thought / reasoning / thinking process, detailed analysis and calculations 
@@ -135,14 +208,35 @@ class Prompts:
 		  "content": "[New calculation method...]"
 		}}
 	  ]
-	}} 
-
+	}}
+	 
+	Current Playbook: {current_playbook}
+	 
+	Training Context:
+	Question Context: {question_context}
+	Recent Reflection: {recent_reflection}
 	"""
 
+    _generator: PromptTemplate = field(init=False, repr=False)
+    _reflector: PromptTemplate = field(init=False, repr=False)
+    _curator: PromptTemplate = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self._generator = compile_template(self.GENERATOR_SYSTEM_PROMPT)
+        self._reflector = compile_template(self.REFLECTOR_SYSTEM_PROMPT)
+        self._curator = compile_template(self.CURATOR_SYSTEM_PROMPT)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {
+            "generator": self._generator.stats(),
+            "reflector": self._reflector.stats(),
+            "curator": self._curator.stats(),
+        }
+
     def get_generator_prompt(
         self, playbook: str, reflection: str, question: str, context: str
     ) -> str:
-        return Prompts.GENERATOR_SYSTEM_PROMPT.format(
+        return self._generator.render(
             playbook=playbook, reflection=reflection, question=question, context=context
         )
 
@@ -155,7 +249,7 @@ class Prompts:
         environment_feedback: str,
         playbook: str,
     ) -> str:
-        return Prompts.REFLECTOR_SYSTEM_PROMPT.format(
+        return self._reflector.render(
             question=question,
             reasoning_trace=reasoning_trace,
             predicted_answer=predicted_answer,
@@ -170,8 +264,13 @@ class Prompts:
         current_playbook: str,
         question_context: str,
     ) -> str:
-        return Prompts.CURATOR_SYSTEM_PROMPT.format(
+        return self._curator.render(
             recent_reflection=recent_reflection,
             current_playbook=current_playbook,
             question_context=question_context,
         )
+
+
+# Shared instance: templates are compiled once and prefix stats accumulate
+# across agents.
+PROMPTS = Prompts()
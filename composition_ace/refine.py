@@ -0,0 +1,211 @@
+from __future__ import annotations
+import re
+import zlib
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Protocol, Sequence, Tuple
+
+import numpy as np
+
+from playbook import Bullet, Playbook
+
+_TOKEN = re.compile(r"\w+")
+
+
+class Embedder(Protocol):
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """Return one L2-normalised row per text."""
+        ...
+
+
+class HashingEmbedder:
+    """Offline embedder: signed feature hashing of word unigrams and bigrams."""
+
+    def __init__(self, dim: int = 512) -> None:
+        self.dim = dim
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            tokens = _TOKEN.findall(text.lower())
+            features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+            for feature in features:
+                h = zlib.crc32(feature.encode("utf-8"))
+                vectors[row, h % self.dim] += 1.0 if h & 0x80000000 else -1.0
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+
+@dataclass
+class RefineReport:
+    merged: List[Tuple[str, str]] = field(default_factory=list)  # (kept, dropped)
+    pruned: List[str] = field(default_factory=list)
+
+
+class PlaybookRefiner:
+    """Grow-and-refine step run after curation.
+
+    Prunes bullets tagged harmful more often than helpful, then merges
+    near-duplicates (cosine similarity >= `threshold`) into the older bullet,
+    folding their counters into it. Similarities are computed as blocked
+    matrix products; past `ann_min_size` bullets, candidates come from a
+    random-hyperplane LSH index instead of the full matrix.
+    """
+
+    def __init__(
+        self,
+        embedder: Optional[Embedder] = None,
+        threshold: float = 0.9,
+        block_size: int = 1024,
+        ann_min_size: int = 5000,
+        lsh_tables: int = 8,
+        lsh_bits: int = 8,
+        seed: int = 0,
+    ) -> None:
+        self.embedder = embedder or HashingEmbedder()
+        self.threshold = threshold
+        self.block_size = block_size
+        self.ann_min_size = ann_min_size
+        self.lsh_tables = lsh_tables
+        self.lsh_bits = lsh_bits
+        self._rng = np.random.default_rng(seed)
+        self._planes: Optional[np.ndarray] = None
+        # Embeddings in insertion order; rows past `_size` are spare capacity.
+        self._matrix: Optional[np.ndarray] = None
+        self._size = 0
+        self._rows: Dict[str, int] = {}  # bullet id -> row of `_matrix`
+
+    def refine(
+        self, playbook: Playbook, bullet_ids: Optional[Iterable[str]] = None
+    ) -> RefineReport:
+        """Refine in place; `bullet_ids` limits the duplicate search to them."""
+        report = RefineReport()
+        for bullet in list(playbook):
+            if bullet.harmful > bullet.helpful:
+                playbook.remove(bullet.id)
+                report.pruned.append(bullet.id)
+
+        bullets = list(playbook)
+        if len(bullets) < 2:
+            return report
+        index = {bullet.id: i for i, bullet in enumerate(bullets)}
+        positions = (
+            range(len(bullets))
+            if bullet_ids is None
+            else sorted(index[b] for b in set(bullet_ids) if b in index)
+        )
+        for kept, dropped in self._duplicates(bullets, list(positions)):
+            survivor, duplicate = bullets[kept], bullets[dropped]
+            playbook.tag(survivor.id, duplicate.helpful, duplicate.harmful)
+            playbook.remove(duplicate.id)
+            self._rows.pop(duplicate.id, None)
+            report.merged.append((survivor.id, duplicate.id))
+
+        for bullet_id in report.pruned:
+            self._rows.pop(bullet_id, None)
+        return report
+
+    def _duplicates(
+        self, bullets: List[Bullet], positions: List[int]
+    ) -> List[Tuple[int, int]]:
+        """(kept, dropped) pairs of positions in `bullets`."""
+        matrix, rows = self._embed(bullets)
+        search = (
+            self._lsh_neighbors
+            if len(bullets) >= self.ann_min_size
+            else self._exact_neighbors
+        )
+        # The matrix may hold rows of bullets no longer in the playbook; they
+        # have no position and are skipped.
+        position = {row: i for i, row in enumerate(rows)}
+        neighbors = {
+            position[row]: [position[j] for j in close if j in position]
+            for row, close in search(matrix, [rows[i] for i in positions]).items()
+        }
+
+        # Earlier bullets win: a row either folds into its earliest surviving
+        # neighbor or absorbs its later neighbors.
+        dropped: Dict[int, int] = {}
+        for row in positions:
+            if row in dropped:
+                continue
+            similar = [j for j in neighbors.get(row, ()) if j not in dropped]
+            earlier = [j for j in similar if j < row]
+            if earlier:
+                dropped[row] = min(earlier)
+                continue
+            for j in similar:
+                dropped[j] = row
+        return [(kept, drop) for drop, kept in dropped.items()]
+
+    def _embed(self, bullets: List[Bullet]) -> Tuple[np.ndarray, List[int]]:
+        """A view of the embedding matrix and the row of each bullet.
+
+        Only bullets not seen before are embedded and appended. Once stale
+        rows make up over half the matrix, it is compacted to `bullets`.
+        """
+        missing = [bullet for bullet in bullets if bullet.id not in self._rows]
+        if missing:
+            self._append(
+                [bullet.id for bullet in missing],
+                self.embedder.embed([bullet.content for bullet in missing]),
+            )
+        rows = [self._rows[bullet.id] for bullet in bullets]
+        if self._size > 2 * len(bullets):
+            self._matrix[: len(rows)] = self._matrix[rows]
+            self._rows = {bullet.id: i for i, bullet in enumerate(bullets)}
+            self._size = len(rows)
+            rows = list(range(len(rows)))
+        return self._matrix[: self._size], rows
+
+    def _append(self, bullet_ids: List[str], vectors: np.ndarray) -> None:
+        size = self._size + len(vectors)
+        if self._matrix is None or size > len(self._matrix):
+            capacity = max(size, 2 * self._size, 64)
+            grown = np.empty((capacity, vectors.shape[1]), dtype=vectors.dtype)
+            if self._matrix is not None:
+                grown[: self._size] = self._matrix[: self._size]
+            self._matrix = grown
+        self._matrix[self._size : size] = vectors
+        for offset, bullet_id in enumerate(bullet_ids):
+            self._rows[bullet_id] = self._size + offset
+        self._size = size
+
+    def _exact_neighbors(
+        self, matrix: np.ndarray, rows: List[int]
+    ) -> Dict[int, List[int]]:
+        neighbors: Dict[int, List[int]] = {}
+        for start in range(0, len(rows), self.block_size):
+            block = rows[start : start + self.block_size]
+            similarity = matrix[block] @ matrix.T
+            hits = np.argwhere(similarity >= self.threshold)
+            for r, j in hits:
+                row = block[r]
+                if row != j:
+                    neighbors.setdefault(row, []).append(int(j))
+        return neighbors
+
+    def _lsh_neighbors(
+        self, matrix: np.ndarray, rows: List[int]
+    ) -> Dict[int, List[int]]:
+        if self._planes is None or self._planes.shape[2] != matrix.shape[1]:
+            self._planes = self._rng.standard_normal(
+                (self.lsh_tables, self.lsh_bits, matrix.shape[1])
+            ).astype(np.float32)
+        weights = 1 << np.arange(self.lsh_bits)
+        wanted = np.zeros(len(matrix), dtype=bool)
+        wanted[rows] = True
+
+        neighbors: Dict[int, set] = {}
+        for planes in self._planes:
+            keys = ((matrix @ planes.T) > 0).astype(np.int64) @ weights
+            order = np.argsort(keys, kind="stable")
+            splits = np.flatnonzero(np.diff(keys[order])) + 1
+            for members in np.split(order, splits):
+                if len(members) < 2 or not wanted[members].any():
+                    continue
+                similarity = matrix[members] @ matrix[members].T
+                for a, b in np.argwhere(similarity >= self.threshold):
+                    row, other = int(members[a]), int(members[b])
+                    if row != other and wanted[row]:
+                        neighbors.setdefault(row, set()).add(other)
+        return {row: sorted(close) for row, close in neighbors.items()}
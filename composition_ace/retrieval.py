@@ -0,0 +1,132 @@
+from __future__ import annotations
+import heapq
+import math
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from playbook import Bullet, Playbook, PlaybookDelta
+from scheduler import estimate_tokens
+
+_TOKEN = re.compile(r"[^\W_]+")
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN.findall(text.lower())
+
+
+class BM25Index:
+    """Inverted index with Okapi BM25 scoring; documents can be added and removed."""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75) -> None:
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._lengths: Dict[str, int] = {}
+        self._doc_terms: Dict[str, List[str]] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def add(self, doc_id: str, text: str) -> None:
+        if doc_id in self._lengths:
+            self.remove(doc_id)
+        terms = Counter(tokenize(text))
+        for term, count in terms.items():
+            self._postings.setdefault(term, {})[doc_id] = count
+        length = sum(terms.values())
+        self._doc_terms[doc_id] = list(terms)
+        self._lengths[doc_id] = length
+        self._total_length += length
+
+    def remove(self, doc_id: str) -> None:
+        length = self._lengths.pop(doc_id, None)
+        if length is None:
+            return
+        self._total_length -= length
+        for term in self._doc_terms.pop(doc_id):
+            postings = self._postings[term]
+            del postings[doc_id]
+            if not postings:
+                del self._postings[term]
+
+    def search(self, query: str, k: int) -> List[Tuple[str, float]]:
+        if not self._lengths:
+            return []
+        n = len(self._lengths)
+        average_length = self._total_length / n
+        scores: Dict[str, float] = {}
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, tf in postings.items():
+                norm = 1 - self.b + self.b * self._lengths[doc_id] / average_length
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (
+                    tf + self.k1 * norm
+                )
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+
+class PlaybookRetriever:
+    """Slices a playbook down to the bullets relevant to one query.
+
+    The index follows the playbook through its delta stream, so bullets added
+    or removed after construction are picked up without a rebuild.
+    """
+
+    def __init__(
+        self,
+        playbook: Playbook,
+        top_k: int = 20,
+        token_budget: Optional[int] = 2000,
+    ) -> None:
+        self.playbook = playbook
+        self.top_k = top_k
+        self.token_budget = token_budget
+        self.index = BM25Index()
+        for bullet in playbook:
+            self.index.add(bullet.id, self._document(bullet))
+        playbook.subscribe(self._on_delta)
+
+    def select(self, query: str, required_ids: Iterable[str] = ()) -> List[Bullet]:
+        """Required bullets first, then the top-k matches, within the token budget."""
+        selected: Dict[str, Bullet] = {}
+        for bullet_id in required_ids:
+            bullet = self.playbook.get(bullet_id)
+            if bullet is not None:
+                selected[bullet_id] = bullet
+        for bullet_id, _ in self.index.search(query, self.top_k):
+            bullet = self.playbook.get(bullet_id)
+            if bullet is not None and bullet_id not in selected:
+                selected[bullet_id] = bullet
+
+        if self.token_budget is None:
+            return list(selected.values())
+        budgeted: List[Bullet] = []
+        used = 0
+        for bullet in selected.values():
+            used += estimate_tokens(bullet.content) + estimate_tokens(bullet.id)
+            if used > self.token_budget and budgeted:
+                break
+            budgeted.append(bullet)
+        return budgeted
+
+    def render(self, query: str, required_ids: Iterable[str] = ()) -> str:
+        bullets = self.select(query, required_ids)
+        return self.playbook.to_json([bullet.id for bullet in bullets])
+
+    def close(self) -> None:
+        self.playbook.unsubscribe(self._on_delta)
+
+    def _on_delta(self, delta: PlaybookDelta) -> None:
+        if delta.op == "ADD":
+            self.index.add(delta.bullet_id, f"{delta.section} {delta.content}")
+        elif delta.op == "REMOVE":
+            self.index.remove(delta.bullet_id)
+
+    @staticmethod
+    def _document(bullet: Bullet) -> str:
+        return f"{bullet.section} {bullet.content}"
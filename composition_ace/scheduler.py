@@ -0,0 +1,198 @@
+from __future__ import annotations
+import asyncio
+import logging
+import random
+import time
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from metrics import current_call
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough prompt size (~4 characters per token); good enough for budgeting."""
+    return max(1, len(text) // 4)
+
+
+def is_rate_limit_error(exc: BaseException) -> bool:
+    return getattr(exc, "status_code", None) == 429
+
+
+# openai's connection errors and timeouts, matched by name so that the SDK is
+# not imported here.
+_TRANSIENT_ERRORS = ("APIConnectionError", "APITimeoutError")
+
+
+def is_transient_error(exc: BaseException) -> bool:
+    """Errors the SDK retries itself: 408, 409, 5xx, timeouts, lost connections."""
+    status = getattr(exc, "status_code", None)
+    if status is not None:
+        return status in (408, 409) or status >= 500
+    if isinstance(exc, (ConnectionError, TimeoutError)):
+        return True
+    return any(cls.__name__ in _TRANSIENT_ERRORS for cls in type(exc).__mro__)
+
+
+def _retry_after(exc: BaseException) -> Optional[float]:
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    value = headers.get("retry-after")
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class TokenBucket:
+    """Budget of `per_minute` units refilled continuously; `acquire` waits for it."""
+
+    def __init__(self, per_minute: float) -> None:
+        self.capacity = float(per_minute)
+        self._rate = self.capacity / 60.0
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self._rate
+        )
+        self._updated = now
+
+    async def acquire(self, amount: float) -> None:
+        amount = min(float(amount), self.capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return
+                await asyncio.sleep((amount - self._tokens) / self._rate)
+
+
+class LLMScheduler:
+    """Shared gate for LLM calls.
+
+    Caps in-flight requests, enforces requests-per-minute and tokens-per-minute
+    budgets and, on a rate-limit error, pauses every caller with an exponential
+    backoff that decays again as calls succeed. Transient errors (5xx,
+    timeouts, lost connections) are retried up to `transient_retries` times
+    with a backoff of their own, without pausing other callers.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = 8,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        completion_tokens: int = 500,
+        max_retries: int = 5,
+        transient_retries: int = 2,
+        base_backoff: float = 1.0,
+        max_backoff: float = 60.0,
+    ) -> None:
+        self.max_in_flight = max_in_flight
+        self.completion_tokens = completion_tokens
+        self.max_retries = max_retries
+        self.transient_retries = transient_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+        self._requests = (
+            TokenBucket(requests_per_minute) if requests_per_minute else None
+        )
+        self._tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self._backoff = 0.0
+        self._paused_until = 0.0
+        self.in_flight = 0
+        self.completed = 0
+        self.rate_limited = 0
+        self.transient_failures = 0
+
+    async def submit(self, call: Callable[[], Awaitable[T]], *, tokens: int = 0) -> T:
+        """Run `call` once budgets allow it, retrying on rate-limit errors."""
+        cost = tokens + self.completion_tokens
+        attempt = 0
+        failures = 0
+        waited = 0.0
+        try:
+            while True:
+                queued_at = time.perf_counter()
+                await self._wait_for_pause()
+                if self._requests is not None:
+                    await self._requests.acquire(1)
+                if self._tokens is not None:
+                    await self._tokens.acquire(cost)
+
+                retry_in: Optional[float] = None
+                async with self._semaphore:
+                    await self._wait_for_pause()
+                    waited += time.perf_counter() - queued_at
+                    self.in_flight += 1
+                    try:
+                        result = await call()
+                    except Exception as exc:
+                        if is_rate_limit_error(exc):
+                            if attempt >= self.max_retries:
+                                raise
+                            attempt += 1
+                            self._on_rate_limit(exc, attempt)
+                            continue
+                        if not is_transient_error(exc):
+                            raise
+                        if failures >= self.transient_retries:
+                            raise
+                        failures += 1
+                        retry_in = self._on_transient_error(exc, failures)
+                    finally:
+                        self.in_flight -= 1
+
+                if retry_in is not None:
+                    # Sleep outside the semaphore, so other calls can proceed.
+                    await asyncio.sleep(retry_in)
+                    continue
+                self._on_success()
+                return result
+        finally:
+            metrics = current_call.get()
+            if metrics is not None:
+                metrics.queue_wait += waited
+                metrics.retries += attempt + failures
+
+    async def _wait_for_pause(self) -> None:
+        delay = self._paused_until - time.monotonic()
+        while delay > 0:
+            await asyncio.sleep(delay)
+            delay = self._paused_until - time.monotonic()
+
+    def _on_rate_limit(self, exc: BaseException, attempt: int) -> None:
+        self.rate_limited += 1
+        self._backoff = min(
+            self.max_backoff, max(self.base_backoff, self._backoff * 2)
+        )
+        delay = _retry_after(exc) or self._backoff * random.uniform(1.0, 1.5)
+        self._paused_until = max(self._paused_until, time.monotonic() + delay)
+        logger.warning(
+            f"Rate limited (attempt {attempt}/{self.max_retries}), pausing {delay:.2f}s"
+        )
+
+    def _on_transient_error(self, exc: BaseException, failure: int) -> float:
+        self.transient_failures += 1
+        delay = min(self.max_backoff, self.base_backoff * 2 ** (failure - 1))
+        delay *= random.uniform(1.0, 1.5)
+        logger.warning(
+            f"{type(exc).__name__} (retry {failure}/{self.transient_retries}), "
+            f"retrying in {delay:.2f}s"
+        )
+        return delay
+
+    def _on_success(self) -> None:
+        self.completed += 1
+        if self._backoff > self.base_backoff:
+            self._backoff /= 2
+        else:
+            self._backoff = 0.0
@@ -0,0 +1,51 @@
+from typing import List, Dict, Literal
+
+from pydantic import BaseModel
+from pydantic.dataclasses import dataclass
+
+
+class Query(BaseModel):
+    text: str
+
+
+class GeneratorResponse(BaseModel):
+    reasoning: str
+    bullet_ids: List[str]
+    final_answer: str
+
+
+@dataclass(slots=True)
+class ReflectorResponse:
+    """Slotted dataclass: one is created per Generator output, the hot path."""
+
+    reasoning: str
+    error_identification: str
+    root_cause_analysis: str
+    correct_approach: str
+    key_insight: str
+    bullet_tags: List[Dict[str, str]]
+
+
+@dataclass(slots=True)
+class VerifiedReflection(ReflectorResponse):
+    """Tag-only reflection for an answer that verified.
+
+    Built by ReflectorAgent, never parsed from a model reply, so no reply can
+    make the Curator skip a reflection.
+    """
+
+
+class Operation(BaseModel):
+    type: Literal["ADD"]
+    section: str
+    content: str
+
+
+class CuratorResponse(BaseModel):
+    reasoning: str
+    operations: List[Operation]
+
+
+class Verification(BaseModel):
+    final_answer: str
+    passed: bool
@@ -0,0 +1,219 @@
+"""Multi-process ACE training over a sharded task dataset.
+
+Each worker process runs its own `TeamManager` against a local playbook
+replica. Bullets added in a worker get the id prefix `w<index>-`, so ids never
+collide across replicas. Workers publish their ADD/TAG deltas to a shared
+append-only JSONL file every `sync_every` tasks and replay the deltas the other
+workers published since their last read. The master playbook follows the same
+log from the parent process, merging new deltas every `merge_every` seconds
+while the workers run.
+"""
+
+from __future__ import annotations
+import asyncio
+import json
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, wait
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import IO, Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows
+    fcntl = None
+    import msvcrt
+
+from agents import TeamManager
+from playbook import Playbook, PlaybookDelta
+
+TeamFactory = Callable[[], TeamManager]
+
+
+@dataclass
+class WorkerReport:
+    worker: str
+    tasks: int
+    failures: int
+    published: int
+    replayed: int
+
+
+@contextmanager
+def _locked(f: IO, exclusive: bool) -> Iterator[None]:
+    """Hold `flock` on `f`, or a lock on its first byte where there is no fcntl."""
+    if fcntl is not None:
+        fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+        return
+    # msvcrt locks are exclusive and start at the current position
+    position = f.tell()
+    f.seek(0)
+    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+    f.seek(position)
+    try:
+        yield
+    finally:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class DeltaLog:
+    """Append-only JSONL file of playbook deltas shared between processes.
+
+    Appends take an exclusive file lock so lines from different writers never
+    interleave; each reader keeps its own byte offset and only consumes
+    complete lines.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.offset = 0
+
+    def append(self, origin: str, deltas: Iterable[PlaybookDelta]) -> int:
+        lines = [
+            json.dumps({"origin": origin, **asdict(delta)}) + "\n" for delta in deltas
+        ]
+        if not lines:
+            return 0
+        with open(self.path, "a", encoding="utf-8") as f, _locked(f, exclusive=True):
+            f.write("".join(lines))
+            f.flush()
+        return len(lines)
+
+    def read_new(self) -> List[Tuple[str, PlaybookDelta]]:
+        """Deltas appended since the previous call, with the id of their writer."""
+        with open(self.path, "rb") as f, _locked(f, exclusive=False):
+            f.seek(self.offset)
+            data = f.read()
+        complete = data[: data.rfind(b"\n") + 1]
+        self.offset += len(complete)
+        records = []
+        for line in complete.splitlines():
+            record = json.loads(line)
+            origin = record.pop("origin")
+            records.append((origin, PlaybookDelta(**record)))
+        return records
+
+
+class _ReplicaSync:
+    """Collects the local deltas of a replica and exchanges them via the log."""
+
+    def __init__(self, worker: str, playbook: Playbook, log: DeltaLog) -> None:
+        self.worker = worker
+        self.playbook = playbook
+        self.log = log
+        self.published = 0
+        self.replayed = 0
+        self._pending: List[PlaybookDelta] = []
+        self._replaying = False
+        playbook.subscribe(self._record)
+
+    def _record(self, delta: PlaybookDelta) -> None:
+        if not self._replaying and delta.op != "REMOVE":
+            self._pending.append(delta)
+
+    def sync(self) -> None:
+        self.published += self.log.append(self.worker, self._pending)
+        self._pending.clear()
+        self._replaying = True
+        try:
+            for origin, delta in self.log.read_new():
+                if origin != self.worker:
+                    self.playbook.apply_delta(delta)
+                    self.replayed += 1
+        finally:
+            self._replaying = False
+
+
+async def _train_shard(
+    index: int,
+    shard: List[Dict[str, Any]],
+    seed: List[Dict[str, Any]],
+    team_factory: TeamFactory,
+    log_path: str,
+    sync_every: int,
+    concurrency: int,
+) -> WorkerReport:
+    worker = f"w{index}"
+    playbook = Playbook.from_list(seed, id_prefix=f"{worker}-")
+    replica = _ReplicaSync(worker, playbook, DeltaLog(log_path))
+    team = team_factory()
+    done = failures = 0
+    tasks = ({**task, "playbook": playbook} for task in shard)
+    async for result in team.run_many(tasks, concurrency=concurrency):
+        if result.error is not None:
+            failures += 1
+            continue
+        playbook.update_from_context(result.context)
+        done += 1
+        if done % sync_every == 0:
+            replica.sync()
+    replica.sync()
+    return WorkerReport(
+        worker, len(shard), failures, replica.published, replica.replayed
+    )
+
+
+def _run_worker(*args: Any) -> WorkerReport:
+    return asyncio.run(_train_shard(*args))
+
+
+def train_sharded(
+    tasks: Iterable[Dict[str, Any]],
+    team_factory: TeamFactory,
+    playbook: Playbook,
+    workers: Optional[int] = None,
+    sync_every: int = 50,
+    concurrency: int = 32,
+    delta_log: Optional[str] = None,
+    merge_every: float = 1.0,
+) -> List[WorkerReport]:
+    """Train `playbook` on `tasks` with one TeamManager per worker process.
+
+    `team_factory` is called inside each worker to build its team and client,
+    so it must be a module-level function. While the shards run, the deltas
+    the workers publish are merged into `playbook` every `merge_every`
+    seconds; it holds every delta once this returns.
+    """
+    tasks = list(tasks)
+    workers = min(workers or os.cpu_count() or 1, len(tasks)) or 1
+    seed = playbook.to_list()
+    if delta_log is None:
+        fd, log_path = tempfile.mkstemp(prefix="ace-deltas-", suffix=".jsonl")
+        os.close(fd)
+    else:
+        log_path = delta_log
+        open(log_path, "w").close()
+    master = DeltaLog(log_path)
+
+    try:
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(workers, mp_context=context) as pool:
+            futures = [
+                pool.submit(
+                    _run_worker,
+                    index,
+                    tasks[index::workers],
+                    seed,
+                    team_factory,
+                    log_path,
+                    sync_every,
+                    concurrency,
+                )
+                for index in range(workers)
+            ]
+            running = set(futures)
+            while running:
+                _, running = wait(running, timeout=merge_every)
+                playbook.merge(delta for _, delta in master.read_new())
+            reports = [future.result() for future in futures]
+    finally:
+        if delta_log is None:
+            os.remove(log_path)
+    return reports
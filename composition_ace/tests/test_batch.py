@@ -0,0 +1,136 @@
+import asyncio
+import json
+import os
+
+from agents import CuratorAgent, GeneratorAgent, ReflectorAgent, TeamManager
+from batch import BatchClient, BatchRequestError, LocalBatchBackend, run_batched
+from fake_llm import FakeLLMClient
+from models import AgentNames, ReflectorResponse
+from playbook import Playbook
+
+
+class PoisonedClient(FakeLLMClient):
+    async def get_response(self, *, user_prompt, **options):
+        if "poison" in user_prompt:
+            raise ValueError("bad request line")
+        return await super().get_response(user_prompt=user_prompt, **options)
+
+
+class CountingBackend(LocalBatchBackend):
+    """Answers locally, failing any prompt that contains "poison"."""
+
+    def __init__(self):
+        super().__init__(PoisonedClient())
+        self.batches = []
+
+    async def run(self, input_path, output_path):
+        with open(input_path, encoding="utf-8") as f:
+            self.batches.append([json.loads(line) for line in f])
+        await super().run(input_path, output_path)
+
+
+def batch_client(tmp_path, **options):
+    backend = CountingBackend()
+    client = BatchClient(
+        backend, work_dir=str(tmp_path), flush_interval=0.01, **options
+    )
+    return client, backend
+
+
+def test_concurrent_calls_share_one_batch(tmp_path):
+    client, backend = batch_client(tmp_path)
+
+    async def main():
+        return await asyncio.gather(
+            client.get_response(user_prompt="expert analyst 1"),
+            client.get_response(
+                user_prompt="expert analyst 2",
+                response_model=ReflectorResponse,
+                temperature=0.5,
+                seed=7,
+            ),
+        )
+
+    plain, parsed = asyncio.run(main())
+    assert len(backend.batches) == 1
+    assert isinstance(plain, dict)
+    assert isinstance(parsed, ReflectorResponse)
+    body = backend.batches[0][1]["body"]
+    assert (body["temperature"], body["seed"]) == (0.5, 7)
+
+
+def test_failed_line_fails_only_its_caller(tmp_path):
+    client, _ = batch_client(tmp_path)
+
+    async def main():
+        return await asyncio.gather(
+            client.get_response(user_prompt="fine"),
+            client.get_response(user_prompt="poison"),
+            return_exceptions=True,
+        )
+
+    fine, failed = asyncio.run(main())
+    assert isinstance(fine, dict)
+    assert isinstance(failed, BatchRequestError)
+
+
+def test_batch_files_are_removed_unless_kept(tmp_path):
+    client, _ = batch_client(tmp_path / "removed")
+    asyncio.run(client.get_response(user_prompt="q"))
+    assert os.listdir(tmp_path / "removed") == []
+
+    client, _ = batch_client(tmp_path / "kept", keep_files=True)
+    asyncio.run(client.get_response(user_prompt="q"))
+    assert len(os.listdir(tmp_path / "kept")) == 2
+
+
+def test_backend_failure_fails_every_caller(tmp_path):
+    class Down(LocalBatchBackend):
+        async def run(self, input_path, output_path):
+            raise ConnectionError("batch API unavailable")
+
+    client = BatchClient(Down(None), work_dir=str(tmp_path), flush_interval=0.01)
+
+    async def main():
+        return await asyncio.gather(
+            client.get_response(user_prompt="a"),
+            client.get_response(user_prompt="b"),
+            return_exceptions=True,
+        )
+
+    assert [type(error) for error in asyncio.run(main())] == [ConnectionError] * 2
+    assert os.listdir(tmp_path) == []
+
+
+def test_run_batched_isolates_failed_tasks(tmp_path):
+    client, backend = batch_client(tmp_path)
+    team = TeamManager("Team")
+    team.add_child(GeneratorAgent(AgentNames.GENERATOR.value, client))
+    team.add_child(ReflectorAgent(AgentNames.REFLECTOR.value, client))
+    team.add_child(CuratorAgent(AgentNames.CURATOR.value, client))
+    tasks = [
+        {"query": query, "playbook": Playbook.from_list([])}
+        for query in ("first", "poison", "third")
+    ]
+
+    results = asyncio.run(run_batched(team, tasks))
+
+    assert [result.index for result in results] == [0, 1, 2]
+    assert isinstance(results[1].error, BatchRequestError)
+    for result in (results[0], results[2]):
+        assert result.error is None
+        assert len(result.context["Curator"]) == 1
+    # the reflections of all three tasks went out in one batch
+    assert len(backend.batches[0]) == 3
+
+
+def test_run_batched_can_cap_concurrency(tmp_path):
+    client, backend = batch_client(tmp_path)
+    team = TeamManager("Team")
+    team.add_child(GeneratorAgent(AgentNames.GENERATOR.value, client))
+    team.add_child(ReflectorAgent(AgentNames.REFLECTOR.value, client))
+    tasks = [{"query": str(i), "playbook": Playbook.from_list([])} for i in range(4)]
+
+    results = asyncio.run(run_batched(team, tasks, concurrency=2))
+    assert all(result.error is None for result in results)
+    assert max(len(batch) for batch in backend.batches) <= 2
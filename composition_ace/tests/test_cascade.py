@@ -0,0 +1,90 @@
+import asyncio
+
+import pytest
+
+from cascade import CascadeClient, agent_client, has_key_insight, no_duplicate_adds
+from fake_llm import FakeAsyncOpenAI, FakeLLMClient, FakeRateLimitError
+from llm_client import OpenAIClient
+from playbook import Playbook
+from schemas import CuratorResponse, ReflectorResponse
+
+REFLECT = "You are an expert analyst"
+CURATE = "You are a master curator"
+
+
+class NoInsightClient(FakeLLMClient):
+    async def _complete(self, user_prompt):
+        return {**await super()._complete(user_prompt), "key_insight": " "}
+
+
+class RateLimitedClient(FakeLLMClient):
+    async def _complete(self, user_prompt):
+        raise FakeRateLimitError("slow down")
+
+
+def ask(client, prompt, response_model):
+    return asyncio.run(
+        client.get_response(user_prompt=prompt, response_model=response_model)
+    )
+
+
+def test_valid_cheap_answers_are_kept():
+    cheap, strong = FakeLLMClient(), FakeLLMClient()
+    cascade = CascadeClient(cheap, strong, has_key_insight)
+
+    assert ask(cascade, REFLECT, ReflectorResponse).key_insight
+    assert (cheap.calls, strong.calls) == (1, 0)
+    assert (cascade.accepted, cascade.escalated) == (1, 0)
+
+
+def test_rejected_cheap_answers_escalate():
+    cheap, strong = NoInsightClient(), FakeLLMClient()
+    cascade = CascadeClient(cheap, strong, has_key_insight)
+
+    assert ask(cascade, REFLECT, ReflectorResponse).key_insight
+    assert (cheap.calls, strong.calls) == (1, 1)
+    assert (cascade.accepted, cascade.escalated) == (0, 1)
+
+
+def test_unparseable_cheap_answers_escalate():
+    fake = FakeAsyncOpenAI(malformed_rate=1.0)
+    cheap = OpenAIClient(openai_client=fake, repair_attempts=0)
+    cascade = CascadeClient(cheap, FakeLLMClient())
+
+    assert ask(cascade, REFLECT, ReflectorResponse).key_insight
+    assert fake.requests == 1
+    assert cascade.escalated == 1
+
+
+def test_other_errors_are_not_escalated():
+    strong = FakeLLMClient()
+    cascade = CascadeClient(RateLimitedClient(), strong)
+
+    with pytest.raises(FakeRateLimitError):
+        ask(cascade, REFLECT, ReflectorResponse)
+    assert strong.calls == 0
+
+
+def test_duplicate_adds_are_rejected():
+    response = ask(FakeLLMClient(), CURATE, CuratorResponse)
+    (operation,) = response.operations
+    validate = no_duplicate_adds(Playbook())
+    assert validate(response)
+
+    playbook = Playbook()
+    playbook.add(operation.section, f"  {operation.content.upper()} ")
+    assert not no_duplicate_adds(playbook)(response)
+
+
+def test_agent_client_is_configured_from_the_environment(monkeypatch):
+    monkeypatch.setenv("ACE_CURATOR_MODEL", "strong-model")
+    monkeypatch.delenv("ACE_CURATOR_CHEAP_MODEL", raising=False)
+    client = agent_client("Curator")
+    assert isinstance(client, OpenAIClient)
+    assert client.model == "strong-model"
+
+    monkeypatch.setenv("ACE_CURATOR_CHEAP_MODEL", "cheap-model")
+    client = agent_client("Curator", repair_attempts=3)
+    assert isinstance(client, CascadeClient)
+    assert (client.cheap.model, client.strong.model) == ("cheap-model", "strong-model")
+    assert client.cheap.repair_attempts == 3
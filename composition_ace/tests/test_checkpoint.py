@@ -0,0 +1,200 @@
+import asyncio
+import json
+from dataclasses import dataclass
+
+import pytest
+
+from agents import Agent, CuratorAgent, GeneratorAgent, ReflectorAgent, TeamManager
+from checkpoint import CheckpointStore, register_response_type
+from fake_llm import FakeLLMClient
+from models import AgentNames
+from playbook import Playbook
+
+
+class CrashingClient(FakeLLMClient):
+    """Fails every Curator call while `crash` is set."""
+
+    def __init__(self):
+        super().__init__()
+        self.crash = True
+        self.prompts = []
+
+    async def _complete(self, user_prompt):
+        if self.crash and "master curator" in user_prompt:
+            raise ConnectionError("lost connection")
+        self.prompts.append(user_prompt)
+        return await super()._complete(user_prompt)
+
+
+@register_response_type
+@dataclass
+class Price:
+    currency: str
+    amount: float
+
+
+@dataclass
+class Unregistered:
+    value: int
+
+
+class Emitter(Agent):
+    """Emits `outputs`, counting its calls."""
+
+    output_key = "emitted"
+
+    def __init__(self, name, outputs):
+        super().__init__(name)
+        self.outputs = outputs
+        self.calls = 0
+
+    async def _handle(self, task, item):
+        self.calls += 1
+        return list(self.outputs)
+
+
+class Doubler(Agent):
+    input_key = "emitted"
+    output_key = "doubled"
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.calls = 0
+
+    async def _handle(self, task, item):
+        self.calls += 1
+        return [item * 2]
+
+
+def run_emitter(store, outputs):
+    team = TeamManager("Team", checkpoint=store)
+    emitter = Emitter("Emitter", outputs)
+    team.add_child(emitter)
+    context = asyncio.run(team.run({"task_id": "task-1", "query": "q"}))
+    return emitter, context
+
+
+def run_twice(store, outputs):
+    """The Emitter and context of the second of two runs over one store."""
+    run_emitter(store, outputs)
+    return run_emitter(store, outputs)
+
+
+def team(client, store, streaming=False):
+    team = TeamManager("Team", streaming=streaming, checkpoint=store)
+    team.add_child(GeneratorAgent(AgentNames.GENERATOR.value, client))
+    team.add_child(GeneratorAgent(AgentNames.GENERATOR.value, client))
+    team.add_child(ReflectorAgent(AgentNames.REFLECTOR.value, client))
+    team.add_child(CuratorAgent(AgentNames.CURATOR.value, client))
+    return team
+
+
+def task():
+    return {"task_id": "task-1", "query": "q", "playbook": Playbook.from_list([])}
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_resume_replays_completed_calls(tmp_path, streaming):
+    store = CheckpointStore(str(tmp_path / "checkpoints.sqlite"))
+    client = CrashingClient()
+    with pytest.raises(ConnectionError):
+        asyncio.run(team(client, store, streaming).run(task()))
+    assert len(client.prompts) == 2  # both reflections completed
+
+    client.crash = False
+    context = asyncio.run(team(client, store, streaming).run(task()))
+
+    # only the two Curator calls ran again
+    assert len(client.prompts) == 4
+    assert all("master curator" in prompt for prompt in client.prompts[2:])
+    assert len(context["Reflector"]) == 2
+    assert len(context["Curator"]) == 2
+
+
+def test_checkpoints_survive_reopening_the_store(tmp_path):
+    path = str(tmp_path / "checkpoints.sqlite")
+    client = CrashingClient()
+    client.crash = False
+    store = CheckpointStore(path)
+    first = asyncio.run(team(client, store).run(task()))
+    store.close()
+
+    calls = len(client.prompts)
+    store = CheckpointStore(path)
+    second = asyncio.run(team(client, store).run(task()))
+
+    assert len(client.prompts) == calls
+    assert second == first
+    assert store.stats()["misses"] == 0
+
+
+def test_other_tasks_and_cleared_tasks_run_again(tmp_path):
+    store = CheckpointStore(str(tmp_path / "checkpoints.sqlite"))
+    client = CrashingClient()
+    client.crash = False
+    asyncio.run(team(client, store).run(task()))
+    calls = len(client.prompts)
+
+    asyncio.run(team(client, store).run({**task(), "task_id": "task-2"}))
+    assert len(client.prompts) == 2 * calls
+
+    store.clear("task-1")
+    asyncio.run(team(client, store).run(task()))
+    assert len(client.prompts) == 3 * calls
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_custom_agents_with_builtin_outputs_are_replayed(tmp_path, streaming):
+    store = CheckpointStore(str(tmp_path / "checkpoints.sqlite"))
+    for _ in range(2):
+        team = TeamManager("Team", streaming=streaming, checkpoint=store)
+        emitter, doubler = Emitter("Emitter", [0.5, 1.5]), Doubler("Doubler")
+        team.add_child(emitter)
+        team.add_child(doubler)
+        context = asyncio.run(team.run({"task_id": "task-1", "query": "q"}))
+
+    assert (emitter.calls, doubler.calls) == (0, 0)
+    assert context == {"emitted": [0.5, 1.5], "doubled": [1.0, 3.0]}
+
+
+def test_registered_types_are_replayed(tmp_path):
+    store = CheckpointStore(str(tmp_path / "checkpoints.sqlite"))
+    emitter, context = run_twice(store, [Price("USD", 1.5)])
+
+    assert emitter.calls == 0
+    assert context["emitted"] == [Price("USD", 1.5)]
+
+
+def test_outputs_of_unknown_types_are_not_checkpointed(tmp_path):
+    store = CheckpointStore(str(tmp_path / "checkpoints.sqlite"))
+    emitter, context = run_twice(store, [Unregistered(1)])
+
+    assert emitter.calls == 1
+    assert context["emitted"] == [Unregistered(1)]
+    assert store.stats()["skipped"] == 2
+    assert store.stats()["rows"] == 0
+
+
+def test_rows_that_no_longer_decode_are_misses(tmp_path):
+    store = CheckpointStore(str(tmp_path / "checkpoints.sqlite"))
+    run_twice(store, [1.5])
+    store._db.execute(
+        "UPDATE checkpoints SET outputs = ?",
+        (json.dumps([{"type": "Removed", "data": {}}]),),
+    )
+
+    emitter, context = run_emitter(store, [1.5])
+    assert emitter.calls == 1
+    assert context["emitted"] == [1.5]
+    assert store.stats()["misses"] == 2
+
+    # the row was rewritten and replays again
+    emitter, _ = run_emitter(store, [1.5])
+    assert emitter.calls == 0
+
+
+def test_names_of_known_types_cannot_be_registered_again():
+    with pytest.raises(ValueError, match="already exists"):
+        register_response_type(type("float", (), {}))
+    with pytest.raises(ValueError, match="already exists"):
+        register_response_type(type("CuratorResponse", (), {}))
@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+
+from client_pool import ClientPool
+
+
+class StubClient:
+    def __init__(self, name, latency=0.0, fail=False):
+        self.model = name
+        self.latency = latency
+        self.fail = fail
+        self.calls = 0
+        self.cancelled = 0
+
+    async def get_response(self, *, user_prompt, response_model=None, **options):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.latency)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.fail:
+            raise ConnectionError(f"{self.model} is down")
+        return f"{self.model}: {user_prompt}"
+
+
+def ask(pool, prompt="q"):
+    return asyncio.run(pool.get_response(user_prompt=prompt))
+
+
+def test_fails_over_to_the_next_endpoint():
+    down, up = StubClient("down", fail=True), StubClient("up")
+    pool = ClientPool([down, up])
+
+    assert ask(pool) == "up: q"
+    assert pool.failovers == 1
+    assert pool.endpoints[0].failures == 1
+
+
+def test_raises_the_last_error_when_every_endpoint_fails():
+    pool = ClientPool([StubClient("a", fail=True), StubClient("b", fail=True)])
+    with pytest.raises(ConnectionError, match="b is down"):
+        ask(pool)
+
+
+def test_unhealthy_endpoint_sits_out_the_cooldown():
+    down, up = StubClient("down", fail=True), StubClient("up")
+    pool = ClientPool([down, up], failure_threshold=2, cooldown=60.0)
+    ask(pool)  # "down" is tried first while it has no latency samples
+    ask(pool)
+
+    assert not pool.endpoints[0].summary()["healthy"]
+    calls = down.calls
+    ask(pool)
+    assert down.calls == calls
+    assert pool._ranked()[0].name == "up"
+
+
+def test_forwards_sampling_options():
+    seen = {}
+
+    class Recorder(StubClient):
+        async def get_response(self, **options):
+            seen.update(options)
+            return "ok"
+
+    pool = ClientPool([Recorder("r")])
+    asyncio.run(pool.get_response(user_prompt="q", temperature=0.7, seed=3))
+    assert seen["temperature"] == 0.7
+    assert seen["seed"] == 3
+
+
+def test_hedges_a_slow_primary_and_cancels_the_loser():
+    slow, fast = StubClient("slow", latency=0.01), StubClient("fast", latency=0.01)
+    pool = ClientPool([slow, fast], hedge_min_samples=3, hedge_quantile=0.5)
+    for _ in range(3):
+        asyncio.run(pool._call(pool.endpoints[0], {"user_prompt": "warm"}))
+    pool.endpoints[1].record_success(0.01, pool.ewma_alpha)
+    pool.endpoints[1].ewma = 1.0  # rank "slow" first
+    slow.latency = 1.0
+
+    assert ask(pool) == "fast: q"
+    assert pool.hedged == 1
+    assert pool.hedge_wins == 1
+    assert slow.cancelled == 1
@@ -0,0 +1,92 @@
+import asyncio
+import time
+
+import pytest
+
+from agents import EnsembleGeneratorAgent
+from fake_llm import FakeAsyncOpenAI
+from llm_client import OpenAIClient
+from playbook import Playbook
+from schemas import GeneratorResponse
+
+
+class SeededClient:
+    """Answers `answers[seed]` after `delays[seed]`; None answers fail."""
+
+    def __init__(self, answers, delays=None):
+        self.answers = answers
+        self.delays = delays or [0.0] * len(answers)
+        self.finished = []
+        self.temperatures = set()
+
+    async def get_response(self, *, user_prompt, response_model, temperature, seed):
+        self.temperatures.add(temperature)
+        await asyncio.sleep(self.delays[seed])
+        self.finished.append(seed)
+        if self.answers[seed] is None:
+            raise ValueError(f"sample {seed} failed")
+        return GeneratorResponse(
+            reasoning=f"sample {seed}",
+            bullet_ids=[],
+            final_answer=self.answers[seed],
+        )
+
+
+def generate(agent):
+    task = {"query": "q", "playbook": Playbook.from_list([])}
+    return asyncio.run(agent.handle(task, None))
+
+
+def answers(responses):
+    return [response.final_answer for response in responses]
+
+
+def test_quorum_cancels_the_outstanding_samples():
+    client = SeededClient(["4", "4 ", " 4", "5", "6"], [0, 0.01, 0.02, 5, 5])
+    agent = EnsembleGeneratorAgent("Generator", client, samples=5)
+
+    started = time.monotonic()
+    responses = generate(agent)
+
+    assert time.monotonic() - started < 1
+    assert answers(responses) == ["4"]
+    assert sorted(client.finished) == [0, 1, 2]
+    assert (agent.requested, agent.cancelled) == (5, 2)
+    assert client.temperatures == {0.7}
+
+
+def test_without_quorum_each_distinct_answer_is_emitted_most_voted_first():
+    client = SeededClient(["6", "5", "4", "5", "4", "5"])
+    agent = EnsembleGeneratorAgent("Generator", client, samples=6, quorum=4)
+
+    responses = generate(agent)
+
+    assert answers(responses) == ["5", "4", "6"]
+    assert agent.cancelled == 0
+
+
+def test_failed_samples_do_not_count():
+    client = SeededClient([None, "4", None])
+    agent = EnsembleGeneratorAgent("Generator", client, samples=3)
+
+    assert answers(generate(agent)) == ["4"]
+
+
+def test_all_samples_failing_raises():
+    client = SeededClient([None, None, None])
+    agent = EnsembleGeneratorAgent("Generator", client, samples=3)
+
+    with pytest.raises(ValueError, match="failed"):
+        generate(agent)
+
+
+def test_samples_are_drawn_through_the_client():
+    fake = FakeAsyncOpenAI(seed=1, answers=["4", "5"])
+    agent = EnsembleGeneratorAgent(
+        "Generator", OpenAIClient(openai_client=fake), samples=9, quorum=9
+    )
+
+    responses = generate(agent)
+
+    assert fake.requests == 9
+    assert sorted(answers(responses)) == ["4", "5"]
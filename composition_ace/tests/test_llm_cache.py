@@ -0,0 +1,108 @@
+import asyncio
+import sqlite3
+
+from fake_llm import FakeAsyncOpenAI
+from llm_cache import ResponseCache
+from llm_client import OpenAIClient
+
+
+def accessed_at(path, key):
+    with sqlite3.connect(path) as db:
+        row = db.execute(
+            "SELECT accessed_at FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+    return row[0] if row else None
+
+
+def stored_keys(path):
+    with sqlite3.connect(path) as db:
+        return {key for (key,) in db.execute("SELECT key FROM responses")}
+
+
+def test_round_trip_survives_reopening(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = ResponseCache(path)
+    cache.set("k", {"answer": 42})
+    cache.close()
+
+    cache = ResponseCache(path)
+    assert cache.get("k") == {"answer": 42}
+    assert cache.get("missing") is None
+    assert cache.stats() == {"hits": 1, "misses": 1, "hit_rate": 0.5}
+
+
+def test_key_includes_sampling_parameters():
+    base = ResponseCache.key("m", "prompt", {"type": "json_object"})
+    assert base == ResponseCache.key("m", "prompt", {"type": "json_object"})
+    assert base != ResponseCache.key("m", "prompt", {"type": "json_object"}, seed=1)
+    assert base != ResponseCache.key("other", "prompt", {"type": "json_object"})
+
+
+def test_expired_entries_are_misses_and_deleted(tmp_path, monkeypatch):
+    path = str(tmp_path / "cache.sqlite")
+    now = [1000.0]
+    monkeypatch.setattr("llm_cache.time.time", lambda: now[0])
+    cache = ResponseCache(path, ttl=60)
+    cache.set("k", 1)
+
+    now[0] += 30
+    assert cache.get("k") == 1
+    now[0] += 31
+    assert cache.get("k") is None
+    assert "k" not in stored_keys(path)
+
+
+def test_hits_are_written_back_in_batches(tmp_path, monkeypatch):
+    path = str(tmp_path / "cache.sqlite")
+    now = [1000.0]
+    monkeypatch.setattr("llm_cache.time.time", lambda: now[0])
+    cache = ResponseCache(path, flush_every=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    now[0] = 2000.0
+    cache.get("a")  # a memory hit
+    assert accessed_at(path, "a") == 1000.0
+    cache.get("b")
+    assert accessed_at(path, "a") == accessed_at(path, "b") == 2000.0
+
+    now[0] = 3000.0
+    cache.get("a")
+    cache.close()
+    assert accessed_at(path, "a") == 3000.0
+
+
+def test_evicts_least_recently_used_only_over_the_limit(tmp_path, monkeypatch):
+    path = str(tmp_path / "cache.sqlite")
+    now = [0.0]
+    monkeypatch.setattr("llm_cache.time.time", lambda: now[0])
+    cache = ResponseCache(path, memory_entries=2, max_entries=4, evict_every=2)
+    for i in range(4):
+        now[0] += 1
+        cache.set(f"k{i}", i)
+    now[0] += 1
+    cache.get("k0")  # k0 becomes the most recently used
+
+    now[0] += 1
+    cache.set("k4", 4)
+    assert len(stored_keys(path)) == 5  # not checked until evict_every inserts
+    now[0] += 1
+    cache.set("k5", 5)
+
+    assert stored_keys(path) == {"k0", "k3", "k4", "k5"}
+    assert cache.get("k1") is None
+
+
+def test_client_serves_repeated_prompts_from_the_cache(tmp_path):
+    fake = FakeAsyncOpenAI()
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"))
+    client = OpenAIClient(model="fake", openai_client=fake, cache=cache)
+
+    async def ask(**sampling):
+        return await client.get_response(user_prompt="q", **sampling)
+
+    first = asyncio.run(ask())
+    assert asyncio.run(ask()) == first
+    assert fake.requests == 1
+    asyncio.run(ask(temperature=0.7, seed=1))
+    assert fake.requests == 2
@@ -0,0 +1,131 @@
+import asyncio
+import json
+
+import pytest
+
+from fake_llm import FakeAsyncOpenAI
+from llm_client import _HTTP_CLIENTS, OpenAIClient, shared_http_client
+from metrics import MetricsRecorder
+from schemas import GeneratorResponse
+
+ANSWER = {"reasoning": "r", "bullet_ids": [], "final_answer": "42"}
+
+
+class ScriptedOpenAI(FakeAsyncOpenAI):
+    """Replies with `replies` in order and keeps the messages of each request."""
+
+    def __init__(self, replies):
+        super().__init__()
+        self.replies = list(replies)
+        self.sent = []
+
+    async def _create(self, *, model, messages, **kwargs):
+        self.sent.append(messages)
+        reply = await super()._create(model=model, messages=messages, **kwargs)
+        reply.choices[0].message.content = self.replies.pop(0)
+        return reply
+
+
+class ListSink:
+    def __init__(self):
+        self.calls = []
+
+    def record(self, metrics):
+        self.calls.append(metrics)
+
+
+def in_new_loop(fn):
+    async def main():
+        return fn()
+
+    return asyncio.run(main())
+
+
+def ask(client):
+    return asyncio.run(
+        client.get_response(user_prompt="q", response_model=GeneratorResponse)
+    )
+
+
+def test_malformed_reply_is_repaired_with_the_error_sent_back():
+    fake = ScriptedOpenAI(['{"reasoning": "r", "bullet', json.dumps(ANSWER)])
+    sink = ListSink()
+    client = OpenAIClient(openai_client=fake, metrics=MetricsRecorder([sink]))
+
+    assert ask(client).final_answer == "42"
+    repair = fake.sent[1]
+    assert [message["role"] for message in repair] == ["user", "assistant", "user"]
+    assert repair[1]["content"] == '{"reasoning": "r", "bullet'
+    assert "could not be parsed" in repair[2]["content"]
+    assert sink.calls[0].repairs == 1
+
+
+def test_schema_errors_are_repaired_too():
+    invalid = json.dumps({"reasoning": "r", "final_answer": "42"})
+    fake = ScriptedOpenAI([invalid, json.dumps(ANSWER)])
+    client = OpenAIClient(openai_client=fake)
+
+    assert ask(client).final_answer == "42"
+    assert "bullet_ids" in fake.sent[1][2]["content"]
+
+
+def test_repairs_give_up_after_repair_attempts():
+    fake = FakeAsyncOpenAI(malformed_rate=1.0)
+    sink = ListSink()
+    client = OpenAIClient(
+        openai_client=fake, metrics=MetricsRecorder([sink]), repair_attempts=2
+    )
+
+    with pytest.raises(ValueError):
+        ask(client)
+    assert fake.requests == 3
+    assert sink.calls[0].repairs == 2
+    assert sink.calls[0].error == "ValidationError"
+
+
+def test_http_pools_are_shared_within_a_loop_and_sized():
+    async def main():
+        return shared_http_client(), shared_http_client(), shared_http_client(8)
+
+    default, again, sized = asyncio.run(main())
+
+    assert default is again
+    assert sized is not default
+
+
+def test_each_loop_gets_its_own_http_pool():
+    first = in_new_loop(shared_http_client)
+    second = in_new_loop(shared_http_client)
+
+    assert first is not second
+
+    def pools():
+        shared_http_client()
+        return len(_HTTP_CLIENTS)
+
+    # the pools of closed loops are dropped
+    assert in_new_loop(pools) == 1
+
+
+def test_sdk_clients_are_cached_per_loop(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    client = OpenAIClient(max_connections=4, scheduler=object())
+
+    async def twice():
+        return client.client, client.client, shared_http_client(4)
+
+    first, again, pool = asyncio.run(twice())
+    second = in_new_loop(lambda: client.client)
+
+    assert first is again
+    assert first is not second
+    assert first._client is pool
+    assert first.max_retries == 0
+
+
+def test_an_injected_client_is_used_in_every_loop():
+    fake = FakeAsyncOpenAI()
+    client = OpenAIClient(openai_client=fake)
+
+    assert in_new_loop(lambda: client.client) is fake
+    assert in_new_loop(lambda: client.client) is fake
@@ -0,0 +1,122 @@
+import asyncio
+import json
+
+import pytest
+
+from agents import CuratorAgent, GeneratorAgent, ReflectorAgent, TeamManager
+from fake_llm import FakeAsyncOpenAI, FakeRateLimitError
+from llm_client import OpenAIClient
+from metrics import (
+    CallMetrics,
+    Histogram,
+    InMemoryHistogramSink,
+    JsonLinesSink,
+    MetricsRecorder,
+    SpanExporterSink,
+)
+from models import AgentNames
+from playbook import Playbook
+from scheduler import LLMScheduler
+
+
+class RateLimitedOnce(FakeAsyncOpenAI):
+    async def _create(self, **kwargs):
+        if not self.rate_limited:
+            self.rate_limited += 1
+            raise FakeRateLimitError("slow down")
+        return await super()._create(**kwargs)
+
+
+def call(agent="Reflector", run_id="run-1", **fields):
+    return CallMetrics(agent=agent, run_id=run_id, model="fake", **fields)
+
+
+def test_histogram_reports_bucket_upper_bounds():
+    histogram = Histogram(start=1.0, factor=2.0, buckets=4)  # 1, 2, 4, 8
+    for value in (0.5, 1.5, 3.0, 3.5, 100.0):
+        histogram.observe(value)
+
+    assert histogram.quantile(0.2) == 1.0
+    assert histogram.quantile(0.5) == 4.0
+    assert histogram.quantile(1.0) == 100.0  # past the last bucket: the max
+    assert histogram.summary()["mean"] == pytest.approx(108.5 / 5)
+    assert Histogram().quantile(0.5) == 0.0
+
+
+def test_in_memory_sink_aggregates_per_agent_and_run():
+    sink = InMemoryHistogramSink()
+    sink.record(call(prompt_tokens=10, completion_tokens=2, retries=1))
+    sink.record(call(run_id="run-2", prompt_tokens=5, cache_hit=True))
+    sink.record(call(agent="Curator", error="ValueError"))
+
+    summary = sink.summary()
+    reflector = summary["agents"]["Reflector"]
+    assert reflector["calls"] == 2
+    assert reflector["prompt_tokens"] == 15
+    assert reflector["retries"] == 1
+    assert reflector["cache_hits"] == 1
+    assert summary["agents"]["Curator"]["errors"] == 1
+    assert summary["runs"]["run-1"]["calls"] == 2
+
+
+def test_json_lines_sink_appends_one_object_per_call(tmp_path):
+    path = tmp_path / "calls.jsonl"
+    sink = JsonLinesSink(str(path))
+    sink.record(call(prompt_tokens=3))
+    sink.record(call(agent="Curator"))
+
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [line["agent"] for line in lines] == ["Reflector", "Curator"]
+    assert lines[0]["prompt_tokens"] == 3
+
+
+def test_span_sink_exports_in_batches_with_one_trace_per_run():
+    batches = []
+    sink = SpanExporterSink(batches.append, batch_size=2)
+    sink.record(call(latency=0.5))
+    assert batches == []
+    sink.record(call(error="TimeoutError"))
+    sink.record(call(run_id="run-2"))
+    sink.flush()
+
+    assert [len(batch) for batch in batches] == [2, 1]
+    first, second = batches[0]
+    assert first["trace_id"] == second["trace_id"] != batches[1][0]["trace_id"]
+    assert first["end_time_unix_nano"] - first["start_time_unix_nano"] == 5 * 10**8
+    assert second["status"] == {"code": "ERROR", "message": "TimeoutError"}
+    assert first["attributes"]["gen_ai.request.model"] == "fake"
+
+
+def test_recorder_attributes_calls_to_agents_and_runs():
+    sink = InMemoryHistogramSink()
+    fake = RateLimitedOnce()
+    client = OpenAIClient(
+        model="fake",
+        openai_client=fake,
+        scheduler=LLMScheduler(base_backoff=0.001),
+        metrics=MetricsRecorder([sink]),
+    )
+    team = TeamManager("Team")
+    team.add_child(GeneratorAgent(AgentNames.GENERATOR.value, client))
+    team.add_child(ReflectorAgent(AgentNames.REFLECTOR.value, client))
+    team.add_child(CuratorAgent(AgentNames.CURATOR.value, client))
+
+    task = {"query": "q", "playbook": Playbook.from_list([]), "run_id": "nightly"}
+    asyncio.run(team.run(task))
+
+    summary = sink.summary()
+    assert set(summary["agents"]) == {"Reflector", "Curator"}
+    assert summary["runs"]["nightly"]["calls"] == 2
+    assert summary["runs"]["nightly"]["retries"] == 1
+    reflector = summary["agents"]["Reflector"]
+    assert reflector["prompt_tokens"] > 0
+    assert reflector["completion_tokens"] > 0
+
+
+def test_recorder_marks_failed_calls():
+    sink = InMemoryHistogramSink()
+    recorder = MetricsRecorder([sink])
+    with pytest.raises(ValueError):
+        with recorder.call("fake"):
+            raise ValueError("bad reply")
+    assert sink.summary()["agents"]["unknown"]["errors"] == 1
@@ -0,0 +1,120 @@
+import json
+
+import pytest
+
+from models import CuratorResponse
+from playbook import Bullet, Playbook, PlaybookDelta, bullet_json, playbook_json
+
+SEED = [
+    {"id": "001 basics", "content": "Read the question twice"},
+    {"id": "007 math", "content": "Check the units", "helpful": 2},
+]
+
+
+def test_from_list_indexes_bullets_by_id_and_section():
+    playbook = Playbook.from_list(SEED)
+
+    assert len(playbook) == 2
+    assert "007 math" in playbook
+    assert playbook.get("007 math").helpful == 2
+    assert playbook.sections() == ["basics", "math"]
+    assert [bullet.id for bullet in playbook.section("math")] == ["007 math"]
+
+
+def test_fresh_ids_continue_after_the_highest_number():
+    playbook = Playbook.from_list(SEED)
+    assert playbook.add("math", "Divide by the count").id == "008 math"
+    assert playbook.add("basics", "Restate the goal").id == "009 basics"
+
+
+def test_fresh_ids_skip_taken_ids_and_other_prefixes():
+    playbook = Playbook(
+        [Bullet("a-002 x", "x", "taken"), Bullet("b-050 x", "x", "other shard")],
+        id_prefix="a-",
+    )
+    assert playbook.add("x", "new").id == "a-003 x"
+
+
+def test_duplicate_ids_are_rejected():
+    playbook = Playbook.from_list(SEED)
+    with pytest.raises(ValueError, match="Duplicate bullet id"):
+        playbook.add("basics", "again", bullet_id="001 basics")
+
+
+def test_changes_are_emitted_as_deltas():
+    playbook = Playbook.from_list(SEED)
+    deltas = []
+    playbook.subscribe(deltas.append)
+
+    added = playbook.add("math", "Divide by the count")
+    playbook.tag("001 basics", helpful=1)
+    playbook.tag("001 basics")  # no-op, not emitted
+    playbook.remove("007 math")
+
+    assert deltas == [
+        PlaybookDelta("ADD", added.id, section="math", content="Divide by the count"),
+        PlaybookDelta("TAG", "001 basics", helpful=1),
+        PlaybookDelta("REMOVE", "007 math"),
+    ]
+    assert playbook.sections() == ["basics", "math"]
+    playbook.remove(added.id)
+    assert playbook.sections() == ["basics"]
+
+
+def test_merge_replays_deltas_from_other_playbooks():
+    left, right = Playbook.from_list(SEED), Playbook.from_list(SEED)
+    deltas = []
+    right.subscribe(deltas.append)
+    right.add("math", "Guard against empty input")
+    right.tag("007 math", harmful=1)
+    right.remove("001 basics")
+
+    left.merge(deltas)
+    assert left.to_list() == right.to_list()
+
+    left.apply_delta(deltas[0])  # an ADD already present is skipped
+    assert len(left) == len(right)
+
+
+def test_json_is_cached_and_refreshed_per_bullet():
+    playbook = Playbook.from_list(SEED)
+    rendered = playbook.to_json()
+    assert playbook.to_json() is rendered
+    assert json.loads(rendered) == playbook.to_list()
+
+    playbook.tag("007 math", harmful=1)
+    assert json.loads(playbook.to_json())[1]["harmful"] == 1
+    only = "[" + bullet_json(playbook.get("007 math")) + "]"
+    assert playbook.to_json(["007 math"]) == only
+    assert playbook_json(SEED) == json.dumps(SEED)
+
+
+def test_json_lines_round_trip():
+    playbook = Playbook.from_list(SEED)
+    loaded = Playbook.from_json_lines(line.encode() for line in playbook.json_lines())
+    assert loaded.to_list() == playbook.to_list()
+    assert loaded.add("math", "next").id == "008 math"
+
+
+def test_update_from_context_applies_tags_and_operations():
+    playbook = Playbook.from_list(SEED)
+    curation = CuratorResponse(
+        reasoning="",
+        operations=[
+            {"type": "ADD", "section": "math", "content": "Divide by the count"}
+        ],
+    )
+
+    class Reflection:
+        bullet_tags = [
+            {"bullet_id": "001 basics", "tag": "Helpful"},
+            {"bullet_id": "007 math", "tag": "harmful"},
+            {"bullet_id": "404 missing", "tag": "helpful"},
+        ]
+
+    added = playbook.update_from_context(
+        {"Reflector": [Reflection()], "Curator": [curation]}
+    )
+    assert [bullet.content for bullet in added] == ["Divide by the count"]
+    assert playbook.get("001 basics").helpful == 1
+    assert playbook.get("007 math").harmful == 1
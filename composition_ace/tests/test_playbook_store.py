@@ -0,0 +1,96 @@
+import os
+
+from playbook import Playbook
+from playbook_store import PlaybookStore
+
+SEED = [
+    {"id": "001 basics", "content": "Read the question twice"},
+    {"id": "002 basics", "content": "Check the units"},
+]
+
+
+def snapshot(playbook):
+    return [
+        (bullet.id, bullet.section, bullet.content, bullet.helpful, bullet.harmful)
+        for bullet in playbook
+    ]
+
+
+def edit(playbook):
+    playbook.add("math", "Divide by the count of summed values")
+    playbook.tag("001 basics", helpful=2, harmful=1)
+    playbook.remove("002 basics")
+    playbook.add("math", "Guard against empty input")
+
+
+def test_first_load_seeds_and_snapshots(tmp_path):
+    store = PlaybookStore(str(tmp_path))
+    playbook = store.load(seed=SEED)
+    store.close()
+
+    assert [bullet.id for bullet in playbook] == ["001 basics", "002 basics"]
+    assert sorted(os.listdir(tmp_path)) == [
+        "log-00000001.jsonl",
+        "snapshot-00000001.jsonl",
+    ]
+
+
+def test_reload_replays_the_log(tmp_path):
+    store = PlaybookStore(str(tmp_path))
+    playbook = store.load(seed=SEED)
+    edit(playbook)
+    expected = snapshot(playbook)
+    store.close()
+
+    store = PlaybookStore(str(tmp_path))
+    reloaded = store.load(seed=[])
+    assert snapshot(reloaded) == expected
+    assert store.log_size == 4
+    # ids keep counting from the replayed bullets
+    assert reloaded.add("math", "New").id not in {row[0] for row in expected}
+
+
+def test_compaction_starts_a_new_generation(tmp_path):
+    store = PlaybookStore(str(tmp_path), compact_every=3)
+    playbook = store.load(seed=SEED)
+    edit(playbook)
+    expected = snapshot(playbook)
+    store.close()
+
+    assert store.generation == 2
+    assert sorted(os.listdir(tmp_path)) == [
+        "log-00000002.jsonl",
+        "snapshot-00000002.jsonl",
+    ]
+    store = PlaybookStore(str(tmp_path), compact_every=3)
+    assert snapshot(store.load()) == expected
+    assert store.log_size == 1
+
+
+def test_torn_log_line_is_dropped(tmp_path):
+    store = PlaybookStore(str(tmp_path))
+    playbook = store.load(seed=SEED)
+    playbook.tag("001 basics", helpful=1)
+    store.close()
+    with open(tmp_path / "log-00000001.jsonl", "a", encoding="utf-8") as log:
+        log.write('{"op": "ADD", "bullet_id": "003 ma')
+
+    store = PlaybookStore(str(tmp_path))
+    playbook = store.load()
+    assert [bullet.id for bullet in playbook] == ["001 basics", "002 basics"]
+    playbook.tag("002 basics", harmful=1)
+    store.close()
+
+    reloaded = PlaybookStore(str(tmp_path)).load()
+    assert snapshot(reloaded) == snapshot(playbook)
+
+
+def test_attach_records_a_playbook_built_elsewhere(tmp_path):
+    playbook = Playbook.from_list(SEED)
+    store = PlaybookStore(str(tmp_path))
+    store.attach(playbook)
+    store.compact()
+    edit(playbook)
+    store.close()
+
+    assert snapshot(PlaybookStore(str(tmp_path)).load()) == snapshot(playbook)
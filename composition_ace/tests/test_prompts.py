@@ -0,0 +1,71 @@
+import pytest
+
+from prompts import (
+    CACHED_PREFIX_INCREMENT,
+    MIN_CACHED_PREFIX_TOKENS,
+    PROMPTS,
+    Prompts,
+    PromptTemplate,
+    compile_template,
+)
+
+INSTRUCTIONS = "x" * (4 * MIN_CACHED_PREFIX_TOKENS)  # exactly the minimum
+PLAYBOOK = "p" * (4 * CACHED_PREFIX_INCREMENT + 8)
+
+
+def template():
+    return PromptTemplate(INSTRUCTIONS + "{playbook}|{question}|")
+
+
+def test_render_matches_str_format():
+    text = "Playbook: {playbook}\nQuestion: {question} {{literal}}"
+    rendered = PromptTemplate(text).render(playbook="[]", question="why?")
+    assert rendered == text.format(playbook="[]", question="why?")
+
+
+def test_shared_prefix_is_counted_up_to_the_first_changed_field():
+    prompt = template()
+
+    prompt.render(playbook=PLAYBOOK, question="first")
+    assert prompt.last_cached_prefix_tokens == MIN_CACHED_PREFIX_TOKENS
+
+    prompt.render(playbook=PLAYBOOK, question="second")
+    # instructions and playbook, rounded down to whole increments
+    expected = MIN_CACHED_PREFIX_TOKENS + CACHED_PREFIX_INCREMENT
+    assert prompt.last_cached_prefix_tokens == expected
+
+    prompt.render(playbook=PLAYBOOK + "changed", question="second")
+    assert prompt.last_cached_prefix_tokens == MIN_CACHED_PREFIX_TOKENS
+
+    stats = prompt.stats()
+    assert stats["calls"] == 3
+    assert stats["cached_prefix_tokens"] == 3 * MIN_CACHED_PREFIX_TOKENS + (
+        CACHED_PREFIX_INCREMENT
+    )
+    assert stats["prompt_tokens"] > stats["cached_prefix_tokens"]
+
+
+def test_prefixes_below_the_minimum_are_not_cached():
+    prompt = PromptTemplate("short {playbook} {question}")
+    prompt.render(playbook=PLAYBOOK, question="a")
+    prompt.render(playbook=PLAYBOOK, question="a")
+    assert prompt.stats()["cached_prefix_tokens"] == 0
+
+
+def test_templates_are_compiled_once():
+    text = "compiled once {playbook}"
+    assert compile_template(text) is compile_template(text)
+    assert Prompts()._curator is PROMPTS._curator
+
+
+@pytest.mark.parametrize(
+    "prompt, playbook_field",
+    [
+        (PROMPTS._generator, "playbook"),
+        (PROMPTS._reflector, "playbook"),
+        (PROMPTS._curator, "current_playbook"),
+    ],
+)
+def test_templates_put_the_playbook_before_per_query_fields(prompt, playbook_field):
+    fields = [name for _, name in prompt._segments if name is not None]
+    assert fields[0] == playbook_field
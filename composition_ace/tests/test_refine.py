@@ -0,0 +1,108 @@
+import numpy as np
+
+from playbook import Playbook
+from refine import HashingEmbedder, PlaybookRefiner
+
+
+def playbook(*contents):
+    return Playbook.from_list(
+        {"id": f"{i:03d} s", "content": content}
+        for i, content in enumerate(contents, 1)
+    )
+
+
+def test_hashing_embedder_rows_are_normalised():
+    vectors = HashingEmbedder(dim=64).embed(["divide by the count", ""])
+    assert vectors.shape == (2, 64)
+    assert np.isclose(np.linalg.norm(vectors[0]), 1.0)
+    assert not vectors[1].any()
+
+
+def test_prunes_bullets_tagged_harmful_more_than_helpful():
+    book = playbook("keep me", "drop me")
+    book.tag("002 s", helpful=1, harmful=2)
+
+    report = PlaybookRefiner().refine(book)
+
+    assert report.pruned == ["002 s"]
+    assert [bullet.id for bullet in book] == ["001 s"]
+
+
+def test_merges_duplicates_into_the_older_bullet():
+    book = playbook(
+        "Divide the total by the count of numeric values",
+        "Check the weather forecast",
+        "divide the total by the count of numeric values",
+    )
+    book.tag("003 s", helpful=2)
+
+    report = PlaybookRefiner().refine(book)
+
+    assert report.merged == [("001 s", "003 s")]
+    assert [bullet.id for bullet in book] == ["001 s", "002 s"]
+    assert book.get("001 s").helpful == 2
+
+
+def test_bullet_ids_limit_the_search():
+    book = playbook("same words here", "same words here", "other text")
+    refiner = PlaybookRefiner()
+    assert refiner.refine(book, ["003 s"]).merged == []
+    assert refiner.refine(book, ["002 s"]).merged == [("001 s", "002 s")]
+
+
+def test_lsh_finds_the_same_duplicates():
+    contents = [f"bullet {i} about topic {i * 7}" for i in range(40)]
+    contents += ["bullet 3 about topic 21", "bullet 17 about topic 119"]
+    exact = playbook(*contents)
+    approximate = playbook(*contents)
+
+    expected = PlaybookRefiner().refine(exact).merged
+    found = PlaybookRefiner(ann_min_size=10, lsh_tables=16).refine(approximate).merged
+
+    assert expected == [("004 s", "041 s"), ("018 s", "042 s")]
+    assert found == expected
+
+
+class CountingEmbedder(HashingEmbedder):
+    def __init__(self):
+        super().__init__()
+        self.embedded = []
+
+    def embed(self, texts):
+        self.embedded.extend(texts)
+        return super().embed(texts)
+
+
+def test_each_bullet_is_embedded_once():
+    embedder = CountingEmbedder()
+    refiner = PlaybookRefiner(embedder=embedder)
+    book = playbook("first bullet", "second bullet")
+    refiner.refine(book)
+
+    added = book.add("s", "third bullet")
+    refiner.refine(book, [added.id])
+    assert embedder.embedded == ["first bullet", "second bullet", "third bullet"]
+
+
+def test_matrix_grows_and_compacts_with_the_playbook():
+    refiner = PlaybookRefiner()
+    book = playbook(*[f"unique bullet number {i}" for i in range(10)])
+    refiner.refine(book)
+    for i in range(100):
+        refiner.refine(book, [book.add("s", f"later bullet {i} x{i}").id])
+    assert len(refiner._rows) == 110
+    assert refiner._size == 110
+
+    for bullet in list(book)[:80]:
+        book.remove(bullet.id)  # removed outside the refiner
+    book.add("s", "later bullet 99 x99")  # duplicate of a surviving bullet
+    report = refiner.refine(book)
+
+    assert report.merged == [("110 s", "111 s")]
+    # stale rows made up over half the matrix, so it was compacted to the 31
+    # bullets present before the merge
+    assert refiner._size == 31
+    assert len(refiner._rows) == 30
+    rows = [refiner._rows[bullet.id] for bullet in book]
+    expected = refiner.embedder.embed([bullet.content for bullet in book])
+    assert np.allclose(refiner._matrix[rows], expected)
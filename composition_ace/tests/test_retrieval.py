@@ -0,0 +1,77 @@
+import json
+
+from playbook import Playbook
+from retrieval import BM25Index, PlaybookRetriever
+
+SEED = [
+    {"id": "001 math", "content": "Divide the total by the count of numeric values"},
+    {"id": "002 weather", "content": "Check the forecast for the next seven days"},
+    {"id": "003 strings", "content": "Parse numeric strings with float; skip errors"},
+    {"id": "004 math", "content": "Guard against an empty list before dividing"},
+]
+
+
+def test_bm25_ranks_by_term_rarity_and_frequency():
+    index = BM25Index()
+    index.add("a", "average average numbers")
+    index.add("b", "average weather")
+    index.add("c", "weather forecast")
+
+    ranked = [doc_id for doc_id, _ in index.search("average", k=3)]
+    assert ranked == ["a", "b"]
+    assert index.search("unknown", k=3) == []
+
+
+def test_bm25_add_replaces_and_remove_forgets():
+    index = BM25Index()
+    index.add("a", "old words")
+    index.add("a", "new words")
+    assert index.search("old", k=1) == []
+    index.remove("a")
+    index.remove("a")  # removing twice is a no-op
+    assert len(index) == 0
+    assert index.search("new", k=1) == []
+    assert index._postings == {} and index._total_length == 0
+
+
+def test_selects_the_top_k_matches():
+    retriever = PlaybookRetriever(Playbook.from_list(SEED), top_k=2)
+    selected = [bullet.id for bullet in retriever.select("average of numeric values")]
+    assert len(selected) == 2
+    assert selected[0] == "001 math"
+    assert "002 weather" not in selected
+
+
+def test_required_bullets_come_first():
+    retriever = PlaybookRetriever(Playbook.from_list(SEED), top_k=1)
+    selected = retriever.select("numeric values", required_ids=["002 weather", "404"])
+    assert [bullet.id for bullet in selected] == ["002 weather", "001 math"]
+
+
+def test_token_budget_cuts_the_slice_but_keeps_one_bullet():
+    retriever = PlaybookRetriever(Playbook.from_list(SEED), token_budget=1)
+    assert len(retriever.select("numeric")) == 1
+
+    retriever.token_budget = 30
+    assert len(retriever.select("numeric dividing list")) == 2
+
+
+def test_index_follows_the_playbook_deltas():
+    playbook = Playbook.from_list(SEED)
+    retriever = PlaybookRetriever(playbook)
+
+    added = playbook.add("json", "Reply with a single JSON object")
+    assert [bullet.id for bullet in retriever.select("json object")] == [added.id]
+    playbook.remove(added.id)
+    assert retriever.select("json object") == []
+
+    retriever.close()
+    playbook.add("json", "Reply with a single JSON object")
+    assert retriever.select("json object") == []
+
+
+def test_render_is_the_playbook_json_of_the_slice():
+    playbook = Playbook.from_list(SEED)
+    retriever = PlaybookRetriever(playbook, top_k=1)
+    rendered = json.loads(retriever.render("forecast"))
+    assert rendered == [playbook.to_list()[1]]
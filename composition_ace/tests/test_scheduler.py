@@ -0,0 +1,179 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from fake_llm import FakeRateLimitError, FakeServerError
+from scheduler import LLMScheduler
+
+
+def flaky(failures, error=FakeRateLimitError):
+    """A call that raises `error` `failures` times, then returns "ok"."""
+    attempts = []
+
+    async def call():
+        attempts.append(time.monotonic())
+        if len(attempts) <= failures:
+            raise error("boom")
+        return "ok"
+
+    return call, attempts
+
+
+def test_retries_rate_limits_with_exponential_backoff():
+    scheduler = LLMScheduler(base_backoff=0.02, max_backoff=1.0)
+    call, attempts = flaky(2)
+
+    assert asyncio.run(scheduler.submit(call)) == "ok"
+    assert scheduler.rate_limited == 2
+    assert scheduler.completed == 1
+    gaps = [later - earlier for earlier, later in zip(attempts, attempts[1:])]
+    # backoff doubles (jitter is at most +50%)
+    assert gaps[0] >= 0.02
+    assert gaps[1] >= 0.04
+
+
+def test_backoff_decays_after_success():
+    scheduler = LLMScheduler(base_backoff=0.01)
+    call, _ = flaky(3)
+    asyncio.run(scheduler.submit(call))
+    # 0.01 -> 0.02 -> 0.04 while rate limited, halved by the success
+    assert scheduler._backoff == pytest.approx(0.02)
+
+    call, _ = flaky(0)
+    asyncio.run(scheduler.submit(call))
+    asyncio.run(scheduler.submit(call))
+    assert scheduler._backoff == 0.0
+
+
+def test_retry_after_header_sets_the_pause():
+    class RetryAfterError(FakeRateLimitError):
+        response = SimpleNamespace(headers={"retry-after": "0.1"})
+
+    scheduler = LLMScheduler(base_backoff=0.001)
+    call, attempts = flaky(1, RetryAfterError)
+    asyncio.run(scheduler.submit(call))
+    assert attempts[1] - attempts[0] >= 0.1
+
+
+def test_pause_applies_to_every_caller():
+    scheduler = LLMScheduler(base_backoff=0.1, max_in_flight=4)
+    limited, _ = flaky(1)
+    started = []
+
+    async def other():
+        await asyncio.sleep(0.01)  # submitted while the pause is active
+        started.append(time.monotonic())
+        return "other"
+
+    async def main():
+        begin = time.monotonic()
+        await asyncio.gather(scheduler.submit(limited), scheduler.submit(other))
+        return begin
+
+    begin = asyncio.run(main())
+    assert started[0] - begin >= 0.1
+
+
+def test_gives_up_after_max_retries():
+    scheduler = LLMScheduler(base_backoff=0.001, max_retries=2)
+    call, attempts = flaky(10)
+    with pytest.raises(FakeRateLimitError):
+        asyncio.run(scheduler.submit(call))
+    assert len(attempts) == 3
+
+
+def test_transient_errors_are_retried_per_call():
+    scheduler = LLMScheduler(base_backoff=0.05)
+    failing, attempts = flaky(2, FakeServerError)
+    started = []
+
+    async def other():
+        started.append(time.monotonic())
+        return "other"
+
+    async def main():
+        first = asyncio.create_task(scheduler.submit(failing))
+        await asyncio.sleep(0.01)  # while `failing` backs off
+        begin = time.monotonic()
+        await scheduler.submit(other)
+        return begin, await first
+
+    begin, result = asyncio.run(main())
+    assert result == "ok"
+    assert len(attempts) == 3
+    assert attempts[2] - attempts[1] >= 0.1
+    assert started[0] - begin < 0.05  # no global pause
+    assert scheduler.transient_failures == 2
+    assert scheduler.rate_limited == 0
+
+
+@pytest.mark.parametrize("error", [ConnectionError, TimeoutError])
+def test_connection_errors_and_timeouts_are_transient(error):
+    scheduler = LLMScheduler(base_backoff=0.001)
+    call, attempts = flaky(1, error)
+    assert asyncio.run(scheduler.submit(call)) == "ok"
+    assert len(attempts) == 2
+
+
+def test_gives_up_after_transient_retries():
+    scheduler = LLMScheduler(base_backoff=0.001, transient_retries=1)
+    call, attempts = flaky(5, FakeServerError)
+    with pytest.raises(FakeServerError):
+        asyncio.run(scheduler.submit(call))
+    assert len(attempts) == 2
+
+
+def test_other_errors_are_not_retried():
+    scheduler = LLMScheduler(base_backoff=0.001)
+    call, attempts = flaky(1, ValueError)
+    with pytest.raises(ValueError):
+        asyncio.run(scheduler.submit(call))
+    assert len(attempts) == 1
+
+
+def test_in_flight_calls_are_capped():
+    scheduler = LLMScheduler(max_in_flight=3)
+    peak = 0
+
+    async def call():
+        nonlocal peak
+        peak = max(peak, scheduler.in_flight)
+        await asyncio.sleep(0.01)
+        return "ok"
+
+    async def main():
+        return await asyncio.gather(*[scheduler.submit(call) for _ in range(12)])
+
+    assert asyncio.run(main()) == ["ok"] * 12
+    assert peak == 3
+    assert scheduler.in_flight == 0
+
+
+def test_requests_per_minute_budget_throttles():
+    # a full bucket of 120 requests, refilled at 2 per second
+    scheduler = LLMScheduler(requests_per_minute=120)
+    call, attempts = flaky(0)
+
+    async def main():
+        await asyncio.gather(*[scheduler.submit(call) for _ in range(121)])
+
+    started = time.monotonic()
+    asyncio.run(main())
+    assert time.monotonic() - started >= 0.45
+    assert attempts[119] - started < 0.2
+
+
+def test_tokens_per_minute_budget_throttles():
+    # 6000 tokens, refilled at 100 per second
+    scheduler = LLMScheduler(tokens_per_minute=6000, completion_tokens=0)
+    call, _ = flaky(0)
+
+    async def main():
+        await scheduler.submit(call, tokens=6000)
+        begin = time.monotonic()
+        await scheduler.submit(call, tokens=20)
+        return time.monotonic() - begin
+
+    assert asyncio.run(main()) >= 0.19
@@ -0,0 +1,88 @@
+import asyncio
+import time
+
+from agents import Agent, CuratorAgent, GeneratorAgent, ReflectorAgent, TeamManager
+from fake_llm import FakeLLMClient
+from models import AgentNames
+from playbook import Playbook, PlaybookDelta
+from sharding import DeltaLog, _ReplicaSync, train_sharded
+
+
+class Pause(Agent):
+    """Holds its run for the task's `pause` seconds."""
+
+    output_key = "paused"
+
+    async def _handle(self, task, item):
+        await asyncio.sleep(task.get("pause", 0))
+        return [True]
+
+
+def make_team():
+    # module level, so the spawned workers can import it
+    client = FakeLLMClient()
+    team = TeamManager("Team")
+    team.add_child(Pause("Pause"))
+    team.add_child(GeneratorAgent(AgentNames.GENERATOR.value, client))
+    team.add_child(ReflectorAgent(AgentNames.REFLECTOR.value, client))
+    team.add_child(CuratorAgent(AgentNames.CURATOR.value, client))
+    return team
+
+
+def add(bullet_id):
+    return PlaybookDelta("ADD", bullet_id, "general", f"content {bullet_id}")
+
+
+def test_delta_log_readers_only_see_new_complete_lines(tmp_path):
+    path = str(tmp_path / "deltas.jsonl")
+    writer, reader = DeltaLog(path), DeltaLog(path)
+
+    assert writer.append("w0", [add("a"), add("b")]) == 2
+    assert writer.append("w0", []) == 0
+    assert reader.read_new() == [("w0", add("a")), ("w0", add("b"))]
+
+    with open(path, "a") as f:
+        f.write('{"origin": "w1", "op": "ADD"')
+    assert reader.read_new() == []
+
+    with open(path, "a") as f:
+        f.write(', "bullet_id": "c"}\n')
+    assert reader.read_new() == [("w1", PlaybookDelta("ADD", "c"))]
+
+
+def test_replicas_exchange_deltas_without_echoes(tmp_path):
+    path = str(tmp_path / "deltas.jsonl")
+    first = _ReplicaSync("w0", Playbook(id_prefix="w0-"), DeltaLog(path))
+    second = _ReplicaSync("w1", Playbook(id_prefix="w1-"), DeltaLog(path))
+
+    first.playbook.apply_delta(add("w0-1"))
+    first.playbook.apply_delta(PlaybookDelta("REMOVE", "w0-1"))
+    second.playbook.apply_delta(add("w1-1"))
+    first.sync()
+    second.sync()
+    first.sync()
+
+    assert (first.published, second.published) == (1, 1)
+    assert (first.replayed, second.replayed) == (1, 1)
+    # replayed deltas are not published again
+    assert len(DeltaLog(path).read_new()) == 2
+
+
+def test_master_merges_while_the_workers_run():
+    playbook = Playbook()
+    merged_at = []
+    playbook.subscribe(lambda delta: merged_at.append(time.monotonic()))
+    tasks = [{"query": "fast"}, {"query": "slow", "pause": 2.0}]
+
+    reports = train_sharded(
+        tasks, make_team, playbook, workers=2, sync_every=1, merge_every=0.05
+    )
+    finished = time.monotonic()
+
+    assert [report.worker for report in reports] == ["w0", "w1"]
+    assert sum(report.tasks for report in reports) == 2
+    assert sum(report.failures for report in reports) == 0
+    assert {bullet.id.split("-")[0] for bullet in playbook} == {"w0", "w1"}
+    assert len(merged_at) == sum(report.published for report in reports)
+    # the fast shard's deltas reached the master long before the slow one ended
+    assert finished - merged_at[0] > 1.0
@@ -0,0 +1,319 @@
+import asyncio
+import time
+
+import pytest
+
+from agents import (
+    Agent,
+    Component,
+    CuratorAgent,
+    GeneratorAgent,
+    ReflectorAgent,
+    TeamManager,
+    VerifierAgent,
+)
+from checkpoint import CheckpointStore
+from fake_llm import FakeLLMClient
+from models import AgentNames
+from playbook import Playbook
+from verify import ExactMatchVerifier
+
+
+class Source(Agent):
+    """Emits its `delay` after sleeping that long."""
+
+    output_key = "numbers"
+
+    def __init__(self, name, delay):
+        super().__init__(name)
+        self.delay = delay
+
+    async def _handle(self, task, item):
+        await asyncio.sleep(self.delay)
+        return [self.delay]
+
+
+class Recorder(Agent):
+    """Records when each upstream item arrived."""
+
+    input_key = "numbers"
+    output_key = "seen"
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.arrivals = []
+
+    async def _handle(self, task, item):
+        self.arrivals.append((item, time.monotonic()))
+        return [item]
+
+
+class Link(Agent):
+    def __init__(self, name, input_key, output_key):
+        super().__init__(name)
+        self.input_key = input_key
+        self.output_key = output_key
+
+    async def _handle(self, task, item):
+        return [item]
+
+
+class Gauge(Agent):
+    """Tracks how many runs are inside it at once."""
+
+    output_key = "gauged"
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.in_flight = 0
+        self.peak = 0
+
+    async def _handle(self, task, item):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        return [task["query"]]
+
+
+def ace_team(client, streaming=False):
+    team = TeamManager("Team", streaming=streaming)
+    team.add_child(GeneratorAgent(AgentNames.GENERATOR.value, client))
+    team.add_child(GeneratorAgent(AgentNames.GENERATOR.value, client))
+    team.add_child(ReflectorAgent(AgentNames.REFLECTOR.value, client))
+    team.add_child(VerifierAgent(AgentNames.VERIFIER.value, ExactMatchVerifier()))
+    team.add_child(CuratorAgent(AgentNames.CURATOR.value, client))
+    return team
+
+
+def nested_team(children, streaming=False):
+    team = TeamManager("Inner", streaming=streaming)
+    for child in children:
+        team.add_child(child)
+    return team
+
+
+def ace_task():
+    return {"query": "q", "playbook": Playbook.from_list([])}
+
+
+def timed_team(streaming):
+    team = TeamManager("Team", streaming=streaming)
+    recorder = Recorder("Recorder")
+    for child in (Source("Fast", 0.0), Source("Slow", 0.2), recorder):
+        team.add_child(child)
+    return team, recorder
+
+
+def test_children_run_in_dependency_order():
+    client = FakeLLMClient()
+    team = TeamManager("Team")
+    team.add_child(CuratorAgent(AgentNames.CURATOR.value, client))
+    team.add_child(ReflectorAgent(AgentNames.REFLECTOR.value, client))
+    team.add_child(VerifierAgent(AgentNames.VERIFIER.value, ExactMatchVerifier()))
+    team.add_child(GeneratorAgent(AgentNames.GENERATOR.value, client))
+    team.add_child(GeneratorAgent(AgentNames.GENERATOR.value, client))
+
+    names = [child.name for child in team._execution_plan().order]
+    assert names == ["Generator", "Generator", "Reflector", "Verifier", "Curator"]
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_every_stage_handles_every_upstream_item(streaming):
+    client = FakeLLMClient()
+    context = asyncio.run(ace_team(client, streaming).run(ace_task()))
+
+    counts = {key: len(values) for key, values in context.items()}
+    assert counts == {"Generator": 2, "Reflector": 2, "Verifier": 2, "Curator": 2}
+    assert client.calls == 4
+
+
+def test_independent_branches_run_concurrently():
+    client = FakeLLMClient(latency=0.05)
+    team = ace_team(client)
+    team.add_child(ReflectorAgent(AgentNames.REFLECTOR.value, client))
+    asyncio.run(team.run(ace_task()))
+    # both Reflectors handle both Generator outputs at once
+    assert client.peak_in_flight >= 4
+
+
+def test_missing_producer_is_rejected():
+    team = TeamManager("Team")
+    team.add_child(ReflectorAgent(AgentNames.REFLECTOR.value, FakeLLMClient()))
+    with pytest.raises(RuntimeError, match="no agent of the team produces"):
+        asyncio.run(team.run(ace_task()))
+
+
+def test_cycles_are_rejected():
+    team = TeamManager("Team")
+    team.add_child(Link("A", "b", "a"))
+    team.add_child(Link("B", "a", "b"))
+    with pytest.raises(RuntimeError, match="depend on each other"):
+        team._execution_plan()
+
+
+def test_plan_is_rebuilt_when_children_change():
+    team = ace_team(FakeLLMClient())
+    verifier = team._execution_plan().order[3]
+    team.remove_child(verifier)
+    assert verifier not in team._execution_plan().order
+
+
+def test_streaming_hands_results_downstream_as_they_complete():
+    team, recorder = timed_team(streaming=True)
+
+    started = time.monotonic()
+    context = asyncio.run(team.run({"query": "q"}))
+
+    assert context["seen"] == [0.0, 0.2]
+    (first, arrived), _ = recorder.arrivals
+    assert first == 0.0
+    assert arrived - started < 0.1
+
+
+def test_batch_mode_waits_for_the_whole_stage():
+    team, recorder = timed_team(streaming=False)
+
+    started = time.monotonic()
+    asyncio.run(team.run({"query": "q"}))
+    assert all(arrived - started >= 0.2 for _, arrived in recorder.arrivals)
+
+
+def test_streaming_failure_fails_the_run():
+    class Failing(Agent):
+        input_key = "numbers"
+        output_key = "failed"
+
+        async def _handle(self, task, item):
+            raise ValueError("bad item")
+
+    team, _ = timed_team(streaming=True)
+    team.add_child(Failing("Failing"))
+
+    async def main():
+        with pytest.raises(ValueError):
+            await team.run({"query": "q"})
+        await asyncio.sleep(0)
+        # no stage worker or handler is left running
+        return asyncio.all_tasks() - {asyncio.current_task()}
+
+    assert asyncio.run(main()) == set()
+
+
+def collect(team, tasks, concurrency):
+    async def main():
+        return [result async for result in team.run_many(tasks, concurrency)]
+
+    return sorted(asyncio.run(main()), key=lambda result: result.index)
+
+
+def test_run_many_caps_the_runs_in_flight():
+    team = TeamManager("Team")
+    gauge = Gauge("Gauge")
+    team.add_child(gauge)
+
+    results = collect(team, ({"query": i} for i in range(20)), concurrency=3)
+
+    assert gauge.peak == 3
+    assert [result.context["gauged"] for result in results] == [
+        [i] for i in range(20)
+    ]
+
+
+def test_run_many_reports_failures_per_task():
+    team = ace_team(FakeLLMClient())
+    tasks = [ace_task(), {"query": "no playbook"}, ace_task()]
+
+    results = collect(team, tasks, concurrency=2)
+
+    assert [result.error is None for result in results] == [True, False, True]
+    assert results[1].context is None
+    assert len(results[0].context["Curator"]) == 2
+
+
+def test_teams_take_their_keys_from_their_children():
+    client = FakeLLMClient()
+    inner = nested_team(
+        [
+            CuratorAgent(AgentNames.CURATOR.value, client),
+            ReflectorAgent(AgentNames.REFLECTOR.value, client),
+        ]
+    )
+
+    assert isinstance(inner, Component)
+    assert inner.input_keys == ["Generator"]
+    assert inner.output_keys == ["Reflector", "Curator"]
+
+
+@pytest.mark.parametrize("inner_streaming", [False, True])
+@pytest.mark.parametrize("streaming", [False, True])
+def test_nested_teams_feed_and_consume_the_outer_team(streaming, inner_streaming):
+    client = FakeLLMClient()
+    producer = nested_team(
+        [
+            GeneratorAgent(AgentNames.GENERATOR.value, client),
+            GeneratorAgent(AgentNames.GENERATOR.value, client),
+            ReflectorAgent(AgentNames.REFLECTOR.value, client),
+        ],
+        inner_streaming,
+    )
+    team = TeamManager("Team", streaming=streaming)
+    team.add_child(CuratorAgent(AgentNames.CURATOR.value, client))
+    team.add_child(producer)
+    team.add_child(
+        nested_team([Link("Echo", AgentNames.CURATOR.value, "echo")], inner_streaming)
+    )
+
+    context = asyncio.run(team.run(ace_task()))
+
+    assert [child.name for child in team._execution_plan().order] == [
+        "Inner",
+        "Curator",
+        "Inner",
+    ]
+    counts = {key: len(values) for key, values in context.items()}
+    assert counts == {"Generator": 2, "Reflector": 2, "Curator": 2, "echo": 2}
+    assert client.calls == 4
+
+
+def test_changes_to_a_nested_team_reach_the_outer_plan():
+    client = FakeLLMClient()
+    inner = nested_team([GeneratorAgent(AgentNames.GENERATOR.value, client)])
+    team = TeamManager("Team")
+    team.add_child(ReflectorAgent(AgentNames.REFLECTOR.value, client))
+    team.add_child(inner)
+    assert [child.name for child in team._execution_plan().order] == [
+        "Inner",
+        "Reflector",
+    ]
+
+    inner.add_child(Link("Relay", AgentNames.REFLECTOR.value, "relayed"))
+
+    with pytest.raises(RuntimeError, match="depend on each other"):
+        team._execution_plan()
+
+
+def test_nested_teams_record_into_the_outer_checkpoint(tmp_path):
+    client = FakeLLMClient()
+    store = CheckpointStore(str(tmp_path / "checkpoints.sqlite"))
+
+    def run():
+        team = TeamManager("Team", checkpoint=store)
+        team.add_child(GeneratorAgent(AgentNames.GENERATOR.value, client))
+        team.add_child(
+            nested_team(
+                [
+                    ReflectorAgent(AgentNames.REFLECTOR.value, client),
+                    CuratorAgent(AgentNames.CURATOR.value, client),
+                ]
+            )
+        )
+        return asyncio.run(team.run({**ace_task(), "task_id": "task-1"}))
+
+    first = run()
+    second = run()
+
+    assert client.calls == 2
+    assert second == first
+    (stages,) = zip(*store._db.execute("SELECT stage FROM checkpoints"))
+    assert sorted(stages) == ["Generator#0", "Inner#0/Curator#0", "Inner#0/Reflector#0"]
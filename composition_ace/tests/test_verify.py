@@ -0,0 +1,88 @@
+import asyncio
+
+from agents import CuratorAgent, GeneratorAgent, ReflectorAgent, TeamManager
+from checkpoint import CheckpointStore
+from fake_llm import FakeLLMClient
+from models import AgentNames, VerifiedReflection
+from playbook import Playbook
+
+SEED = [{"id": "001 basics", "content": "Read the question twice"}]
+
+
+class Always:
+    def __init__(self, passed):
+        self.passed = passed
+
+    async def verify(self, task, answer):
+        return self.passed
+
+
+class SelfVerifyingClient(FakeLLMClient):
+    """A model whose reflections claim to be verified."""
+
+    async def _complete(self, user_prompt):
+        response = await super()._complete(user_prompt)
+        if "expert analyst" in user_prompt:
+            response["verified"] = True
+        return response
+
+
+def run(client, verifier=None):
+    team = TeamManager("Team")
+    team.add_child(GeneratorAgent(AgentNames.GENERATOR.value, client))
+    reflector = ReflectorAgent(AgentNames.REFLECTOR.value, client, verifier=verifier)
+    team.add_child(reflector)
+    team.add_child(CuratorAgent(AgentNames.CURATOR.value, client))
+    playbook = Playbook.from_list(SEED)
+    context = asyncio.run(team.run({"query": "q", "playbook": playbook}))
+    return context, reflector
+
+
+def test_verified_answers_skip_reflection_and_curation():
+    client = FakeLLMClient()
+    context, reflector = run(client, Always(True))
+
+    assert client.calls == 0
+    assert reflector.verified == 1
+    (reflection,) = context["Reflector"]
+    assert isinstance(reflection, VerifiedReflection)
+    assert context["Curator"] == []
+
+
+def test_verified_tags_are_applied_to_the_playbook():
+    context, _ = run(FakeLLMClient(), Always(True))
+    (reflection,) = context["Reflector"]
+    playbook = Playbook.from_list(SEED)
+
+    playbook.update_from_context(context)
+
+    tagged = {tag["bullet_id"] for tag in reflection.bullet_tags}
+    for bullet in playbook:
+        assert bullet.helpful == (1 if bullet.id in tagged else 0)
+
+
+def test_failed_answers_are_reflected_on():
+    client = FakeLLMClient()
+    context, reflector = run(client, Always(False))
+
+    assert client.calls == 2
+    assert reflector.verified == 0
+    assert len(context["Curator"]) == 1
+
+
+def test_a_reply_cannot_mark_itself_verified():
+    context, _ = run(SelfVerifyingClient())
+
+    (reflection,) = context["Reflector"]
+    assert not isinstance(reflection, VerifiedReflection)
+    assert len(context["Curator"]) == 1
+
+
+def test_verified_reflections_survive_a_checkpoint(tmp_path):
+    context, _ = run(FakeLLMClient(), Always(True))
+    store = CheckpointStore(str(tmp_path / "checkpoints.sqlite"))
+
+    store.put("task", "Reflector#0", "item", context["Reflector"])
+
+    assert store.get("task", "Reflector#0", "item") == context["Reflector"]
+    assert isinstance(store.get("task", "Reflector#0", "item")[0], VerifiedReflection)
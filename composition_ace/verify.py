@@ -0,0 +1,114 @@
+from __future__ import annotations
+import asyncio
+import math
+import os
+import re
+import sys
+import tempfile
+from typing import Any, Dict, Optional, Protocol, TYPE_CHECKING
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+if TYPE_CHECKING:
+    from models import GeneratorResponse
+
+_CODE_FENCE = re.compile(r"```(?:python|py)?\n(.*?)```", re.DOTALL)
+
+
+class Verifier(Protocol):
+    async def verify(self, task: Dict[str, Any], answer: GeneratorResponse) -> bool:
+        """True when the answer is known to be correct; False when unsure."""
+        ...
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.split()).casefold()
+
+
+def extract_code(answer: str) -> str:
+    """The first fenced code block of an answer, or the whole answer."""
+    match = _CODE_FENCE.search(answer)
+    return match.group(1) if match else answer
+
+
+class ExactMatchVerifier:
+    """Compares the answer with `task["ground_truth_answer"]` up to case and spacing."""
+
+    async def verify(self, task: Dict[str, Any], answer: GeneratorResponse) -> bool:
+        expected = task.get("ground_truth_answer")
+        if not expected:
+            return False
+        return _normalize(answer.final_answer) == _normalize(expected)
+
+
+class UnitTestVerifier:
+    """Runs a code answer followed by its tests in a fresh interpreter.
+
+    Tests are taken from `task["tests"]`, falling back to `tests`. The answer
+    passes when the process exits with status 0 within `timeout` seconds.
+
+    This executes model-generated code on the host with the user's
+    permissions; `-I`, a scratch working directory and the resource limits
+    below (CPU seconds, address space, file size, open files) bound runaway
+    code but are not a sandbox. Only enable it for trusted models, or run
+    the whole process in a container.
+    """
+
+    def __init__(
+        self,
+        tests: Optional[str] = None,
+        timeout: float = 10.0,
+        python: str = sys.executable,
+        memory_mb: int = 512,
+        max_file_mb: int = 10,
+        max_open_files: int = 64,
+    ) -> None:
+        self.tests = tests
+        self.timeout = timeout
+        self.python = python
+        self.memory_mb = memory_mb
+        self.max_file_mb = max_file_mb
+        self.max_open_files = max_open_files
+
+    async def verify(self, task: Dict[str, Any], answer: GeneratorResponse) -> bool:
+        tests = task.get("tests") or self.tests
+        if not tests:
+            return False
+        source = f"{extract_code(answer.final_answer)}\n\n{tests}\n"
+        with tempfile.TemporaryDirectory(prefix="ace-verify-") as workdir:
+            path = os.path.join(workdir, "answer.py")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(source)
+            process = await asyncio.create_subprocess_exec(
+                self.python,
+                "-I",
+                path,
+                cwd=workdir,
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.DEVNULL,
+                preexec_fn=self._limit_resources if resource is not None else None,
+            )
+            try:
+                return await asyncio.wait_for(process.wait(), self.timeout) == 0
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
+                return False
+
+    def _limit_resources(self) -> None:
+        # Runs in the child between fork and exec.
+        limits = {
+            resource.RLIMIT_CPU: math.ceil(self.timeout),
+            resource.RLIMIT_AS: self.memory_mb << 20,
+            resource.RLIMIT_FSIZE: self.max_file_mb << 20,
+            resource.RLIMIT_NOFILE: self.max_open_files,
+        }
+        for limit, value in limits.items():
+            _, hard = resource.getrlimit(limit)
+            if hard != resource.RLIM_INFINITY:
+                value = min(value, hard)
+            resource.setrlimit(limit, (value, value))
@@ -0,0 +1,125 @@
+"""Messages/sec of per-message vs batched, pooled observer delivery.
+
+    python observer_benchmark.py --messages 2000 --batch-size 100 --pool-size 4
+"""
+
+import argparse
+import time
+
+from observer_or_pub_sub_pattern import (
+    AsyncNotificationService,
+    BatchEmailObserver,
+    ConnectionPool,
+    LocalTransport,
+    NotificationService,
+    TransportError,
+)
+
+
+class PerMessageEmailObserver:
+    """The naive sender: one connection per notification, no retries."""
+
+    def __init__(self, transport):
+        self.transport = transport
+        self.failed = 0
+
+    def update(self, message):
+        connection = self.transport.connect()
+        try:
+            connection.send([f"[email] {message}"])
+        except TransportError:
+            self.failed += 1
+        finally:
+            connection.close()
+
+
+def _transport(args):
+    return LocalTransport(
+        "smtp",
+        connect_latency=args.connect_latency,
+        round_trip=args.round_trip,
+        failure_rate=args.failure_rate,
+        seed=0,
+    )
+
+
+def _publish(service, args):
+    for i in range(args.messages):
+        topic = f"C{i % args.topics}"
+        service.set_state(f"{topic} price changed to {i}", topic)
+
+
+def bench_per_message(args):
+    transport = _transport(args)
+    observer = PerMessageEmailObserver(transport)
+    service = NotificationService()
+    service.attach(observer)
+    started = time.perf_counter()
+    _publish(service, args)
+    return _result("per-message", transport, started, observer.failed)
+
+
+def bench_batched(args, service=None):
+    transport = _transport(args)
+    pool = ConnectionPool(transport, maxsize=args.pool_size)
+    observer = BatchEmailObserver(
+        pool, batch_size=args.batch_size, flush_interval=args.flush_interval
+    )
+    name = "batched"
+    if service is None:
+        service = NotificationService()
+    else:
+        name = "batched+async"
+    service.attach(observer)
+    started = time.perf_counter()
+    _publish(service, args)
+    if hasattr(service, "close"):
+        service.close()
+    observer.close()
+    pool.close()
+    return _result(name, transport, started, len(observer.dead_letters))
+
+
+def _result(name, transport, started, failed):
+    elapsed = time.perf_counter() - started
+    return {
+        "path": name,
+        "delivered": len(transport.delivered),
+        "failed": failed,
+        "connections": transport.connections_opened,
+        "seconds": elapsed,
+        "messages_per_second": len(transport.delivered) / elapsed if elapsed else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--topics", type=int, default=50)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--flush-interval", type=float, default=0.05)
+    parser.add_argument("--pool-size", type=int, default=4)
+    parser.add_argument("--connect-latency", type=float, default=0.002)
+    parser.add_argument("--round-trip", type=float, default=0.001)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    results = [
+        bench_per_message(args),
+        bench_batched(args),
+        bench_batched(args, AsyncNotificationService(maxsize=10_000)),
+    ]
+    print(
+        f"{'path':<14} {'delivered':>9} {'failed':>6} {'conns':>6} "
+        f"{'seconds':>8} {'msg/s':>10}"
+    )
+    for r in results:
+        print(
+            f"{r['path']:<14} {r['delivered']:>9} {r['failed']:>6} "
+            f"{r['connections']:>6} {r['seconds']:>8.3f} "
+            f"{r['messages_per_second']:>10.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
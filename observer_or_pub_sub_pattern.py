@@ -1,3 +1,9 @@
+import random
+import threading
+import time
+from collections import deque
+from fnmatch import fnmatchcase
+
 # ----------------------------Observer--------------------------------
 class EmailObserver:
     def update(self, message):
@@ -14,27 +20,531 @@ class PushObserver:
         print(f"Sending push notification: {message}")
 
 
+def deliver_batch(observer, messages):
+    """Hands a batch to observers that accept one, else one update() each."""
+    update_batch = getattr(observer, "update_batch", None)
+    if update_batch is not None:
+        update_batch(messages)
+        return
+    for message in messages:
+        observer.update(message)
+
+
+# ----------------------------Bulk delivery--------------------------------
+
+
+class TransportError(Exception):
+    pass
+
+
+class LocalTransport:
+    """Local stand-in for an SMTP/HTTP endpoint.
+
+    Opening a connection costs `connect_latency`; each send costs one round
+    trip plus `per_message` seconds per message, and fails with probability
+    `failure_rate`. Delivered messages are kept in `delivered`.
+    """
+
+    def __init__(
+        self,
+        name,
+        connect_latency=0.005,
+        round_trip=0.001,
+        per_message=0.00002,
+        failure_rate=0.0,
+        seed=None,
+    ):
+        self.name = name
+        self.connect_latency = connect_latency
+        self.round_trip = round_trip
+        self.per_message = per_message
+        self.failure_rate = failure_rate
+        self.delivered = []
+        self.connections_opened = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def connect(self):
+        time.sleep(self.connect_latency)
+        with self._lock:
+            self.connections_opened += 1
+        return TransportConnection(self)
+
+
+class TransportConnection:
+    def __init__(self, transport):
+        self.transport = transport
+        self.closed = False
+
+    def send(self, messages):
+        transport = self.transport
+        time.sleep(transport.round_trip + transport.per_message * len(messages))
+        with transport._lock:
+            if transport._random.random() < transport.failure_rate:
+                raise TransportError(f"{transport.name}: send failed")
+            transport.delivered.extend(messages)
+
+    def close(self):
+        self.closed = True
+
+
+class ConnectionPool:
+    """Reuses up to `maxsize` open connections to one transport."""
+
+    def __init__(self, transport, maxsize=4):
+        self.transport = transport
+        self.maxsize = maxsize
+        self._idle = []
+        self._open = 0
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        with self._condition:
+            self._condition.wait_for(lambda: self._idle or self._open < self.maxsize)
+            if self._idle:
+                return self._idle.pop()
+            self._open += 1
+        try:
+            return self.transport.connect()
+        except Exception:
+            self._discard()
+            raise
+
+    def release(self, connection, broken=False):
+        """Return a connection; a broken one is closed instead of reused."""
+        if broken:
+            connection.close()
+            self._discard()
+            return
+        with self._condition:
+            self._idle.append(connection)
+            self._condition.notify()
+
+    def close(self):
+        with self._condition:
+            for connection in self._idle:
+                connection.close()
+            self._open -= len(self._idle)
+            self._idle.clear()
+
+    def _discard(self):
+        with self._condition:
+            self._open -= 1
+            self._condition.notify()
+
+
+class BatchingObserver:
+    """Buffers messages and sends them in batches over pooled connections.
+
+    A batch is sent once `batch_size` messages are buffered or `flush_interval`
+    seconds after the first one arrived. A failed send is retried on a fresh
+    connection up to `max_retries` times with exponential backoff; after that
+    the messages go to `dead_letters` as (message, error) pairs.
+    """
+
+    channel = "batch"
+
+    def __init__(
+        self,
+        pool,
+        batch_size=100,
+        flush_interval=0.5,
+        max_retries=3,
+        backoff=0.01,
+        dead_letters=None,
+    ):
+        self.pool = pool
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.dead_letters = dead_letters if dead_letters is not None else []
+        self.sent = 0
+        self.retries = 0
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._timer = None
+
+    def update(self, message):
+        self.update_batch([message])
+
+    def update_batch(self, messages):
+        with self._lock:
+            self._buffer.extend(self._format(message) for message in messages)
+            batches = []
+            while len(self._buffer) >= self.batch_size:
+                batches.append(self._buffer[: self.batch_size])
+                del self._buffer[: self.batch_size]
+            if self._buffer and self._timer is None:
+                self._timer = threading.Timer(self.flush_interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        for batch in batches:
+            self._send(batch)
+
+    def flush(self):
+        with self._lock:
+            batch, self._buffer = self._buffer, []
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if batch:
+            self._send(batch)
+
+    def close(self):
+        self.flush()
+
+    def _format(self, message):
+        return f"[{self.channel}] {message}"
+
+    def _send(self, batch):
+        for attempt in range(self.max_retries + 1):
+            connection = self.pool.acquire()
+            # Any exception, not only TransportError, leaves it unusable.
+            broken = True
+            try:
+                connection.send(batch)
+                broken = False
+            except TransportError as error:
+                if attempt == self.max_retries:
+                    with self._lock:
+                        self.dead_letters.extend((m, repr(error)) for m in batch)
+                    return
+                with self._lock:
+                    self.retries += 1
+            else:
+                with self._lock:
+                    self.sent += len(batch)
+                return
+            finally:
+                self.pool.release(connection, broken=broken)
+            time.sleep(self.backoff * 2**attempt)
+
+
+class BatchEmailObserver(BatchingObserver):
+    channel = "email"
+
+
+class BatchSMSObserver(BatchingObserver):
+    channel = "sms"
+
+
+class BatchPushObserver(BatchingObserver):
+    channel = "push"
+
+
 # ----------------------------Subject--------------------------------
 
 
+def _is_wildcard(pattern):
+    return any(char in pattern for char in "*?[")
+
+
 class NotificationService:
+    """Observers subscribe to topics; patterns may use `*`, `?` and `[...]`.
+
+    Exact topics are looked up in a dict and only wildcard patterns are
+    matched with fnmatch. The observers of each published topic are resolved
+    once and cached; a subscription change updates only the cached topics
+    its pattern matches.
+    """
+
     def __init__(self):
         self._observers = set()  # - observers: List[Observer]
+        self._exact = {}  # - topic -> set of observers
+        self._wildcards = {}  # - pattern -> set of observers
+        self._index = {}  # - topic -> tuple of observers
 
-    def attach(self, observer):  # + attach(o)
+    def attach(self, observer, topic="*"):  # + attach(o, topic)
         self._observers.add(observer)
+        self._subscribers(topic).setdefault(topic, set()).add(observer)
+        for cached in self._cached_topics(topic):
+            if observer not in self._index[cached]:
+                self._index[cached] += (observer,)
 
-    def detach(self, observer):  # + detach(o)
-        self._observers.discard(observer)
+    def detach(self, observer, topic=None):  # + detach(o): all topics by default
+        if topic is not None:
+            patterns = [topic]
+        else:
+            patterns = [
+                pattern
+                for subscriptions in (self._exact, self._wildcards)
+                for pattern, subscribers in subscriptions.items()
+                if observer in subscribers
+            ]
+        for pattern in patterns:
+            subscriptions = self._subscribers(pattern)
+            subscribers = subscriptions.get(pattern)
+            if subscribers is None or observer not in subscribers:
+                continue
+            subscribers.discard(observer)
+            if not subscribers:
+                del subscriptions[pattern]
+            for cached in self._cached_topics(pattern):
+                self._index[cached] = self._resolve(cached)
+        if not any(
+            observer in subscribers
+            for subscriptions in (self._exact, self._wildcards)
+            for subscribers in subscriptions.values()
+        ):
+            self._observers.discard(observer)
 
-    def set_state(self, message):  # + set_state(x)
+    def set_state(self, message, topic=None):  # + set_state(x, topic)
         # state change logic would go here
-        self._notify(message)  # calls notify() internally
+        self._notify(message, self._observers_for(topic), topic)  # calls notify()
+
+    def set_state_batch(self, items):  # + set_state_batch([(x, topic), ...])
+        batches = {}  # observer -> [(message, topic), ...]
+        for message, topic in items:
+            for observer in self._observers_for(topic):
+                batches.setdefault(observer, []).append((message, topic))
+        self._notify_batch(batches)
+
+    def _observers_for(self, topic):
+        if topic is None:  # broadcast to every observer
+            return tuple(self._observers)
+        observers = self._index.get(topic)
+        if observers is None:
+            observers = self._index[topic] = self._resolve(topic)
+        return observers
 
-    def _notify(self, message):  # - notify(): for o in obs: o.update(state)
-        for observer in self._observers:
+    def _resolve(self, topic):
+        matched = set(self._exact.get(topic, ()))
+        for pattern, subscribers in self._wildcards.items():
+            if fnmatchcase(topic, pattern):
+                matched |= subscribers
+        return tuple(matched)
+
+    def _subscribers(self, pattern):
+        return self._wildcards if _is_wildcard(pattern) else self._exact
+
+    def _cached_topics(self, pattern):
+        if not _is_wildcard(pattern):
+            return [pattern] if pattern in self._index else []
+        return [topic for topic in self._index if fnmatchcase(topic, pattern)]
+
+    def _notify(self, message, observers, topic=None):  # - notify(): o.update(state)
+        for observer in observers:
             observer.update(message)
 
+    def _notify_batch(self, batches):
+        for observer, items in batches.items():
+            deliver_batch(observer, [message for message, _ in items])
+
+
+class BatchingPublisher:
+    """Stands in for a subject and coalesces rapid updates per topic.
+
+    set_state() only records the latest message of its topic. Every `window`
+    seconds the pending messages are published to `subject`, so each
+    subscriber gets one latest-value update per topic and window.
+    """
+
+    def __init__(self, subject, window=0.1):
+        self.subject = subject
+        self.window = window
+        self._pending = {}  # topic -> latest message
+        self._lock = threading.Lock()
+        self._timer = None
+        self.received = 0
+        self.published = 0
+
+    def set_state(self, message, topic=None):
+        with self._lock:
+            self._pending[topic] = message
+            self.received += 1
+            if self._timer is None:
+                self._timer = threading.Timer(self.window, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self.published += len(pending)
+        if not pending:
+            return
+        if hasattr(self.subject, "set_state_batch"):
+            self.subject.set_state_batch(
+                [(message, topic) for topic, message in pending.items()]
+            )
+            return
+        for topic, message in pending.items():
+            self.subject.set_state(message, topic)
+
+    def close(self):
+        self.flush()
+
+
+# Backpressure policies for a full observer queue
+BLOCK = "block"  # producer waits for room
+DROP = "drop"  # the new message is discarded
+COALESCE = "coalesce"  # a queued message of the same topic is replaced
+
+
+class ObserverWorker:
+    """Bounded queue plus a worker thread draining it, in batches, to one observer.
+
+    With COALESCE a full queue keeps the latest message per topic: a new
+    message replaces the queued one of its topic, and a message of a topic
+    with nothing queued waits for room like BLOCK.
+    """
+
+    def __init__(self, observer, maxsize=100, policy=BLOCK):
+        if policy not in (BLOCK, DROP, COALESCE):
+            raise ValueError(f"Unknown backpressure policy: {policy}")
+        self.observer = observer
+        self.maxsize = maxsize
+        self.policy = policy
+        self._queue = deque()  # [enqueued_at, topic, message]
+        self._latest = {}  # topic -> its queued entry
+        self._condition = threading.Condition()
+        self._closed = False
+        self.delivered = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.failed = 0
+        self.total_lag = 0.0
+        self.max_lag = 0.0
+        self._thread = threading.Thread(
+            target=self._run, name=f"observer-{type(observer).__name__}", daemon=True
+        )
+        self._thread.start()
+
+    def put(self, message, topic=None):
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Observer worker is closed")
+            if len(self._queue) >= self.maxsize:
+                if self.policy == DROP:
+                    self.dropped += 1
+                    return
+                queued = self._latest.get(topic)
+                if self.policy == COALESCE and queued is not None:
+                    queued[2] = message
+                    self.coalesced += 1
+                    return
+                self._condition.wait_for(
+                    lambda: len(self._queue) < self.maxsize or self._closed
+                )
+                if self._closed:
+                    raise RuntimeError("Observer worker is closed")
+            entry = [time.monotonic(), topic, message]
+            self._queue.append(entry)
+            self._latest[topic] = entry
+            self._condition.notify_all()
+
+    def close(self, timeout=None):
+        """Deliver what is queued, then stop the worker thread."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join(timeout)
+
+    def stats(self):
+        with self._condition:
+            return {
+                "queued": len(self._queue),
+                "delivered": self.delivered,
+                "dropped": self.dropped,
+                "coalesced": self.coalesced,
+                "failed": self.failed,
+                "avg_lag": self.total_lag / self.delivered if self.delivered else 0.0,
+                "max_lag": self.max_lag,
+            }
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._queue or self._closed)
+                if not self._queue:
+                    return
+                # Everything queued so far is handed over as one batch.
+                items = list(self._queue)
+                self._queue.clear()
+                self._latest.clear()
+                self._condition.notify_all()
+            now = time.monotonic()
+            delivered = self._deliver(items)
+            with self._condition:
+                self.delivered += len(delivered)
+                self.failed += len(items) - len(delivered)
+                for enqueued_at, _, _ in delivered:
+                    lag = now - enqueued_at
+                    self.total_lag += lag
+                    self.max_lag = max(self.max_lag, lag)
+
+    def _deliver(self, items):
+        """The items delivered; a failing update() only loses its own message."""
+        update_batch = getattr(self.observer, "update_batch", None)
+        if update_batch is not None:
+            try:
+                update_batch([message for _, _, message in items])
+            except Exception:
+                return []
+            return items
+        delivered = []
+        for item in items:
+            try:
+                self.observer.update(item[2])
+            except Exception:
+                continue
+            delivered.append(item)
+        return delivered
+
+
+class AsyncNotificationService(NotificationService):
+    """Fans out through one ObserverWorker per observer.
+
+    set_state() only enqueues, so a slow observer delays neither the producer
+    nor the other observers; `policy` decides what happens when its queue is
+    full. Lag is the time a message waited in the queue.
+    """
+
+    def __init__(self, maxsize=100, policy=BLOCK):
+        super().__init__()
+        self.maxsize = maxsize
+        self.policy = policy
+        self._workers = {}  # observer -> ObserverWorker
+
+    def attach(self, observer, topic="*"):
+        super().attach(observer, topic)
+        if observer not in self._workers:
+            self._workers[observer] = ObserverWorker(
+                observer, self.maxsize, self.policy
+            )
+
+    def detach(self, observer, topic=None):
+        super().detach(observer, topic)
+        if observer in self._observers:
+            return
+        worker = self._workers.pop(observer, None)
+        if worker is not None:
+            worker.close()
+
+    def _notify(self, message, observers, topic=None):
+        for observer in observers:
+            worker = self._workers.get(observer)
+            if worker is not None:
+                worker.put(message, topic)
+
+    def _notify_batch(self, batches):
+        for observer, items in batches.items():
+            worker = self._workers.get(observer)
+            if worker is not None:
+                for message, topic in items:
+                    worker.put(message, topic)
+
+    def stats(self):
+        return {observer: worker.stats() for observer, worker in self._workers.items()}
+
+    def close(self):
+        for worker in self._workers.values():
+            worker.close()
+
 
 # ----------------------------Client--------------------------------
 
@@ -47,7 +557,9 @@ class Currency:
 
     def change_price(self, new_price):
         self.price = new_price
-        self.subject.set_state(f"{self.name} price changed to {self.price}")
+        self.subject.set_state(
+            f"{self.name} price changed to {self.price}", topic=self.name
+        )
 
 
 if __name__ == "__main__":
@@ -58,10 +570,10 @@ if __name__ == "__main__":
     sms = SMSObserver()
     push = PushObserver()
 
-    # Attach observers to the subject
-    notification_service.attach(email)
-    notification_service.attach(sms)
-    notification_service.attach(push)
+    # Attach observers to the subject, by currency name
+    notification_service.attach(email)  # every currency
+    notification_service.attach(sms, "USD")
+    notification_service.attach(push, "E*")
 
     # Clients (Currencies)
     usd = Currency("USD", 20, notification_service)
@@ -69,3 +581,21 @@ if __name__ == "__main__":
 
     usd.change_price(50)
     eur.change_price(10)
+
+    # Async dispatch: each observer gets its own queue and worker thread
+    async_service = AsyncNotificationService(maxsize=100, policy=COALESCE)
+    for observer in (email, sms, push):
+        async_service.attach(observer)
+
+    gbp = Currency("GBP", 40, async_service)
+    gbp.change_price(45)  # returns immediately
+
+    # Batching: only the latest GBP price in each 50 ms window is published
+    batching = BatchingPublisher(async_service, window=0.05)
+    gbp.subject = batching
+    for price in range(46, 56):
+        gbp.change_price(price)
+    batching.close()
+    async_service.close()
+    for observer, stats in async_service.stats().items():
+        print(type(observer).__name__, stats)
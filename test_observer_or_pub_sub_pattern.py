@@ -0,0 +1,383 @@
+import random
+import threading
+import time
+from fnmatch import fnmatchcase
+
+import pytest
+
+from observer_or_pub_sub_pattern import (
+    BLOCK,
+    COALESCE,
+    DROP,
+    AsyncNotificationService,
+    BatchEmailObserver,
+    BatchingObserver,
+    BatchingPublisher,
+    ConnectionPool,
+    LocalTransport,
+    NotificationService,
+    ObserverWorker,
+    TransportError,
+)
+
+
+class Gate:
+    """Observer whose first update() holds the worker until `open()`."""
+
+    def __init__(self):
+        self.received = []
+        self.entered = threading.Event()
+        self._open = threading.Event()
+
+    def update(self, message):
+        self.entered.set()
+        self._open.wait(5)
+        self.received.append(message)
+
+    def open(self):
+        self._open.set()
+
+
+class Picky:
+    def __init__(self):
+        self.received = []
+
+    def update(self, message):
+        if message == "bad":
+            raise ValueError(message)
+        self.received.append(message)
+
+
+class BrokenBatch:
+    def update_batch(self, messages):
+        raise ValueError("down")
+
+
+class Inbox:
+    def __init__(self, name=""):
+        self.name = name
+        self.received = []
+
+    def update(self, message):
+        self.received.append(message)
+
+
+class BatchInbox(Inbox):
+    def __init__(self):
+        super().__init__()
+        self.batches = []
+
+    def update_batch(self, messages):
+        self.batches.append(messages)
+        self.received.extend(messages)
+
+
+class FlakyTransport(LocalTransport):
+    """Fails the first `failures` sends with `error`, then delivers."""
+
+    def __init__(self, failures, error=TransportError):
+        super().__init__("flaky", connect_latency=0, round_trip=0, per_message=0)
+        self.failures = failures
+        self.error = error
+        self.connections = []
+
+    def connect(self):
+        connection = super().connect()
+        self.connections.append(connection)
+        send = connection.send
+
+        def flaky_send(messages):
+            if self.failures:
+                self.failures -= 1
+                raise self.error("send failed")
+            send(messages)
+
+        connection.send = flaky_send
+        return connection
+
+
+def held_worker(policy, maxsize=2):
+    """A worker busy delivering "a", with an empty queue of `maxsize`."""
+    gate = Gate()
+    worker = ObserverWorker(gate, maxsize=maxsize, policy=policy)
+    worker.put("a")
+    assert gate.entered.wait(5)
+    return worker, gate
+
+
+def put_in_thread(worker, message, topic=None):
+    thread = threading.Thread(target=worker.put, args=(message, topic))
+    thread.start()
+    thread.join(0.05)
+    return thread
+
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError, match="Unknown backpressure policy"):
+        ObserverWorker(Picky(), policy="spill")
+
+
+def test_drop_discards_messages_for_a_full_queue():
+    worker, gate = held_worker(DROP)
+    for message in "bcd":
+        worker.put(message)
+    gate.open()
+    worker.close()
+
+    assert gate.received == ["a", "b", "c"]
+    assert worker.stats()["dropped"] == 1
+    assert worker.stats()["delivered"] == 3
+
+
+def test_block_waits_for_room():
+    worker, gate = held_worker(BLOCK)
+    worker.put("b")
+    worker.put("c")
+
+    blocked = put_in_thread(worker, "d")
+    assert blocked.is_alive()
+    gate.open()
+    blocked.join(5)
+    worker.close()
+
+    assert not blocked.is_alive()
+    assert gate.received == ["a", "b", "c", "d"]
+
+
+def test_coalesce_replaces_the_queued_message_of_a_topic():
+    worker, gate = held_worker(COALESCE)
+    worker.put("b", "USD")
+    worker.put("c", "EUR")
+    worker.put("d", "USD")
+
+    # nothing of GBP is queued, so it waits like BLOCK
+    blocked = put_in_thread(worker, "e", "GBP")
+    assert blocked.is_alive()
+    gate.open()
+    blocked.join(5)
+    worker.close()
+
+    assert gate.received == ["a", "d", "c", "e"]
+    assert worker.stats()["coalesced"] == 1
+
+
+def test_a_failing_update_only_loses_its_message():
+    worker = ObserverWorker(Picky())
+    for message in ("a", "bad", "b"):
+        worker.put(message)
+    worker.close()
+
+    assert worker.observer.received == ["a", "b"]
+    stats = worker.stats()
+    assert (stats["delivered"], stats["failed"]) == (2, 1)
+
+
+def test_a_failing_batch_counts_every_message():
+    worker = ObserverWorker(BrokenBatch())
+    worker.put("a")
+    worker.put("b")
+    worker.close()
+
+    stats = worker.stats()
+    assert (stats["delivered"], stats["failed"]) == (0, 2)
+
+
+def test_close_delivers_the_queue_then_rejects_puts():
+    worker, gate = held_worker(BLOCK)
+    worker.put("b")
+    gate.open()
+    worker.close()
+
+    assert gate.received == ["a", "b"]
+    assert worker.stats()["queued"] == 0
+    assert worker.stats()["max_lag"] > 0
+    with pytest.raises(RuntimeError, match="closed"):
+        worker.put("c")
+
+
+def test_a_slow_observer_does_not_hold_up_the_others():
+    service = AsyncNotificationService(maxsize=10)
+    slow, fast = Gate(), Picky()
+    service.attach(slow)
+    service.attach(fast, "USD")
+
+    started = time.monotonic()
+    service.set_state("a", "USD")
+    service.set_state("b", "USD")
+    assert slow.entered.wait(5)
+    deadline = time.monotonic() + 5
+    while len(fast.received) < 2 and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+    assert fast.received == ["a", "b"]
+    assert time.monotonic() - started < 1
+    slow.open()
+    service.close()
+    assert slow.received == ["a", "b"]
+
+
+def test_topics_route_to_exact_and_wildcard_subscribers():
+    service = NotificationService()
+    every, usd, euro = Inbox(), Inbox(), Inbox()
+    service.attach(every)
+    service.attach(usd, "USD")
+    service.attach(euro, "E[UX]*")
+
+    service.set_state("usd", "USD")
+    service.set_state("eur", "EUR")
+    service.set_state("all")
+
+    assert every.received == ["usd", "eur", "all"]
+    assert usd.received == ["usd", "all"]
+    assert euro.received == ["eur", "all"]
+
+
+def test_cached_topics_follow_subscription_changes():
+    service = NotificationService()
+    early, late = Inbox(), Inbox()
+    service.attach(early, "USD")
+    service.set_state("1", "USD")  # caches USD
+
+    service.attach(late, "U*")
+    service.set_state("2", "USD")
+    service.detach(early, "USD")
+    service.set_state("3", "USD")
+    service.detach(late)
+    service.set_state("4", "USD")
+
+    assert early.received == ["1", "2"]
+    assert late.received == ["2", "3"]
+    assert service._index["USD"] == ()
+
+
+def test_index_matches_brute_force_after_random_changes():
+    rng = random.Random(7)
+    observers = [Inbox(str(i)) for i in range(5)]
+    patterns = ["USD", "EUR", "GBP", "*", "E*", "?BP", "[UG]*", "U?D"]
+    topics = ["USD", "EUR", "GBP", "ETH"]
+    service = NotificationService()
+    subscriptions = set()
+
+    for _ in range(500):
+        observer, pattern = rng.choice(observers), rng.choice(patterns)
+        roll = rng.random()
+        if roll < 0.5:
+            service.attach(observer, pattern)
+            subscriptions.add((observer, pattern))
+        elif roll < 0.8:
+            service.detach(observer, pattern)
+            subscriptions.discard((observer, pattern))
+        elif roll < 0.9:
+            service.detach(observer)
+            subscriptions = {sub for sub in subscriptions if sub[0] is not observer}
+        for topic in topics:
+            expected = {o for o, p in subscriptions if fnmatchcase(topic, p)}
+            assert set(service._observers_for(topic)) == expected
+        assert set(service._observers) == {o for o, _ in subscriptions}
+
+
+def test_publisher_sends_the_latest_message_per_topic_and_window():
+    service = NotificationService()
+    inbox, batched = Inbox(), BatchInbox()
+    service.attach(inbox)
+    service.attach(batched)
+    publisher = BatchingPublisher(service, window=60)
+
+    for price in range(10):
+        publisher.set_state(f"USD {price}", "USD")
+    publisher.set_state("EUR 1", "EUR")
+    publisher.flush()
+    publisher.close()
+
+    assert inbox.received == ["USD 9", "EUR 1"]
+    assert batched.batches == [["USD 9", "EUR 1"]]
+    assert (publisher.received, publisher.published) == (11, 2)
+
+
+def test_publisher_flushes_after_its_window():
+    service = NotificationService()
+    inbox = Inbox()
+    service.attach(inbox)
+    publisher = BatchingPublisher(service, window=0.01)
+
+    publisher.set_state("a", "USD")
+    deadline = time.monotonic() + 5
+    while not inbox.received and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+    assert inbox.received == ["a"]
+
+
+def test_full_batches_are_sent_at_once_and_the_rest_on_flush():
+    transport = FlakyTransport(failures=0)
+    observer = BatchEmailObserver(ConnectionPool(transport), batch_size=100)
+
+    observer.update_batch([str(i) for i in range(250)])
+    assert observer.sent == 200
+    observer.close()
+
+    assert observer.sent == 250
+    assert transport.delivered[0] == "[email] 0"
+    assert transport.connections_opened == 1
+
+
+def test_partial_batches_are_sent_after_the_flush_interval():
+    transport = FlakyTransport(failures=0)
+    observer = BatchingObserver(ConnectionPool(transport), flush_interval=0.01)
+
+    observer.update("a")
+    deadline = time.monotonic() + 5
+    while not observer.sent and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+    assert transport.delivered == ["[batch] a"]
+
+
+def test_failed_sends_are_retried_on_a_fresh_connection():
+    transport = FlakyTransport(failures=2)
+    pool = ConnectionPool(transport)
+    observer = BatchingObserver(pool, batch_size=2, backoff=0)
+
+    observer.update_batch(["a", "b"])
+
+    assert observer.sent == 2
+    assert observer.retries == 2
+    assert observer.dead_letters == []
+    assert [connection.closed for connection in transport.connections] == [
+        True,
+        True,
+        False,
+    ]
+
+
+def test_sends_that_keep_failing_go_to_the_dead_letters():
+    transport = FlakyTransport(failures=10)
+    dead_letters = []
+    observer = BatchingObserver(
+        ConnectionPool(transport),
+        batch_size=2,
+        max_retries=2,
+        backoff=0,
+        dead_letters=dead_letters,
+    )
+
+    observer.update_batch(["a", "b"])
+
+    assert observer.sent == 0
+    assert observer.retries == 2
+    assert len(transport.connections) == 3
+    assert [message for message, _ in dead_letters] == ["[batch] a", "[batch] b"]
+    assert "send failed" in dead_letters[0][1]
+
+
+def test_other_errors_propagate_and_release_the_connection():
+    transport = FlakyTransport(failures=1, error=RuntimeError)
+    pool = ConnectionPool(transport, maxsize=1)
+    observer = BatchingObserver(pool, batch_size=1)
+
+    with pytest.raises(RuntimeError):
+        observer.update("a")
+    observer.update("b")
+
+    assert transport.connections[0].closed
+    assert transport.delivered == ["[batch] b"]